@@ -2,79 +2,54 @@ from google.adk.agents import Agent
 import pandas as pd
 from google.adk.agents.sequential_agent import SequentialAgent
 from pydantic import BaseModel, Field
-import json
-import random
+from typing import Optional
 
 # --- Data Source ---
 # Enhance product names to be more unique using a combination of adjectives, brand, and scent keywords
-brands = ["Dior", "Chanel", "Creed", "Tom Ford", "YSL", "Gucci", "Versace", "Armani", "Calvin Klein", "Burberry"]
-concentrations = ["Eau de Toilette", "Eau de Parfum", "Parfum", "Cologne"]
-genders = ["Men", "Women", "Unisex"]
-availability_status = ["In Stock", "Limited Stock", "Out of Stock"]
-fragrance_families = ["Woody", "Floral", "Oriental", "Fresh", "Fruity", "Citrus", "Spicy"]
-seasons = ["Summer", "Winter", "Spring", "Fall"]
-launch_years = list(range(2000, 2024))
-adjectives = ["Mystic", "Velvet", "Golden", "Noir", "Crystal", "Amber", "Silken", "Wild", "Intense", "Fresh"]
-scent_keywords = ["Whisper", "Flame", "Dream", "Aura", "Pulse", "Echo", "Bloom", "Rush", "Mist", "Twilight"]
+from .catalog import (
+    CATALOG_PATH, Catalog, adjectives, availability_status, brands, concentrations, fragrance_families,
+    generate_catalog, genders, launch_years, scent_keywords, seasons,
+)
+from .query_plan import QuerySpec, plan_cache
+from .serialization import encode_page
+from .fast_path import fast_path
+from .schema import schema_cache
 
 # Generate unique perfume data with better product names
-def generate_unique_perfume_data(n=30):
-    used_names = set()
-    products = []
+def generate_unique_perfume_data(n=30, seed=None):
+    return generate_catalog(n, seed).to_dict(orient='records')
 
-    while len(products) < n:
-        brand = random.choice(brands)
-        name = f"{random.choice(adjectives)} {random.choice(scent_keywords)} by {brand}"
-        if name in used_names:
-            continue
-        used_names.add(name)
-        product = {
-            "Product Name": name,
-            "Brand": brand,
-            "Top Notes": ", ".join(random.sample(["Bergamot", "Lemon", "Mandarin", "Apple", "Pear"], 2)),
-            "Heart Notes": ", ".join(random.sample(["Jasmine", "Rose", "Lavender", "Cinnamon", "Cardamom"], 2)),
-            "Base Notes": ", ".join(random.sample(["Musk", "Amber", "Cedarwood", "Patchouli", "Vanilla"], 2)),
-            "Concentration": random.choice(concentrations),
-            "Gender": random.choice(genders),
-            "Price (USD)": round(random.uniform(50, 400), 2),
-            "Availability": random.choice(availability_status),
-            "Fragrance Family": random.choice(fragrance_families),
-            "Best Season": random.choice(seasons),
-            "Launch Year": random.choice(launch_years),
-            "Rating (out of 5)": round(random.uniform(3.0, 5.0), 1)
-        }
-        products.append(product)
-    return products
+# Load the catalog from CATALOG_PATH (Parquet or Arrow) if set, otherwise generate the demo data
+catalog = Catalog.load(CATALOG_PATH) if CATALOG_PATH else Catalog.from_records(generate_unique_perfume_data(30))
+df = catalog.df
 
-# Create the updated DataFrame
-df = pd.DataFrame(generate_unique_perfume_data(30))
+def current_catalog():
+    return catalog
 
 # Query Refiner Agent
 query_refiner_agent = Agent(
     name="query_refiner_agent_v1",
     model="gemini-2.0-flash-exp",
     description="Refines the query to be more specific and accurate",
-    instruction=(
+    instruction=schema_cache.instruction(
         "You are a helpful assistant that can refine queries to be more specific and accurate."
         "If user asks for best seller or for random suggestions, search for perfumes with maximum rating."
-        "You receive a query and generate a refined query in plain english that another agent will use to generate a pandas expression."
-        "The query should be concise and to the point, and should not include any instructions or explanations."
+        "You receive a query and generate a refined query in plain english that another agent will use to generate a query spec."
+        "The query should be concise and to the point, and should not include any instructions or explanations.",
+        current_catalog,
     )
 )
 
-# Output Schema of query_generator_agent using pydantic, it should be a valid pandas expression
+# Output Schema of query_generator_agent using pydantic, a structured filter / sort / limit spec instead of code
 class QueryGeneratorOutput(BaseModel):
-    query: str = Field(description="A valid pandas expression that can be used to query the data.")
+    spec: QuerySpec = Field(description="Filters, sort keys and limit selecting the products that answer the query.")
 
-# a function that takes a pandas expression and executes it and returns the result, if result is an error, return the error message
-def execute_query(query: str):
+# a function that takes a query spec and runs it against the catalog and returns one page of the result, if result is an error, return the error message
+def execute_query(spec: dict, page: int = 1, columns: Optional[list[str]] = None):
     try:
-        result = eval(query, {'df': df})
-        if isinstance(result, pd.Series):
-            result = result.to_dict()
-        elif isinstance(result, pd.DataFrame):
-            result = result.to_dict(orient='records')
-        return json.dumps({"results": result} if result else {"error": "No products found matching your criteria"})
+        # Plans are cached by normalized spec, so repeated questions skip compiling and filtering
+        positions = plan_cache.run(QuerySpec.model_validate(spec), catalog)
+        return encode_page(catalog, positions, page=page, columns=columns)
     except Exception as e:
         return str(e)
 
@@ -83,9 +58,12 @@ query_generator_agent = Agent(
     name="query_generator_agent_v1",
     model="gemini-2.0-flash-exp",
     description="Handles data-related queries",
-    instruction=(
+    # The schema comes from the shared descriptor, rebuilt only when the catalog content changes
+    instruction=schema_cache.instruction(
         "You are a helpful assistant that can answer questions related to business data."
-        f"Seeing the refined query, {df.columns} and {df.head()}, you generate a pandas expression to query the data."
+        "Seeing the refined query and the catalog schema below, you generate a query spec: filters that must all match, "
+        "optional sort keys and an optional limit. For best sellers or random suggestions, sort by rating descending.",
+        current_catalog,
     ),
     output_schema=QueryGeneratorOutput,
 )
@@ -94,9 +72,12 @@ query_execution_agent = Agent(
     name="query_execution_agent_v1",
     model="gemini-2.0-flash-exp",
     description="Executes the query and returns the result",
-    instruction=(
-        "You are a helpful assistant that executes a pandas expression using the `execute_query` tool and return the results."
-        "You should return the results in a human readable format. In a concise and convincing way."
+    instruction=schema_cache.instruction(
+        "You are a helpful assistant that executes a query spec using the `execute_query` tool and return the results."
+        "The tool returns one page of matches as columns of values, with `total` matches and `pages`. Pass `columns` to fetch only "
+        "the fields the answer needs, and use `page` for more results. If `total` is large, mention it and suggest narrowing the search."
+        "You should return the results in a human readable format. In a concise and convincing way.",
+        current_catalog,
     ),
     input_schema=QueryGeneratorOutput,
     tools=[execute_query]
@@ -106,6 +87,9 @@ data_query_agent = SequentialAgent(
     name="data_query_agent_v1",
     description="Orchestrates data query processing by sequentially invoking the query_refiner_agent_v1, query_generator_agent",
     sub_agents=[query_refiner_agent, query_generator_agent, query_execution_agent],
+    # Simple questions ("in-stock Chanel for women under $200") are answered straight from the catalog
+    before_agent_callback=fast_path.before_agent_callback(catalog),
+    after_agent_callback=fast_path.after_agent_callback,
 )
 
 root_agent = Agent(
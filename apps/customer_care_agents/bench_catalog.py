@@ -0,0 +1,124 @@
+# Benchmark suite for the catalog query path on synthetic catalogs:
+# generation, chunked Parquet writing and loading, filtering against plain pandas,
+# compiled plans cold and cached, and result page encoding.
+#
+#   python bench_catalog.py
+#   python bench_catalog.py --rows 100000 1000000 5000000 --format arrow
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from catalog import Catalog, generate_catalog, write_catalog
+from query_plan import PlanCache, QuerySpec
+from serialization import encode_page
+
+QUERIES = {
+    "brand": ({"Brand": ["Chanel"]}, {}),
+    "brand + in stock": ({"Brand": ["Chanel"], "Availability": ["In Stock"]}, {}),
+    "price 100-120": ({}, {"Price (USD)": (100, 120)}),
+    "rating >= 4.8": ({}, {"Rating (out of 5)": (4.8, None)}),
+    "women floral summer < $150": (
+        {"Gender": ["Women"], "Fragrance Family": ["Floral"], "Best Season": ["Summer"]},
+        {"Price (USD)": (None, 150)},
+    ),
+    "3 brands, 4.5+, $200-300": (
+        {"Brand": ["Dior", "Creed", "Tom Ford"]},
+        {"Rating (out of 5)": (4.5, None), "Price (USD)": (200, 300)},
+    ),
+}
+
+SPECS = {
+    "in-stock chanel by rating": {
+        "filters": [{"column": "Brand", "op": "in", "values": ["Chanel"]},
+                    {"column": "Availability", "op": "in", "values": ["In Stock"]}],
+        "sort": [{"column": "Rating (out of 5)", "descending": True}],
+        "limit": 10,
+    },
+    "vanilla under $100": {
+        "filters": [{"column": "Base Notes", "op": "contains", "values": ["vanilla"]},
+                    {"column": "Price (USD)", "op": "between", "high": 100}],
+    },
+    "2020+ unisex eau de parfum": {
+        "filters": [{"column": "Launch Year", "op": "between", "low": 2020},
+                    {"column": "Gender", "op": "in", "values": ["Unisex"]},
+                    {"column": "Concentration", "op": "in", "values": ["Eau de Parfum"]}],
+    },
+}
+
+
+def pandas_filter(df, equals, ranges):
+    mask = None
+    for column, values in equals.items():
+        part = df[column].isin(values)
+        mask = part if mask is None else mask & part
+    for column, (low, high) in ranges.items():
+        if low is not None:
+            mask = df[column] >= low if mask is None else mask & (df[column] >= low)
+        if high is not None:
+            mask = df[column] <= high if mask is None else mask & (df[column] <= high)
+    return df[mask]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def bench(rows: int, fmt: str, repeat: int, chunk_size: int):
+    print(f"\n=== {rows:,} products ===")
+    start = time.perf_counter()
+    generate_catalog(min(rows, chunk_size), seed=42)
+    elapsed = time.perf_counter() - start
+    print(f"generate: {min(rows, chunk_size) / elapsed:,.0f} rows/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"catalog.{fmt}")
+        start = time.perf_counter()
+        if fmt == "parquet":
+            write_catalog(path, rows, seed=42, chunk_size=chunk_size)
+        else:
+            Catalog(generate_catalog(rows, seed=42)).save(path)
+        print(f"write {fmt}: {os.path.getsize(path) / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s")
+        catalog = Catalog.load(path)
+
+    # The baseline is what agent.py did before: a frame of Python strings filtered with boolean masks
+    legacy = catalog.df.astype({column: object for column in ["Brand", "Gender", "Availability", "Fragrance Family", "Best Season"]})
+
+    print(f"\n{'filter':<30} {'rows':>9} {'pandas ms':>10} {'catalog ms':>11} {'speedup':>8}")
+    for name, (equals, ranges) in QUERIES.items():
+        baseline_ms, expected = timed(lambda: pandas_filter(legacy, equals, ranges), repeat)
+        indexed_ms, positions = timed(lambda: catalog.select(equals, ranges), repeat)
+        assert list(positions) == list(expected.index), name
+        print(f"{name:<30} {len(positions):>9,} {baseline_ms:>10.2f} {indexed_ms:>11.2f} {baseline_ms / indexed_ms:>7.1f}x")
+
+    print(f"\n{'query spec':<30} {'rows':>9} {'cold ms':>10} {'cached ms':>11} {'page ms':>8}")
+    for name, raw in SPECS.items():
+        spec = QuerySpec.model_validate(raw)
+        cold_ms, positions = timed(lambda: PlanCache().run(spec, catalog), repeat)
+        plans = PlanCache()
+        plans.run(spec, catalog)
+        cached_ms, _ = timed(lambda: plans.run(QuerySpec.model_validate(raw), catalog), repeat)
+        page_ms, _ = timed(lambda: encode_page(catalog, positions), repeat)
+        print(f"{name:<30} {len(positions):>9,} {cold_ms:>10.2f} {cached_ms:>11.3f} {page_ms:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    args = parser.parse_args()
+    for rows in args.rows:
+        bench(rows, args.format, args.repeat, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
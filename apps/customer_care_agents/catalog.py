@@ -0,0 +1,299 @@
+import hashlib
+import os
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# --- Vocabularies ---
+brands = ["Dior", "Chanel", "Creed", "Tom Ford", "YSL", "Gucci", "Versace", "Armani", "Calvin Klein", "Burberry"]
+concentrations = ["Eau de Toilette", "Eau de Parfum", "Parfum", "Cologne"]
+genders = ["Men", "Women", "Unisex"]
+availability_status = ["In Stock", "Limited Stock", "Out of Stock"]
+fragrance_families = ["Woody", "Floral", "Oriental", "Fresh", "Fruity", "Citrus", "Spicy"]
+seasons = ["Summer", "Winter", "Spring", "Fall"]
+launch_years = list(range(2000, 2024))
+adjectives = ["Mystic", "Velvet", "Golden", "Noir", "Crystal", "Amber", "Silken", "Wild", "Intense", "Fresh"]
+scent_keywords = ["Whisper", "Flame", "Dream", "Aura", "Pulse", "Echo", "Bloom", "Rush", "Mist", "Twilight"]
+top_notes = ["Bergamot", "Lemon", "Mandarin", "Apple", "Pear"]
+heart_notes = ["Jasmine", "Rose", "Lavender", "Cinnamon", "Cardamom"]
+base_notes = ["Musk", "Amber", "Cedarwood", "Patchouli", "Vanilla"]
+
+# Low-cardinality columns stored as categoricals and indexed; the known levels come first,
+# followed by any other values a loaded catalog contains
+CATEGORIES = {
+    "Brand": brands,
+    "Gender": genders,
+    "Availability": availability_status,
+    "Fragrance Family": fragrance_families,
+    "Best Season": seasons,
+}
+# Numeric columns kept as sorted arrays for range queries
+RANGE_COLUMNS = ["Price (USD)", "Rating (out of 5)"]
+
+CATALOG_PATH = os.getenv("CATALOG_PATH", "")
+
+
+class Catalog:
+    """ Columnar, indexed view of the product table.
+
+    Categorical columns get a posting list of row positions per level, and the
+    numeric range columns get an argsort plus the sorted values, so equality and
+    range predicates are answered with index lookups and binary searches instead
+    of scanning the frame. select() starts from the most selective predicate and
+    checks the rest only on the rows that survive.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        for column, levels in CATEGORIES.items():
+            if column in df.columns:
+                present = df[column].dropna().astype(object).unique()
+                extra = sorted(set(present) - set(levels), key=str)
+                df[column] = pd.Categorical(df[column].astype(object), categories=levels + extra)
+        self.df = df
+        self._content_hash: Optional[str] = None
+        self._codes: dict[str, np.ndarray] = {}
+        self._postings: dict[str, list[np.ndarray]] = {}
+        for column in CATEGORIES:
+            if column not in df.columns:
+                continue
+            codes = df[column].cat.codes.to_numpy()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(df[column].cat.categories) + 1))
+            self._codes[column] = codes
+            self._postings[column] = [order[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+        self._values: dict[str, np.ndarray] = {}
+        self._order: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        for column in RANGE_COLUMNS:
+            if column not in df.columns:
+                continue
+            values = df[column].to_numpy(dtype=np.float64)
+            order = np.argsort(values, kind="stable")
+            self._values[column] = values
+            self._order[column] = order
+            self._sorted[column] = values[order]
+
+    @property
+    def content_hash(self) -> str:
+        """ sha256 over the column names and every row, computed once per catalog """
+        if self._content_hash is None:
+            digest = hashlib.sha256("\x1f".join(self.df.columns).encode())
+            digest.update(pd.util.hash_pandas_object(self.df, index=False).to_numpy().tobytes())
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "Catalog":
+        return cls(pd.DataFrame(records))
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        """ Load a catalog from Parquet (.parquet) or Arrow IPC (.arrow / .feather) """
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+
+        start = time.perf_counter()
+        if path.endswith((".arrow", ".feather")):
+            table = feather.read_table(path)
+        else:
+            table = pq.read_table(path)
+        # One contiguous buffer per column; taking rows from a column split across row groups is much slower
+        catalog = cls(table.combine_chunks().to_pandas())
+        print(f"Loaded {len(catalog):,} products from {path} in {time.perf_counter() - start:.2f}s")
+        return catalog
+
+    def save(self, path: str) -> None:
+        if path.endswith((".arrow", ".feather")):
+            self.df.to_feather(path)
+        else:
+            self.df.to_parquet(path, index=False)
+
+    @property
+    def indexed_columns(self) -> list[str]:
+        return list(self._postings)
+
+    @property
+    def range_columns(self) -> list[str]:
+        return list(self._sorted)
+
+    def levels(self, column: str) -> list[str]:
+        return list(self.df[column].cat.categories)
+
+    def _level_codes(self, column: str, values: Iterable[str]) -> np.ndarray:
+        lookup = {level.lower(): code for code, level in enumerate(self.df[column].cat.categories)}
+        return np.array(sorted({lookup[v.lower()] for v in values if v.lower() in lookup}), dtype=np.int64)
+
+    def equals_positions(self, column: str, values: Iterable[str]) -> np.ndarray:
+        """ Sorted row positions whose `column` is one of `values` """
+        postings = self._postings[column]
+        parts = [postings[code] for code in self._level_codes(column, values)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0].copy() if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def range_positions(self, column: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """ Row positions (in value order) with low <= `column` <= high """
+        ordered = self._sorted[column]
+        start = 0 if low is None else np.searchsorted(ordered, low, side="left")
+        stop = len(ordered) if high is None else np.searchsorted(ordered, high, side="right")
+        return self._order[column][start:stop]
+
+    def equals_mask(self, column: str, values: Iterable[str]) -> np.ndarray:
+        """ Boolean mask over all rows, via a lookup table on the category codes """
+        table = np.zeros(len(self._postings[column]) + 1, dtype=bool)  # last slot catches code -1 (missing)
+        table[self._level_codes(column, values)] = True
+        return table[self._codes[column]]
+
+    def range_mask(self, column: str, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        values = self._values[column]
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def select(self, equals: Optional[dict] = None, ranges: Optional[dict] = None) -> np.ndarray:
+        """ Sorted row positions matching every predicate.
+
+        `equals` maps an indexed column to a list of accepted levels, `ranges`
+        maps a range column to a (low, high) pair where either end may be None.
+        """
+        equals, ranges = equals or {}, ranges or {}
+        # Estimated result size of each predicate on its own
+        estimates = []
+        for column, values in equals.items():
+            postings = self._postings[column]
+            estimates.append((sum(len(postings[c]) for c in self._level_codes(column, values)), "equals", column))
+        for column, (low, high) in ranges.items():
+            ordered = self._sorted[column]
+            start = 0 if low is None else np.searchsorted(ordered, low, side="left")
+            stop = len(ordered) if high is None else np.searchsorted(ordered, high, side="right")
+            estimates.append((stop - start, "range", column))
+        if not estimates:
+            return np.arange(len(self.df))
+
+        estimates.sort(key=lambda estimate: estimate[0])
+        _, kind, column = estimates[0]
+        if kind == "equals":
+            positions = self.equals_positions(column, equals[column])
+        else:
+            positions = np.sort(self.range_positions(column, *ranges[column]))
+        for _, kind, column in estimates[1:]:
+            if not len(positions):
+                break
+            if kind == "equals":
+                table = np.zeros(len(self._postings[column]) + 1, dtype=bool)
+                table[self._level_codes(column, equals[column])] = True
+                positions = positions[table[self._codes[column][positions]]]
+            else:
+                low, high = ranges[column]
+                values = self._values[column][positions]
+                keep = np.ones(len(positions), dtype=bool)
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+                positions = positions[keep]
+        return positions
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        return self.df.iloc[positions]
+
+
+# Extra name parts widen the demo's 1,000-name space (adjective x keyword x brand) to tens of millions
+name_adjectives = adjectives + [
+    "Azure", "Blush", "Celestial", "Dusky", "Ember", "Frosted", "Gilded", "Hidden", "Ivory", "Jade", "Lunar",
+    "Midnight", "Opal", "Pale", "Quiet", "Radiant", "Sacred", "Scarlet", "Secret", "Smoky", "Solar", "Tender",
+    "Urban", "Vivid", "Warm", "Zesty", "Rare", "Royal", "Sheer", "Bold",
+]
+name_keywords = scent_keywords + [
+    "Garden", "Horizon", "Journey", "Legend", "Memory", "Nectar", "Oasis", "Petal", "Reverie", "Riviera",
+    "Rhythm", "Shadow", "Silence", "Spark", "Storm", "Tide", "Veil", "Voyage", "Wave", "Zenith", "Breeze",
+    "Canvas", "Desire", "Ember Glow", "Halo", "Ivy", "Kiss", "Lagoon", "Orchard", "Sonnet",
+]
+flankers = ["", " Elixir", " Absolu", " Extreme", " Sport", " Privé", " Eau Fraîche", " L'Eau", " Nuit", " Aqua",
+            " Reserve", " Edition", " Essence", " Cologne Blend", " Oud", " Légère", " Platinum", " Couture",
+            " Pour Elle", " Pour Lui"]
+editions = [""] + [f" No. {number}" for number in range(1, 100)]
+NAME_SPACE = len(name_adjectives) * len(name_keywords) * len(flankers) * len(editions) * len(brands)
+
+
+def _note_pairs(notes: list[str]) -> np.ndarray:
+    return np.array([f"{a}, {b}" for a in notes for b in notes if a != b], dtype=object)
+
+
+def generate_catalog(n: int, seed: Optional[int] = None, start: int = 0) -> pd.DataFrame:
+    """ Rows [start, start + n) of a seeded synthetic catalog with unique product names.
+
+    Row i gets name number (a * i + b) mod NAME_SPACE with a coprime to NAME_SPACE,
+    a bijection, so names never repeat across rows or chunks and no set of used
+    names is needed. The name number is split into adjective, keyword, flanker,
+    edition and brand, so every name matches its Brand column.
+    """
+    if start + n > NAME_SPACE:
+        raise ValueError(f"At most {NAME_SPACE:,} unique products can be generated")
+    seed = np.random.SeedSequence().entropy if seed is None else seed
+    params = np.random.default_rng(seed)
+    a = int(params.integers(1, NAME_SPACE))
+    while np.gcd(a, NAME_SPACE) != 1:
+        a += 1
+    b = int(params.integers(0, NAME_SPACE))
+    rng = np.random.default_rng([seed, start])
+
+    ids = (a * np.arange(start, start + n, dtype=np.int64) + b) % NAME_SPACE
+    ids, brand = np.divmod(ids, len(brands))
+    ids, edition = np.divmod(ids, len(editions))
+    ids, flanker = np.divmod(ids, len(flankers))
+    adjective, keyword = np.divmod(ids, len(name_keywords))
+    names = (
+        np.array(name_adjectives, dtype=object)[adjective] + " " + np.array(name_keywords, dtype=object)[keyword]
+        + np.array(flankers, dtype=object)[flanker] + np.array(editions, dtype=object)[edition]
+        + " by " + np.array(brands, dtype=object)[brand]
+    )
+
+    def categorical(levels: list[str]) -> pd.Categorical:
+        return pd.Categorical.from_codes(rng.integers(0, len(levels), n), categories=levels)
+
+    def pairs(notes: list[str]) -> np.ndarray:
+        combos = _note_pairs(notes)
+        return combos[rng.integers(0, len(combos), n)]
+
+    return pd.DataFrame({
+        "Product Name": names,
+        "Brand": pd.Categorical.from_codes(brand, categories=brands),
+        "Top Notes": pairs(top_notes),
+        "Heart Notes": pairs(heart_notes),
+        "Base Notes": pairs(base_notes),
+        "Concentration": categorical(concentrations),
+        "Gender": categorical(genders),
+        "Price (USD)": np.round(rng.uniform(50, 400, n), 2),
+        "Availability": categorical(availability_status),
+        "Fragrance Family": categorical(fragrance_families),
+        "Best Season": categorical(seasons),
+        "Launch Year": rng.integers(launch_years[0], launch_years[-1] + 1, n),
+        "Rating (out of 5)": np.round(rng.uniform(3.0, 5.0, n), 1),
+    })
+
+
+def write_catalog(path: str, n: int, seed: int = 0, chunk_size: int = 500_000) -> None:
+    """ Generate `n` products straight into a Parquet file, one row group per chunk, in bounded memory """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for start in range(0, n, chunk_size):
+            table = pa.Table.from_pandas(generate_catalog(min(chunk_size, n - start), seed, start), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,192 @@
+import os
+import re
+import time
+from typing import Optional
+
+from google.genai import types
+
+from .catalog import (
+    availability_status, base_notes, brands, fragrance_families, genders, heart_notes, seasons, top_notes,
+)
+from .query_plan import Filter, QuerySpec, SortKey, plan_cache
+
+FAST_PATH = os.getenv("FAST_PATH", "1") == "1"
+FAST_PATH_RESULTS = 5
+# Until the full agent chain has been timed, assume this many seconds for its three LLM calls
+DEFAULT_CHAIN_LATENCY = 4.0
+
+# Words that carry no slot but are expected in a product question; anything else makes the matcher decline
+FILLER = frozenset(
+    "a an and any are best can do for find get give good have i in is it list looking me most my nice of on "
+    "or perfume perfumes please product products recommend scent scents fragrance fragrances show some "
+    "suggest that the their there top us want what which with you your by from range priced price cost "
+    "costing dollars usd rated rating ones one something".split()
+)
+
+SYNONYMS = {
+    "Gender": {"men": "Men", "man": "Men", "male": "Men", "mens": "Men", "him": "Men", "women": "Women",
+               "woman": "Women", "female": "Women", "womens": "Women", "ladies": "Women", "her": "Women",
+               "unisex": "Unisex"},
+    "Availability": {"in stock": "In Stock", "available": "In Stock", "limited stock": "Limited Stock",
+                     "limited": "Limited Stock", "out of stock": "Out of Stock", "sold out": "Out of Stock"},
+    "Best Season": {"autumn": "Fall"},
+}
+
+_NUMBER = r"\$?\s*(\d+(?:\.\d+)?)"
+PRICE_PATTERNS = [
+    (re.compile(rf"\bbetween {_NUMBER} (?:and|to|-) {_NUMBER}"), "between"),
+    (re.compile(rf"{_NUMBER}\s*(?:-|to)\s*{_NUMBER}"), "between"),
+    (re.compile(rf"\b(?:under|below|less than|cheaper than|up to|max(?:imum)?|within) {_NUMBER}"), "high"),
+    (re.compile(rf"\b(?:over|above|more than|at least|from|min(?:imum)?) {_NUMBER}"), "low"),
+]
+RATING_PATTERN = re.compile(
+    r"\b(?:rated|rating|stars?)\s*(?:of\s*)?(?:above|over|more than|at least|from|of)?\s*(\d+(?:\.\d+)?)\s*\+?(?:\s*stars?)?"
+    r"|\b(\d+(?:\.\d+)?)\s*\+?\s*stars?\b"
+)
+RATING_WORDS = re.compile(r"\b(?:rated|rating|stars?)\b")
+# A number only counts as a price with a dollar sign, a currency word after it or a price word in the question
+CURRENCY = re.compile(r"\s*(?:dollars?|usd|bucks)\b")
+PRICE_WORDS = re.compile(r"\b(?:price|priced|cost|costing)\b")
+YEAR = re.compile(r"(?:19|20)\d\d")
+TOP_RATED = re.compile(r"\b(?:top[- ]rated|highest[- ]rated|best[- ]rated|best[- ]sellers?|best|popular)\b")
+CHEAPEST = re.compile(r"\b(?:cheapest|cheap|affordable|budget|lowest price)\b")
+
+
+class FastPath:
+    """ Answers simple catalog questions without the refiner / generator / execution LLM chain.
+
+    The matcher pulls slots out of the question using the known vocabularies
+    (brands, genders, families, seasons, availability, notes) and price and
+    rating phrases. It is only confident when every remaining word is filler;
+    any unrecognized word ("gift for my dad", "smells like the sea") declines
+    and the question goes through the agents as before. Installed as the
+    before_agent_callback of data_query_agent, with after_agent_callback timing
+    the full chain so the saved latency can be reported.
+    """
+
+    def __init__(self, enabled: bool = FAST_PATH):
+        self.enabled = enabled
+        vocabularies = {
+            "Brand": brands, "Gender": genders, "Availability": availability_status,
+            "Fragrance Family": fragrance_families, "Best Season": seasons,
+            "Top Notes": top_notes, "Heart Notes": heart_notes, "Base Notes": base_notes,
+        }
+        self._phrases: list[tuple[re.Pattern, str, str]] = []
+        for column, values in vocabularies.items():
+            aliases = {value.lower(): value for value in values}
+            aliases.update(SYNONYMS.get(column, {}))
+            for alias, value in aliases.items():
+                self._phrases.append((re.compile(rf"\b{re.escape(alias)}\b"), column, value))
+        # Longest phrases first, so "out of stock" wins over "stock" style partial matches
+        self._phrases.sort(key=lambda phrase: -len(phrase[0].pattern))
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self.chain_latency: Optional[float] = None
+        self._started: dict[str, float] = {}
+
+    def match(self, question: str) -> Optional[QuerySpec]:
+        """ A spec for the question if every content word was understood, else None """
+        text = question.lower().replace("’", "'")
+        text = re.sub(r"[?!,;:'\"]|\.(?!\d)", " ", text)
+        text = re.sub(r"(?<=[a-z])-(?=[a-z])", " ", text)  # "in-stock", "top-rated"
+        equals: dict[str, list[str]] = {}
+        filters: list[Filter] = []
+        sort: list[SortKey] = []
+
+        # Ratings first, so "rated above 4" is not read as a price over $4
+        found = RATING_PATTERN.search(text)
+        if found:
+            rating = float(found.group(1) or found.group(2))
+            if rating > 5:
+                return None
+            filters.append(Filter(column="Rating (out of 5)", op="between", low=rating))
+            text = text[:found.start()] + " " + text[found.end():]
+        for pattern, kind in PRICE_PATTERNS:
+            found = pattern.search(text)
+            if found:
+                dollars = ("$" in found.group(0) or CURRENCY.match(text, found.end()) is not None
+                           or PRICE_WORDS.search(text) is not None)
+                if not dollars and (kind == "low" or RATING_WORDS.search(text)
+                                    or any(YEAR.fullmatch(n) for n in found.groups())):
+                    # "from 2020", "over 4 stars": ambiguous without dollar context, leave it to the agents
+                    return None
+                numbers = [float(n) for n in found.groups()]
+                low, high = (numbers[0], numbers[1]) if kind == "between" else (
+                    (numbers[0], None) if kind == "low" else (None, numbers[0]))
+                filters.append(Filter(column="Price (USD)", op="between", low=low, high=high))
+                text = text[:found.start()] + " " + text[found.end():]
+                break
+        if TOP_RATED.search(text):
+            sort.append(SortKey(column="Rating (out of 5)", descending=True))
+            text = TOP_RATED.sub(" ", text)
+        if CHEAPEST.search(text):
+            sort.append(SortKey(column="Price (USD)"))
+            text = CHEAPEST.sub(" ", text)
+
+        for pattern, column, value in self._phrases:
+            if pattern.search(text):
+                equals.setdefault(column, [])
+                if value not in equals[column]:
+                    equals[column].append(value)
+                text = pattern.sub(" ", text)
+
+        leftover = [word for word in re.findall(r"[a-z0-9$]+", text) if word not in FILLER]
+        if leftover or not (equals or filters):
+            return None
+        for column, values in equals.items():
+            op = "contains" if column.endswith("Notes") else "in"
+            filters.append(Filter(column=column, op=op, values=values))
+        return QuerySpec(filters=filters, sort=sort or [SortKey(column="Rating (out of 5)", descending=True)])
+
+    def answer(self, spec: QuerySpec, catalog) -> str:
+        positions = plan_cache.run(spec, catalog)
+        if not len(positions):
+            return "I couldn't find any Scentara perfumes matching that. Would you like me to widen the search?"
+        rows = catalog.rows(positions[:FAST_PATH_RESULTS])
+        lines = [
+            f"- **{row['Product Name']}** ({row['Concentration']}, {row['Gender']}) - ${row['Price (USD)']:.2f}, "
+            f"rated {row['Rating (out of 5)']}/5, {row['Fragrance Family']}, {row['Availability']}"
+            for _, row in rows.iterrows()
+        ]
+        shown = f"here are the top {len(rows)}" if len(positions) > len(rows) else "here they are"
+        noun = "perfume" if len(positions) == 1 else "perfumes"
+        return f"I found {len(positions)} matching {noun}, {shown}:\n" + "\n".join(lines)
+
+    def before_agent_callback(self, catalog):
+        def callback(callback_context) -> Optional[types.Content]:
+            self._started[callback_context.invocation_id] = time.perf_counter()
+            content = callback_context.user_content
+            question = " ".join(part.text for part in (content.parts if content else []) if part.text)
+            if not self.enabled or not question:
+                return None
+            start = time.perf_counter()
+            self.lookups += 1
+            spec = self.match(question)
+            if spec is None:
+                return None
+            text = self.answer(spec, catalog)
+            self._started.pop(callback_context.invocation_id, None)
+            elapsed = time.perf_counter() - start
+            self.hits += 1
+            self.saved_seconds += max((self.chain_latency or DEFAULT_CHAIN_LATENCY) - elapsed, 0.0)
+            print(f"Fast path answered {question!r} in {elapsed * 1000:.1f} ms; {self.stats()}")
+            return types.Content(role="model", parts=[types.Part(text=text)])
+        return callback
+
+    def after_agent_callback(self, callback_context) -> None:
+        started = self._started.pop(callback_context.invocation_id, None)
+        if started is None:
+            return None
+        elapsed = time.perf_counter() - started
+        # Moving average of the full chain, used to estimate what each fast-path hit saved
+        self.chain_latency = elapsed if self.chain_latency is None else 0.8 * self.chain_latency + 0.2 * elapsed
+        print(f"Agent chain answered in {elapsed:.1f}s; {self.stats()}")
+        return None
+
+    def stats(self) -> str:
+        hit_rate = self.hits / self.lookups if self.lookups else 0.0
+        return f"fast path hits {self.hits}/{self.lookups} ({hit_rate:.0%}), ~{self.saved_seconds:.1f}s saved"
+
+
+fast_path = FastPath()
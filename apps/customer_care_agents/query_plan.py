@@ -0,0 +1,164 @@
+import json
+from collections import OrderedDict
+from typing import Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+Column = Literal[
+    "Product Name", "Brand", "Top Notes", "Heart Notes", "Base Notes", "Concentration", "Gender",
+    "Price (USD)", "Availability", "Fragrance Family", "Best Season", "Launch Year", "Rating (out of 5)",
+]
+NUMERIC_COLUMNS = {"Price (USD)", "Launch Year", "Rating (out of 5)"}
+PLAN_CACHE_SIZE = 256
+# Larger results are recomputed rather than held by every cached plan
+MAX_CACHED_ROWS = 100_000
+
+
+class Filter(BaseModel):
+    column: Column = Field(description="Column to filter on.")
+    op: Literal["in", "not_in", "contains", "between"] = Field(
+        description="'in' / 'not_in' match whole values, 'contains' matches substrings (e.g. a note in 'Top Notes'), "
+        "'between' is an inclusive numeric range."
+    )
+    values: list[str] = Field(default_factory=list, description="Values for 'in', 'not_in' and 'contains'.")
+    low: Optional[float] = Field(default=None, description="Lower bound for 'between', or null for no lower bound.")
+    high: Optional[float] = Field(default=None, description="Upper bound for 'between', or null for no upper bound.")
+
+
+class SortKey(BaseModel):
+    column: Column
+    descending: bool = False
+
+
+class QuerySpec(BaseModel):
+    """ Structured catalog query: every filter must match, then rows are sorted and limited """
+    filters: list[Filter] = Field(default_factory=list, description="Conditions that must all hold.")
+    sort: list[SortKey] = Field(default_factory=list, description="Sort keys, most significant first.")
+    limit: Optional[int] = Field(default=None, description="Maximum number of products to return, or null for all.")
+
+
+def normalize_spec(spec: QuerySpec) -> str:
+    """ Canonical form of a spec, so reordered filters or different casing share one plan """
+    filters = sorted(
+        (f.column, f.op, sorted(v.strip().lower() for v in f.values), f.low, f.high) for f in spec.filters
+    )
+    sort = [(key.column, key.descending) for key in spec.sort]
+    return json.dumps([filters, sort, spec.limit])
+
+
+class QueryPlan:
+    """ A spec compiled against one catalog.
+
+    Conditions on indexed columns go to Catalog.select() as equality or range
+    predicates; everything else becomes a residual mask evaluated only on the
+    rows select() returns. Results up to MAX_CACHED_ROWS are remembered, so
+    repeating the plan is a dictionary lookup.
+    """
+
+    def __init__(self, spec: QuerySpec, catalog):
+        self.catalog = catalog
+        self.equals: dict[str, set[str]] = {}
+        self.ranges: dict[str, tuple[Optional[float], Optional[float]]] = {}
+        self.residual: list[Filter] = []
+        self.empty = False
+        for f in spec.filters:
+            if f.column in catalog.indexed_columns and f.op in ("in", "not_in"):
+                levels = {level.lower(): level for level in catalog.levels(f.column)}
+                wanted = {levels[v.strip().lower()] for v in f.values if v.strip().lower() in levels}
+                if f.op == "not_in":
+                    wanted = set(levels.values()) - {levels.get(v.strip().lower()) for v in f.values}
+                # Several conditions on one column must all hold, so their accepted levels intersect
+                self.equals[f.column] = self.equals[f.column] & wanted if f.column in self.equals else wanted
+                self.empty |= not self.equals[f.column]
+            elif f.column in catalog.range_columns and f.op == "between":
+                low, high = self.ranges.get(f.column, (None, None))
+                if f.low is not None:
+                    low = f.low if low is None else max(low, f.low)
+                if f.high is not None:
+                    high = f.high if high is None else min(high, f.high)
+                self.ranges[f.column] = (low, high)
+            else:
+                self.residual.append(f)
+        self.sort = spec.sort
+        self.limit = spec.limit
+        self._result: Optional[np.ndarray] = None
+
+    def _residual_mask(self, f: Filter, positions: np.ndarray) -> np.ndarray:
+        column = self.catalog.df[f.column].iloc[positions]
+        if f.op == "between":
+            values = column.to_numpy(dtype=np.float64)
+            keep = np.ones(len(values), dtype=bool)
+            if f.low is not None:
+                keep &= values >= f.low
+            if f.high is not None:
+                keep &= values <= f.high
+            return keep
+        text = column.astype(str).str.lower()
+        wanted = [v.strip().lower() for v in f.values]
+        if f.op == "contains":
+            keep = np.zeros(len(text), dtype=bool)
+            for value in wanted:
+                keep |= text.str.contains(value, regex=False).to_numpy()
+            return keep
+        keep = text.isin(wanted).to_numpy()
+        return ~keep if f.op == "not_in" else keep
+
+    def execute(self) -> np.ndarray:
+        """ Row positions of the matching products, in result order """
+        if self._result is not None:
+            return self._result
+        if self.empty:
+            positions = np.empty(0, dtype=np.int64)
+        else:
+            positions = self.catalog.select(self.equals, self.ranges)
+        for f in self.residual:
+            if not len(positions):
+                break
+            positions = positions[self._residual_mask(f, positions)]
+        if self.sort and len(positions):
+            # lexsort treats its last key as the primary one
+            keys = []
+            for key in reversed(self.sort):
+                column = self.catalog.df[key.column].iloc[positions]
+                if key.column in NUMERIC_COLUMNS:
+                    values = column.to_numpy(dtype=np.float64)
+                else:
+                    values = column.astype(str).rank(method="dense").to_numpy()
+                keys.append(-values if key.descending else values)
+            positions = positions[np.lexsort(keys)]
+        if self.limit is not None:
+            positions = positions[:max(self.limit, 0)]
+        if len(positions) <= MAX_CACHED_ROWS:
+            self._result = positions
+        return positions
+
+
+class PlanCache:
+    """ LRU of compiled plans keyed by catalog and normalized spec """
+
+    def __init__(self, max_entries: int = PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._plans: OrderedDict[tuple[int, str], QueryPlan] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, spec: QuerySpec, catalog) -> QueryPlan:
+        key = (id(catalog), normalize_spec(spec))
+        plan = self._plans.get(key)
+        if plan is not None and plan.catalog is catalog:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+        self.misses += 1
+        plan = QueryPlan(spec, catalog)
+        self._plans[key] = plan
+        if len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+    def run(self, spec: QuerySpec, catalog) -> np.ndarray:
+        return self.plan(spec, catalog).execute()
+
+
+plan_cache = PlanCache()
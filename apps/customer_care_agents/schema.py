@@ -0,0 +1,66 @@
+from typing import Callable
+
+import pandas as pd
+
+# Text columns with at most this many distinct values (or list items) are described by listing them
+MAX_LEVELS = 20
+# Free text columns are described by a couple of example values instead
+EXAMPLE_VALUES = 2
+
+
+def describe_catalog(catalog) -> str:
+    """ Compact schema of the catalog: one line per column with its type and levels or range """
+    df = catalog.df
+    lines = [f"Catalog schema {catalog.content_hash[:12]} ({len(df):,} products). Columns:"]
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            lines.append(f"- {column}: one of {', '.join(map(str, series.cat.categories))}")
+            continue
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            kind = "integer" if pd.api.types.is_integer_dtype(series.dtype) else "number"
+            lines.append(f"- {column}: {kind}, {series.min():g} to {series.max():g}")
+            continue
+        distinct = series.dropna().unique()
+        if len(distinct) > MAX_LEVELS ** 2:
+            # Far too many values to be a list of a few levels; don't split every product name
+            items = distinct
+        else:
+            items = sorted({item.strip() for value in distinct for item in str(value).split(",")})
+        if len(items) < len(distinct) and len(items) <= MAX_LEVELS:
+            lines.append(f"- {column}: comma-separated list drawn from {', '.join(items)}")
+        elif len(distinct) <= MAX_LEVELS:
+            lines.append(f"- {column}: one of {', '.join(sorted(map(str, distinct)))}")
+        else:
+            examples = "; ".join(f'"{value}"' for value in series.head(EXAMPLE_VALUES))
+            lines.append(f"- {column}: text, e.g. {examples}")
+    return "\n".join(lines)
+
+
+class SchemaCache:
+    """ Schema descriptors keyed by catalog content hash.
+
+    Every agent that needs the schema shares one descriptor, and it is rebuilt
+    only when the catalog content changes, so the instruction text stays byte
+    for byte identical between requests and provider-side prompt caching hits.
+    """
+
+    def __init__(self):
+        self._descriptors: dict[str, str] = {}
+
+    def describe(self, catalog) -> str:
+        key = catalog.content_hash
+        if key not in self._descriptors:
+            print(f"Building schema descriptor for catalog {key[:12]}")
+            # Older versions are never asked for again once the catalog changed
+            self._descriptors = {key: describe_catalog(catalog)}
+        return self._descriptors[key]
+
+    def instruction(self, base: str, get_catalog: Callable) -> Callable:
+        """ ADK instruction provider: the static instruction followed by the current catalog schema """
+        def provider(context) -> str:
+            return f"{base}\n\n{self.describe(get_catalog())}"
+        return provider
+
+
+schema_cache = SchemaCache()
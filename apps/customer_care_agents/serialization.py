@@ -0,0 +1,57 @@
+import json
+import math
+import os
+from typing import Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Hard cap on rows per tool response, whatever page size the agent asks for
+MAX_PAGE_SIZE = int(os.getenv("QUERY_MAX_PAGE_SIZE", "25"))
+
+
+def dumps(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_page(
+    catalog,
+    positions: np.ndarray,
+    page: int = 1,
+    page_size: int = MAX_PAGE_SIZE,
+    columns: Optional[list[str]] = None,
+) -> str:
+    """ One page of a result as compact columnar JSON.
+
+    Column names are written once and each column is a list of values, instead of
+    repeating every key in every record. `total` is the full match count, so the
+    agent can tell a broad query from a precise one and refine or page through it.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    total = len(positions)
+    if total == 0:
+        return dumps({"total": 0, "error": "No products found matching your criteria"})
+    pages = math.ceil(total / page_size)
+    page = max(1, min(page, pages))
+    columns = columns or list(catalog.df.columns)
+    unknown = [column for column in columns if column not in catalog.df.columns]
+    if unknown:
+        return dumps({"error": f"Unknown columns {unknown}; available columns are {list(catalog.df.columns)}"})
+
+    rows = catalog.df.iloc[positions[(page - 1) * page_size:page * page_size]]
+    payload = {
+        "total": total,
+        "page": page,
+        "pages": pages,
+        "columns": columns,
+        "data": [rows[column].tolist() for column in columns],
+    }
+    if pages > 1:
+        payload["note"] = f"Showing {len(rows)} of {total} matches; refine the filters or ask for another page."
+    return dumps(payload)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from .catalog import Catalog, brands
+
+
+def products():
+    return pd.DataFrame({
+        "Product Name": ["Terre", "Petit", "Sauvage", "No. 5"],
+        "Brand": ["Hermes", "Hermes", "Dior", "Chanel"],
+        "Gender": ["Men", "Kids", "Men", "Women"],
+        "Availability": ["In Stock", "In Stock", "Out of Stock", "In Stock"],
+        "Fragrance Family": ["Woody", "Fresh", "Fresh", "Floral"],
+        "Best Season": ["Fall", "Summer", "Summer", "Winter"],
+        "Price (USD)": [120.0, 60.0, 95.0, 150.0],
+        "Rating (out of 5)": [4.6, 4.1, 4.4, 4.8],
+    })
+
+
+class TestCatalogLevels(unittest.TestCase):
+    def test_unknown_values_are_kept(self):
+        catalog = Catalog(products())
+        self.assertFalse(catalog.df["Brand"].isna().any())
+        self.assertFalse(catalog.df["Gender"].isna().any())
+        self.assertEqual(catalog.levels("Brand"), brands + ["Hermes"])
+        self.assertIn("Kids", catalog.levels("Gender"))
+
+    def test_unknown_values_are_filterable(self):
+        catalog = Catalog(products())
+        self.assertEqual(catalog.equals_positions("Brand", ["Hermes"]).tolist(), [0, 1])
+        self.assertEqual(catalog.equals_positions("Gender", ["kids"]).tolist(), [1])
+        self.assertEqual(catalog.equals_positions("Brand", ["Dior"]).tolist(), [2])
+
+    def test_loaded_catalog_keeps_unknown_values(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("catalog.parquet", "catalog.arrow"):
+                path = os.path.join(tmp, name)
+                products().to_parquet(path) if name.endswith(".parquet") else products().to_feather(path)
+                catalog = Catalog.load(path)
+                self.assertEqual(catalog.equals_positions("Brand", ["Hermes"]).tolist(), [0, 1])
+                self.assertEqual(catalog.equals_positions("Gender", ["Kids"]).tolist(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from .fast_path import FastPath
+
+
+class TestFastPath(unittest.TestCase):
+    def setUp(self):
+        self.fast_path = FastPath(enabled=True)
+
+    def filters(self, question):
+        spec = self.fast_path.match(question)
+        self.assertIsNotNone(spec, question)
+        return {f.column: f for f in spec.filters}
+
+    def test_rated_above_is_a_rating_not_a_price(self):
+        filters = self.filters("Chanel perfumes rated above 4")
+        self.assertEqual(filters["Rating (out of 5)"].low, 4.0)
+        self.assertEqual(filters["Brand"].values, ["Chanel"])
+        self.assertNotIn("Price (USD)", filters)
+
+    def test_rating_over(self):
+        filters = self.filters("perfumes with rating over 4.5")
+        self.assertEqual(filters["Rating (out of 5)"].low, 4.5)
+        self.assertNotIn("Price (USD)", filters)
+
+    def test_rated_at_least(self):
+        filters = self.filters("Dior rated at least 4")
+        self.assertEqual(filters["Rating (out of 5)"].low, 4.0)
+        self.assertEqual(filters["Brand"].values, ["Dior"])
+        self.assertNotIn("Price (USD)", filters)
+
+    def test_year_declines(self):
+        self.assertIsNone(self.fast_path.match("women perfumes from 2020"))
+        self.assertIsNone(self.fast_path.match("women perfumes from 2015 to 2020"))
+
+    def test_bare_lower_bound_declines(self):
+        self.assertIsNone(self.fast_path.match("perfumes over 100"))
+
+    def test_rating_out_of_range_declines(self):
+        self.assertIsNone(self.fast_path.match("perfumes rated above 10"))
+
+    def test_price_with_dollar_context(self):
+        self.assertEqual(self.filters("perfumes over $100")["Price (USD)"].low, 100.0)
+        self.assertEqual(self.filters("Dior perfumes above 200 dollars")["Price (USD)"].low, 200.0)
+        self.assertEqual(self.filters("perfumes priced over 80")["Price (USD)"].low, 80.0)
+        self.assertEqual(self.filters("perfumes under $100")["Price (USD)"].high, 100.0)
+        price = self.filters("perfumes between 50 and 100")["Price (USD)"]
+        self.assertEqual((price.low, price.high), (50.0, 100.0))
+
+    def test_rating_and_price_together(self):
+        filters = self.filters("perfumes with a rating of at least 4 under $150")
+        self.assertEqual(filters["Rating (out of 5)"].low, 4.0)
+        self.assertEqual(filters["Price (USD)"].high, 150.0)
+
+    def test_unknown_words_decline(self):
+        self.assertIsNone(self.fast_path.match("a gift for my dad that smells like the sea"))
+
+
+if __name__ == '__main__':
+    unittest.main()
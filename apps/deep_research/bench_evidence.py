@@ -0,0 +1,75 @@
+# Writer prompt size before and after evidence compression.
+# Offline by default; --live also times the writer agent on both prompts (needs OPENAI_API_KEY).
+#
+#   python bench_evidence.py
+#   python bench_evidence.py --results saved_results.json --live
+
+import argparse
+import asyncio
+import json
+import time
+
+from evidence import EVIDENCE_TOKEN_BUDGET, compress_evidence, count_tokens
+
+QUERY = "How is the market for solid-state EV batteries developing in 2024?"
+
+SAMPLE_RESULTS = [
+    "Solid-state batteries replace the liquid electrolyte with a solid one, promising higher energy density and "
+    "better safety. Toyota plans to launch vehicles with solid-state batteries in 2027-2028. QuantumScape shipped "
+    "B-sample cells to automotive partners in 2024. Analysts expect the solid-state battery market to exceed "
+    "$8 billion by 2030. Manufacturing at scale remains the main hurdle, especially dendrite suppression and "
+    "yield. The company's stock was volatile throughout the year. Several startups raised large funding rounds.",
+    "QuantumScape shipped B-sample cells to automotive partners during 2024. Toyota plans to launch vehicles with "
+    "solid-state batteries around 2027 to 2028. Samsung SDI set up a pilot line and targets mass production in "
+    "2027. The solid-state battery market is expected to exceed $8 billion by 2030 according to analysts. "
+    "Energy density of 400-500 Wh/kg has been demonstrated in the lab. Cost per kWh is still far above "
+    "lithium-ion, which sits near $140/kWh at pack level.",
+    "Chinese manufacturers such as CATL and WeLion are pursuing semi-solid-state designs that are already in "
+    "production vehicles like the NIO ET7. CATL has said full solid-state cells could reach small-scale "
+    "production by 2027. Samsung SDI operates a pilot line targeting mass production in 2027. Government "
+    "programs in Japan, Korea and the EU fund solid-state research. Manufacturing at scale remains the main "
+    "hurdle, especially dendrite suppression and production yield.",
+]
+
+
+async def time_writer(input_text: str) -> float:
+    from agents import Runner
+    from writer_agent import writer_agent
+    start = time.perf_counter()
+    await Runner.run(writer_agent, input_text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", help="JSON file with a list of search summaries to use instead of the sample")
+    parser.add_argument("--query", default=QUERY)
+    parser.add_argument("--budget", type=int, default=EVIDENCE_TOKEN_BUDGET)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    results = SAMPLE_RESULTS
+    if args.results:
+        with open(args.results, "r", encoding="utf-8") as f:
+            results = json.load(f)
+
+    count_tokens("warm up")  # load the tokenizer outside the timed region
+    before = f"Original query: {args.query}\nSummarized search results: {results}"
+    for budget in sorted({args.budget, 1000, 500, 250}, reverse=True):
+        start = time.perf_counter()
+        evidence = compress_evidence(args.query, results, token_budget=budget)
+        elapsed = time.perf_counter() - start
+        after = f"Original query: {args.query}\nSummarized search results:\n{evidence}"
+        print(f"budget {budget:>5}: {count_tokens(before):>5} -> {count_tokens(after):>5} prompt tokens "
+              f"({1 - count_tokens(after) / count_tokens(before):.0%} smaller), compression {elapsed * 1000:.2f} ms")
+
+    after = f"Original query: {args.query}\nSummarized search results:\n{compress_evidence(args.query, results, args.budget)}"
+    if args.live:
+        print(f"writer latency: raw {asyncio.run(time_writer(before)):.1f}s, "
+              f"compressed {asyncio.run(time_writer(after)):.1f}s")
+    else:
+        print(f"\nCompressed evidence at budget {args.budget}:\n{after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Microbenchmark for the rate limiter at 100k distinct users.
+#
+#   python bench_rate_limiter.py --users 100000 --rounds 3
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from rate_limiter import RateLimiter, SQLiteRateLimiter
+
+
+class LegacyRateLimiter:
+    """ The list-rebuilding limiter that used to live in deep_research.py, kept for comparison """
+
+    def __init__(self, max_requests=2, time_window=60, daily_quota=10):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.request_history = defaultdict(list)
+        self.daily_quota = daily_quota
+        self.daily_counts = defaultdict(lambda: {'date': self._today(), 'count': 0})
+
+    def _today(self):
+        return datetime.utcnow().strftime('%Y-%m-%d')
+
+    def is_rate_limited(self, user_id):
+        now = time.time()
+        self.request_history[user_id] = [
+            t for t in self.request_history[user_id] if now - t < self.time_window
+        ]
+        if len(self.request_history[user_id]) >= self.max_requests:
+            return True
+        self.request_history[user_id].append(now)
+        return False
+
+    def is_quota_exceeded(self, user_id):
+        today = self._today()
+        user_quota = self.daily_counts[user_id]
+        if user_quota['date'] != today:
+            user_quota['date'] = today
+            user_quota['count'] = 0
+        if user_quota['count'] >= self.daily_quota:
+            return True
+        user_quota['count'] += 1
+        self.daily_counts[user_id] = user_quota
+        return False
+
+
+def run(limiter, user_ids):
+    start = time.perf_counter()
+    for user_id in user_ids:
+        if not limiter.is_rate_limited(user_id):
+            limiter.is_quota_exceeded(user_id)
+    return time.perf_counter() - start
+
+
+def retained_memory(factory, user_ids):
+    """ Bytes still allocated by the limiter after every user has been seen """
+    tracemalloc.start()
+    limiter = factory()
+    run(limiter, user_ids)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3, help="requests per user")
+    parser.add_argument("--sqlite-users", type=int, default=10_000, help="users for the SQLite run (disk bound)")
+    args = parser.parse_args()
+
+    users = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.users)]
+    user_ids = users * args.rounds
+    random.Random(0).shuffle(user_ids)
+
+    for name, factory in (("legacy", LegacyRateLimiter), ("sharded", RateLimiter)):
+        elapsed = run(factory(), user_ids)
+        memory = retained_memory(factory, users)
+        print(f"{name:>8}: {len(user_ids) / elapsed:>10,.0f} checks/s, "
+              f"{elapsed / len(user_ids) * 1e6:.2f} us/check, {memory / 2**20:.1f} MiB for {args.users:,} users")
+
+    # Eviction: with a short idle TTL, idle users are dropped as new traffic reaches each shard
+    limiter = RateLimiter(time_window=1, idle_ttl=1)
+    for user_id in users:
+        limiter.is_rate_limited(user_id)
+    time.sleep(1.1)
+    for i in range(100):
+        limiter.is_rate_limited(f"late-user-{i}")
+    print(f"After idle TTL: {len(limiter):,} users retained (of {args.users + 100:,})")
+
+    sqlite_ids = user_ids[:args.sqlite_users]
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = SQLiteRateLimiter(os.path.join(tmp, "limits.db"))
+        elapsed = run(limiter, sqlite_ids)
+        print(f"  sqlite: {len(sqlite_ids) / elapsed:>10,.0f} checks/s, {elapsed / len(sqlite_ids) * 1e6:.2f} us/check")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,51 +3,20 @@
 import gradio as gr
 from dotenv import load_dotenv
 from clarifier_agent import clarifier_agent
+from job_queue import JobQueue
 from research_manager import ResearchManagerAgent
+from speculation import speculator
 from agents import Runner
-from collections import defaultdict
-from datetime import datetime
-import time
+from rate_limiter import make_rate_limiter
 import logging
 
 load_dotenv(override=True)
 
 # --- Rate Limiter ---
-class RateLimiter:
-    # Rate limit to 2 requests per minute, 10 requests per day
-    def __init__(self, max_requests=2, time_window=60, daily_quota=10):
-        self.max_requests = max_requests
-        self.time_window = time_window  # seconds
-        self.request_history = defaultdict(list)
-        self.daily_quota = daily_quota
-        self.daily_counts = defaultdict(lambda: {'date': self._today(), 'count': 0})
-
-    def _today(self):
-        return datetime.utcnow().strftime('%Y-%m-%d')
-
-    def is_rate_limited(self, user_id):
-        now = time.time()
-        self.request_history[user_id] = [
-            t for t in self.request_history[user_id] if now - t < self.time_window
-        ]
-        if len(self.request_history[user_id]) >= self.max_requests:
-            return True
-        self.request_history[user_id].append(now)
-        return False
-
-    def is_quota_exceeded(self, user_id):
-        today = self._today()
-        user_quota = self.daily_counts[user_id]
-        if user_quota['date'] != today:
-            user_quota['date'] = today
-            user_quota['count'] = 0
-        if user_quota['count'] >= self.daily_quota:
-            return True
-        user_quota['count'] += 1
-        self.daily_counts[user_id] = user_quota
-        return False
-
-rate_limiter = RateLimiter()
+# Rate limit to 2 requests per minute, 10 requests per day (set RATE_LIMIT_DB to share limits across processes)
+rate_limiter = make_rate_limiter(max_requests=2, time_window=60, daily_quota=10)
+# Research runs execute on background workers so they survive browser disconnects
+jobs = JobQueue()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
@@ -73,28 +42,40 @@ async def get_clarifying_questions(query, request: gr.Request = None):
     if rate_limiter.is_quota_exceeded(user_id):
         return ["Daily quota exceeded. Try again tomorrow."], "", "", ""
 
+    # With SPECULATIVE_PLANNING=1, plan and search the bare query while the user answers
+    speculator.start(query, ResearchManagerAgent().search)
     result = await Runner.run(clarifier_agent, input=query)
     return result.final_output.questions
 
-# Step 2 — Run full research pipeline via coordinator agent (handoff style)
+# Step 2 — Queue the full research pipeline as a background job and follow its progress
 async def run_with_handoff(query, q1, q2, q3, a1, a2, a3, send_email_flag, recipient_email, request: gr.Request = None):
     user_id = await get_user_id(request)
     if rate_limiter.is_rate_limited(user_id):
-        yield "Rate limit exceeded. Please wait a minute."
+        yield "Rate limit exceeded. Please wait a minute.", ""
         return
     if rate_limiter.is_quota_exceeded(user_id):
-        yield "You have reached your daily quota. Try again tomorrow."
+        yield "You have reached your daily quota. Try again tomorrow.", ""
         return
 
     questions = [q1, q2, q3]
     answers = [a1, a2, a3]
-    async for chunk in ResearchManagerAgent().run(
+    job_id = await jobs.submit(
         query,
         questions,
         answers,
         send_email_flag=send_email_flag,
         recipient_email=recipient_email,
-    ):
+    )
+    async for chunk in jobs.follow(job_id):
+        yield chunk, job_id
+
+# Reconnect to a job after a disconnect, or check on it from another tab
+async def resume_job(job_id):
+    job_id = (job_id or "").strip()
+    if not job_id:
+        yield "Enter a job ID to resume."
+        return
+    async for chunk in jobs.follow(job_id):
         yield chunk
 
 with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
@@ -120,6 +101,9 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
     send_email_checkbox.change(fn=lambda checked: gr.update(visible=checked), inputs=send_email_checkbox, outputs=email_box)
 
     submit_answers_btn = gr.Button("✅ Submit & Run Full Research")
+    with gr.Row():
+        job_id_box = gr.Textbox(label="🆔 Job ID (use it to resume if you get disconnected)")
+        resume_btn = gr.Button("🔄 Resume Job")
     report = gr.Markdown(label="📄 Research Report")
 
     # Step 1
@@ -133,7 +117,9 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
     submit_answers_btn.click(
         fn=run_with_handoff,
         inputs=[query, clar_q1, clar_q2, clar_q3, answer_1, answer_2, answer_3, send_email_checkbox, email_box],
-        outputs=report
+        outputs=[report, job_id_box]
     )
 
+    resume_btn.click(fn=resume_job, inputs=job_id_box, outputs=report)
+
 ui.launch(inbrowser=True)
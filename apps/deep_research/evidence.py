@@ -0,0 +1,116 @@
+import math
+import os
+import re
+from collections import Counter
+
+EVIDENCE_TOKEN_BUDGET = int(os.getenv("EVIDENCE_TOKEN_BUDGET", "1500"))
+# Sentences whose token sets overlap at least this much are treated as the same fact
+DUPLICATE_SIMILARITY = 0.7
+
+STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have in into is it its of on or that the their this "
+    "to was were which will with".split()
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # Rough rule of thumb when tiktoken or its encodings are unavailable
+            _encoding = False
+    return len(_encoding.encode(text)) if _encoding else len(text) // 4
+
+
+def _stem(token: str) -> str:
+    """ Crude suffix folding so "targets", "targeting" and "targeted" compare equal """
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 4 and token.endswith("ed"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str) -> list[str]:
+    return [_stem(token) for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    for piece in _SENTENCE_END.split(text):
+        piece = _BULLET.sub("", piece).strip()
+        # Markdown headings and fragments carry no facts on their own
+        if len(piece.split()) >= 4 and not piece.startswith("#"):
+            sentences.append(piece)
+    return sentences
+
+
+def compress_evidence(query: str, search_results: list[str], token_budget: int = EVIDENCE_TOKEN_BUDGET) -> str:
+    """ Deterministically shrink the search summaries into the writer's evidence block.
+
+    Sentences are split out of every summary, near-duplicates across summaries are
+    dropped (token-set Jaccard >= DUPLICATE_SIMILARITY, first occurrence wins), the
+    rest are ranked by BM25 relevance to the query with a small bonus for appearing
+    early in their summary, and the best are kept until the token budget is spent.
+    Kept sentences are emitted in their original order, grouped by source.
+    """
+    candidates = []  # (source index, position, sentence, token list)
+    kept_sets: list[frozenset] = []
+    seen = set()
+    for source, summary in enumerate(search_results):
+        for position, sentence in enumerate(split_sentences(summary)):
+            tokens = _tokens(sentence)
+            token_set = frozenset(tokens)
+            if not token_set or token_set in seen:
+                continue
+            if any(len(token_set & other) / len(token_set | other) >= DUPLICATE_SIMILARITY for other in kept_sets):
+                continue
+            seen.add(token_set)
+            kept_sets.append(token_set)
+            candidates.append((source, position, sentence, tokens))
+    if not candidates:
+        return ""
+
+    # BM25 over the candidate sentences, treating each sentence as a document
+    n = len(candidates)
+    average_length = sum(len(tokens) for *_, tokens in candidates) / n
+    document_frequency = Counter(token for *_, tokens in candidates for token in set(tokens))
+    query_terms = set(_tokens(query))
+    k1, b = 1.2, 0.75
+
+    def score(candidate) -> float:
+        _, position, _, tokens = candidate
+        counts = Counter(tokens)
+        relevance = 0.0
+        for term in query_terms & counts.keys():
+            idf = math.log(1 + (n - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            tf = counts[term]
+            relevance += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / average_length))
+        return relevance + 0.5 / (1 + position)
+
+    selected = []
+    used = 0
+    for candidate in sorted(candidates, key=score, reverse=True):
+        cost = count_tokens(candidate[2]) + 2
+        if used + cost > token_budget:
+            continue
+        selected.append(candidate)
+        used += cost
+
+    selected.sort(key=lambda candidate: (candidate[0], candidate[1]))
+    blocks = []
+    for source in sorted({candidate[0] for candidate in selected}):
+        lines = "\n".join(f"- {sentence}" for s, _, sentence, _ in selected if s == source)
+        blocks.append(f"Source {source + 1}:\n{lines}")
+    return "\n\n".join(blocks)
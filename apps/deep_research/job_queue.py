@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Optional
+
+from report_cache import research_key
+from research_manager import ResearchManagerAgent
+
+JOBS_PATH = os.getenv("RESEARCH_JOBS_DB", ".research_cache/jobs.db")
+JOB_WORKERS = int(os.getenv("RESEARCH_JOB_WORKERS", "2"))
+# Progress snapshots are cumulative markdown, so only the latest is kept, written at most this often
+PROGRESS_INTERVAL = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueue:
+    """ Durable SQLite-backed queue of deep research runs with an asyncio worker pool.
+
+    Jobs outlive the request that submitted them, so a closed browser tab no longer
+    throws the work away: any client can follow a job by ID and pick up its latest
+    progress. Submitting a query that is already queued or running returns the
+    existing job, and each submitter's email recipient is attached to it. Jobs left
+    'running' by a previous process are re-queued on startup; this assumes one
+    process owns the database file.
+    """
+
+    def __init__(self, path: str = JOBS_PATH, workers: int = JOB_WORKERS, poll_interval: float = 0.5):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '',
+                seq INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+            CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+            CREATE TABLE IF NOT EXISTS job_recipients (
+                job_id TEXT NOT NULL,
+                email TEXT NOT NULL,
+                PRIMARY KEY (job_id, email)
+            );
+            """
+        )
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, updated = ? WHERE status = ?", (QUEUED, time.time(), RUNNING))
+
+    async def submit(
+        self,
+        query: str,
+        questions: list[str],
+        answers: list[str],
+        send_email_flag: bool = False,
+        recipient_email: Optional[str] = None,
+    ) -> str:
+        """ Queue a research run, or join the identical one already in flight, and return its job ID.
+
+        Must be called from the event loop the workers should run on.
+        """
+        self._ensure_workers()
+        # SQLite calls block, so every one of them runs on a worker thread rather than the event loop
+        job_id = await asyncio.to_thread(
+            self._enqueue, query, questions, answers, recipient_email if send_email_flag else None
+        )
+        self._wakeup.set()
+        return job_id
+
+    def _enqueue(self, query: str, questions: list[str], answers: list[str], recipient_email: Optional[str]) -> str:
+        key = research_key(query, questions, answers)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE dedup_key = ? AND status IN (?, ?) ORDER BY created LIMIT 1",
+                    (key, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    job_id = row[0]
+                    print(f"Joining in-flight research job {job_id}")
+                else:
+                    job_id = uuid.uuid4().hex[:12]
+                    params = json.dumps({"query": query, "questions": questions, "answers": answers})
+                    self._db.execute(
+                        "INSERT INTO jobs (id, dedup_key, status, params, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                        (job_id, key, QUEUED, params, now, now),
+                    )
+                if recipient_email:
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO job_recipients (job_id, email) VALUES (?, ?)", (job_id, recipient_email)
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                # Leave the connection outside a transaction, or every later BEGIN fails
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """ Current status, latest progress snapshot and its sequence number, or None for an unknown ID """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, progress, seq, error, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("status", "progress", "seq", "error", "created", "updated")
+        return {"id": job_id, **dict(zip(keys, row))}
+
+    async def follow(self, job_id: str) -> AsyncIterator[str]:
+        """ Yield the job's progress whenever it changes, until the job finishes """
+        self._ensure_workers()
+        last_seq = -1
+        announced = False
+        while True:
+            job = await asyncio.to_thread(self.get, job_id)
+            if job is None:
+                yield f"Unknown job ID {job_id}"
+                return
+            if job["seq"] != last_seq and job["progress"]:
+                last_seq = job["seq"]
+                yield job["progress"]
+            elif job["status"] == QUEUED and not announced:
+                yield f"Queued as job {job_id}, waiting for a free worker..."
+            announced = True
+            if job["status"] == FAILED:
+                yield f"Research job failed: {job['error']}"
+                return
+            if job["status"] == DONE:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def _ensure_workers(self):
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    def _claim(self) -> Optional[tuple[str, dict]]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, params FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (RUNNING, time.time(), row[0]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _update(self, job_id: str, progress: Optional[str] = None, status: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            if progress is not None:
+                self._db.execute(
+                    "UPDATE jobs SET progress = ?, seq = seq + 1, updated = ? WHERE id = ?", (progress, time.time(), job_id)
+                )
+            if status is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?", (status, error, time.time(), job_id)
+                )
+
+    def _recipients(self, job_id: str) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT email FROM job_recipients WHERE job_id = ?", (job_id,))]
+
+    async def _worker(self, n: int):
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval * 5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, params = claimed
+            print(f"Worker {n} running research job {job_id}")
+            try:
+                await self._run(job_id, params)
+                await asyncio.to_thread(self._update, job_id, status=DONE)
+            except Exception as e:
+                print(f"Research job {job_id} failed: {e}")
+                await asyncio.to_thread(self._update, job_id, status=FAILED, error=str(e))
+
+    async def _run(self, job_id: str, params: dict):
+        manager = ResearchManagerAgent()
+        latest, written_at = None, 0.0
+        async for chunk in manager.run(params["query"], params["questions"], params["answers"]):
+            latest = chunk
+            if time.monotonic() - written_at >= PROGRESS_INTERVAL:
+                await asyncio.to_thread(self._update, job_id, progress=chunk)
+                written_at = time.monotonic()
+        if latest is not None:
+            await asyncio.to_thread(self._update, job_id, progress=latest)
+        # Recipients may have joined while the job ran, so they are read only once the report exists
+        for email in await asyncio.to_thread(self._recipients, job_id):
+            await asyncio.to_thread(
+                self._update, job_id, progress=f"Sending report to {email}...\n\n{manager.report.markdown_report}"
+            )
+            await manager.send_email(manager.report, email)
+        await asyncio.to_thread(self._update, job_id, progress=manager.report.markdown_report)
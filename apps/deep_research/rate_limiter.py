@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _utc_day(now):
+    # Days since the epoch in UTC; cheaper to compare than a formatted date string
+    return int(now // 86400)
+
+
+class _UserState:
+    __slots__ = ("window", "head", "day", "count", "last_seen")
+
+    def __init__(self, max_requests):
+        # Fixed ring of the last max_requests request times, head pointing at the oldest.
+        # The user is limited exactly when that oldest request is still inside the window.
+        self.window = [float("-inf")] * max_requests
+        self.head = 0
+        self.day = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+
+class _Shard:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+
+
+class RateLimiter:
+    """ Per-user sliding-window rate limit plus daily quota, in process memory.
+
+    Users are spread over shards, each with its own lock and an OrderedDict kept in
+    last-seen order, so checks are O(1) and users idle for longer than idle_ttl are
+    evicted from the front as a side effect of normal traffic. The locks are plain
+    threading locks that are never held across an await, so the limiter is safe to
+    call from both Gradio's event loop and its worker threads.
+    """
+
+    def __init__(self, max_requests=2, time_window=60, daily_quota=10, idle_ttl=86400, shards=16):
+        self.max_requests = max_requests
+        self.time_window = time_window  # seconds
+        self.daily_quota = daily_quota
+        self.idle_ttl = max(idle_ttl, time_window)
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def __len__(self):
+        return sum(len(shard.users) for shard in self._shards)
+
+    def _with_user(self, user_id, fn):
+        now = time.time()
+        shard = self._shards[hash(user_id) % len(self._shards)]
+        with shard.lock:
+            users = shard.users
+            state = users.get(user_id)
+            if state is None:
+                state = users[user_id] = _UserState(self.max_requests)
+            else:
+                users.move_to_end(user_id)
+            state.last_seen = now
+            result = fn(state, now)
+            # Oldest-seen users sit at the front; evict the ones that have gone idle
+            while users:
+                oldest_id, oldest = next(iter(users.items()))
+                if now - oldest.last_seen <= self.idle_ttl:
+                    break
+                del users[oldest_id]
+            return result
+
+    def _check_rate(self, state, now):
+        if now - state.window[state.head] < self.time_window:
+            return True
+        state.window[state.head] = now
+        state.head = (state.head + 1) % self.max_requests
+        return False
+
+    def _check_quota(self, state, now):
+        today = _utc_day(now)
+        if state.day != today:
+            state.day = today
+            state.count = 0
+        if state.count >= self.daily_quota:
+            return True
+        state.count += 1
+        return False
+
+    def is_rate_limited(self, user_id):
+        return self._with_user(user_id, self._check_rate)
+
+    def is_quota_exceeded(self, user_id):
+        return self._with_user(user_id, self._check_quota)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """ Same limits, persisted in SQLite so they hold across processes and restarts.
+
+    Each check is one short BEGIN IMMEDIATE transaction on the user's row, which
+    serializes concurrent writers from any process. Idle users are purged every
+    `purge_every` checks.
+    """
+
+    def __init__(self, path, max_requests=2, time_window=60, daily_quota=10, idle_ttl=86400, purge_every=1000):
+        super().__init__(max_requests, time_window, daily_quota, idle_ttl, shards=1)
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._calls = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "user_id TEXT PRIMARY KEY, window TEXT NOT NULL, head INTEGER NOT NULL, day INTEGER NOT NULL, "
+            "count INTEGER NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS rate_limits_last_seen ON rate_limits (last_seen)")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _with_user(self, user_id, fn):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT window, head, day, count FROM rate_limits WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            state = _UserState(self.max_requests)
+            if row is not None:
+                window = [float(t) for t in row[0].split(",")]
+                if len(window) == self.max_requests:
+                    state.window, state.head = window, row[1]
+                state.day, state.count = row[2], row[3]
+            result = fn(state, now)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limits (user_id, window, head, day, count, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, ",".join(repr(t) for t in state.window), state.head, state.day, state.count, now),
+            )
+            self._calls += 1
+            if self._calls % self.purge_every == 0:
+                connection.execute("DELETE FROM rate_limits WHERE last_seen < ?", (now - self.idle_ttl,))
+            connection.execute("COMMIT")
+            return result
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+
+def make_rate_limiter(max_requests=2, time_window=60, daily_quota=10):
+    """ SQLite-backed when RATE_LIMIT_DB points at a database file, in memory otherwise """
+    path = os.getenv("RATE_LIMIT_DB")
+    if path:
+        return SQLiteRateLimiter(path, max_requests, time_window, daily_quota)
+    return RateLimiter(max_requests, time_window, daily_quota)
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+REPORT_CACHE_PATH = os.getenv("REPORT_CACHE_DB", ".research_cache/reports.db")
+# Freshness windows in seconds, per stage; search results go stale faster than plans
+REPORT_CACHE_TTL = {
+    "plan": float(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600))),
+    "searches": float(os.getenv("SEARCH_RESULTS_CACHE_TTL", str(24 * 3600))),
+    "report": float(os.getenv("REPORT_CACHE_TTL", str(24 * 3600))),
+}
+
+
+def research_key(query: str, questions: list[str], answers: list[str]) -> str:
+    """ Same query and clarifications (ignoring case and spacing) means the same research run """
+    normalize = lambda text: " ".join((text or "").lower().split())
+    payload = json.dumps([normalize(query), [normalize(q) for q in questions], [normalize(a) for a in answers]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportCache:
+    """ Content-addressed store of research stages keyed by research_key().
+
+    The planner output, the search results and the final report (with the progress
+    messages that led to it) are stored as separate stages, each with its own
+    freshness window. A fresh report is replayed outright; otherwise any stage that
+    is still fresh is reused and only the remaining stages are recomputed.
+    """
+
+    def __init__(self, path: str = REPORT_CACHE_PATH, ttl: Optional[dict] = None):
+        self.path = path
+        self.ttl = {**REPORT_CACHE_TTL, **(ttl or {})}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "key TEXT NOT NULL, stage TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (key, stage))"
+        )
+
+    def get(self, key: str, stage: str) -> Optional[Any]:
+        """ The stored payload for a stage if it is within its freshness window, else None """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM stages WHERE key = ? AND stage = ? AND created > ?",
+                (key, stage, time.time() - self.ttl[stage]),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, stage: str, payload: Any) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO stages (key, stage, payload, created) VALUES (?, ?, ?, ?)",
+                (key, stage, json.dumps(payload), time.time()),
+            )
+
+    def purge(self) -> int:
+        """ Delete every stage past its freshness window; returns the number of rows removed """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for stage, ttl in self.ttl.items():
+                removed += self._db.execute(
+                    "DELETE FROM stages WHERE stage = ? AND created <= ?", (stage, now - ttl)
+                ).rowcount
+        return removed
+
+
+report_cache = ReportCache()
@@ -0,0 +1,68 @@
+import re
+from typing import Optional
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JSONFieldStream:
+    """ Incrementally decodes one string field out of a JSON object that is still being streamed.
+
+    The writer agent returns ReportData as JSON, so its token stream looks like
+    `{"short_summary": "...", "markdown_report": "# Title\\n...`. Feed it the raw
+    deltas and it returns the newly decoded characters of `field` as they arrive,
+    touching each input character once.
+    """
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self._done = False
+        self.text = ""
+
+    def feed(self, delta: str) -> str:
+        if self._done:
+            return ""
+        self._buffer += delta
+        if self._pos is None:
+            match = self._key.search(self._buffer)
+            if match is None:
+                return ""
+            self._pos = match.end()
+        decoded = []
+        buffer, i, n = self._buffer, self._pos, len(self._buffer)
+        while i < n:
+            char = buffer[i]
+            if char == '"':
+                self._done = True
+                break
+            if char != '\\':
+                decoded.append(char)
+                i += 1
+                continue
+            # Escape sequence; stop and wait for more input if it is cut off
+            if i + 1 >= n:
+                break
+            escape = buffer[i + 1]
+            if escape != 'u':
+                decoded.append(_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > n:
+                break
+            code = int(buffer[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate: needs the following \uXXXX low surrogate to form one character
+                if i + 12 > n:
+                    break
+                low = int(buffer[i + 8:i + 12], 16)
+                decoded.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                i += 12
+                continue
+            decoded.append(chr(code))
+            i += 6
+        # Drop what has been consumed so the buffer only ever holds an unfinished escape
+        self._buffer, self._pos = buffer[i:], 0
+        new_text = "".join(decoded)
+        self.text += new_text
+        return new_text
@@ -3,11 +3,34 @@ from search_agent import search_agent
 from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
 from writer_agent import writer_agent, ReportData
 from email_agent import email_agent
+from search_cache import search_cache
+from search_scheduler import SearchScheduler
+from report_stream import JSONFieldStream
+from evidence import compress_evidence
+from report_cache import report_cache, research_key
+from speculation import speculator
+from openai.types.responses import ResponseTextDeltaEvent
 import asyncio
-from typing import Optional
+import sqlite3
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+
+
+class SearchResult(NamedTuple):
+    summary: str
+    fetched: float
+    """ Unix time the search actually ran, which is earlier than now for a search cache hit """
+
 
 class ResearchManagerAgent:
 
+    def __init__(self):
+        self.report: Optional[ReportData] = None
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.saved_seconds = 0.0
+        self.speculative_hits = 0
+
     async def run(
         self,
         query: str,
@@ -16,7 +39,36 @@ class ResearchManagerAgent:
         send_email_flag: bool = False,
         recipient_email: Optional[str] = None,
     ):
-        """ Run the deep research process using user-provided clarification answers. """
+        """ Run the deep research process using user-provided clarification answers.
+
+        Identical requests are answered from the report cache: a fresh report is replayed
+        straight away, otherwise any fresh plan or search results are reused.
+        """
+        key = research_key(query, clarifying_questions, clarifying_answers)
+        cached = await asyncio.to_thread(report_cache.get, key, "report")
+        if cached is not None:
+            print("Report cache hit, replaying stored report")
+            for chunk in cached["progress"]:
+                yield chunk
+            report = ReportData.model_validate(cached["report"])
+            self.report = report
+        else:
+            async for chunk in self.research(key, query, clarifying_questions, clarifying_answers):
+                yield chunk
+            report = self.report
+
+        if send_email_flag and recipient_email:
+            yield f"Sending report to {recipient_email}...\n\n{report.markdown_report}"
+            await self.send_email(report, recipient_email)
+            yield "Email sent"
+        else:
+            yield "Skipping email step"
+           
+        yield "Email sent"
+        yield report.markdown_report
+
+    async def research(self, key: str, query: str, clarifying_questions: list[str], clarifying_answers: list[str]):
+        """ Plan, search and write, reusing whichever stages are still fresh in the report cache """
         trace_id = gen_trace_id()
         with trace("Research trace", trace_id=trace_id):
             print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}")
@@ -27,26 +79,89 @@ class ResearchManagerAgent:
             print(f"Clarifying answers: {clarifying_answers}")
 
             # Plan searches using clarifications and user answers
-            search_plan = await self.plan_searches(query, clarifying_questions, clarifying_answers)
+            speculation = speculator.take(query)
+            # SQLite calls block, so they run on a worker thread rather than the event loop
+            cached_plan = await asyncio.to_thread(report_cache.get, key, "plan")
+            if cached_plan is not None:
+                print("Reusing cached search plan")
+                search_plan = WebSearchPlan.model_validate(cached_plan)
+            else:
+                # Searches prefetched for the bare query while the user was answering
+                prefetched = await speculation.plan() if speculation else None
+                search_plan = await self.plan_searches(
+                    query, clarifying_questions, clarifying_answers, prefetched.searches if prefetched else None
+                )
+                await asyncio.to_thread(report_cache.put, key, "plan", search_plan.model_dump())
 
             yield "Searches planned, starting to search..."
-            search_results = await self.perform_searches(search_plan)
+            # Results stored by an earlier run are reused; only searches that failed, expired or are missing
+            # run again. Each result keeps the time it was fetched, so writing it back never makes it look fresher
+            oldest = time.time() - report_cache.ttl["searches"]
+            entries = await asyncio.to_thread(report_cache.get, key, "searches")
+            entries = [entry for entry in entries or [] if entry.get("fetched", 0) > oldest]
+            stored = {entry["query"]: entry["result"] for entry in entries}
+            fetched = {entry["query"]: entry["fetched"] for entry in entries}
+            if speculation:
+                speculative = await speculation.results([item.query for item in search_plan.searches if not stored.get(item.query)])
+                self.speculative_hits += len(speculative)
+                stored.update({query: result.summary for query, result in speculative.items()})
+                fetched.update({query: result.fetched for query, result in speculative.items()})
+            reused = [item for item in search_plan.searches if stored.get(item.query) is not None]
+            pending = WebSearchPlan(searches=[item for item in search_plan.searches if stored.get(item.query) is None])
+            if reused:
+                print(f"Reusing {len(reused)} cached search results")
 
-            yield "Searches complete, writing report..."
-            report = await self.write_report(query, search_results)
+            # Show each search summary as soon as it lands instead of waiting for all of them
+            search_results = []
+            summaries = []
+            searched = []
+            num_completed = 0
+            progress = ""
+            for item in reused:
+                num_completed += 1
+                search_results.append(stored[item.query])
+                summaries.append(f"### 🔎 {item.query}\n{stored[item.query]}")
+                searched.append({"query": item.query, "result": stored[item.query], "fetched": fetched[item.query]})
+            if reused:
+                progress = f"Searching... {num_completed}/{len(search_plan.searches)} completed\n\n" + "\n\n".join(summaries)
+                yield progress
+            if pending.searches:
+                async for item, result in self.stream_searches(pending):
+                    num_completed += 1
+                    if result is None:
+                        searched.append({"query": item.query, "result": None, "fetched": time.time()})
+                    else:
+                        searched.append({"query": item.query, "result": result.summary, "fetched": result.fetched})
+                        search_results.append(result.summary)
+                        summaries.append(f"### 🔎 {item.query}\n{result.summary}")
+                    progress = f"Searching... {num_completed}/{len(search_plan.searches)} completed\n\n" + "\n\n".join(summaries)
+                    yield progress
+                await asyncio.to_thread(report_cache.put, key, "searches", searched)
 
-            if send_email_flag and recipient_email:
-                yield f"Sending report to {recipient_email}..."
-                await self.send_email(report, recipient_email)
-                yield "Email sent"
-            else:
-                yield "Skipping email step"
-               
-            yield "Email sent"
-            yield report.markdown_report
+            status = (
+                f"Searches complete ({len(search_results)}/{len(search_plan.searches)} succeeded, "
+                f"{self.cache_summary()}), writing report..."
+            )
+            yield status
+            # Stream the report markdown into the page while the writer is still generating it
+            report = None
+            async for markdown, report in self.stream_report(query, search_results):
+                if report is None:
+                    yield f"{status}\n\n{markdown}"
+            self.report = report
+            # Replaying a hit shows the search summaries, then the finished report
+            await asyncio.to_thread(
+                report_cache.put, key, "report", {"progress": [progress, status], "report": report.model_dump()}
+            )
 
-    async def plan_searches(self, query: str, questions: list[str], answers: list[str]) -> WebSearchPlan:
-        """ Plan the searches to perform based on clarifications """
+    async def plan_searches(
+        self,
+        query: str,
+        questions: list[str],
+        answers: list[str],
+        prefetched: Optional[list[WebSearchItem]] = None,
+    ) -> WebSearchPlan:
+        """ Plan the searches to perform based on clarifications, keeping already prefetched searches that still fit """
         print("Planning searches...")
 
         # Combine clarifying Q&A into structured prompt
@@ -54,6 +169,13 @@ class ResearchManagerAgent:
             f"Q: {q}\nA: {a}" for q, a in zip(questions, answers)
         )
         final_prompt = f"Query: {query}\nClarifications:\n{clarifying_context}"
+        if prefetched:
+            already_run = "\n".join(f"- {item.query}" for item in prefetched)
+            final_prompt += (
+                f"\nThese searches were already run for the query before the clarifications:\n{already_run}\n"
+                "Keep any that still fit the clarified query by repeating its search term exactly, "
+                "and only add new searches for what they miss."
+            )
 
         result = await Runner.run(
             planner_agent,
@@ -64,36 +186,69 @@ class ResearchManagerAgent:
 
     async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
         """ Perform the searches for the planned queries """
-        print("Searching...")
-        num_completed = 0
-        tasks = [asyncio.create_task(self.search(item)) for item in search_plan.searches]
         results = []
-        for task in asyncio.as_completed(tasks):
-            result = await task
+        async for _, result in self.stream_searches(search_plan):
             if result is not None:
-                results.append(result)
-            num_completed += 1
-            print(f"Searching... {num_completed}/{len(tasks)} completed")
-        print("Finished searching")
+                results.append(result.summary)
         return results
 
-    async def search(self, item: WebSearchItem) -> Optional[str]:
-        """ Perform a single web search """
+    async def stream_searches(self, search_plan: WebSearchPlan) -> AsyncIterator[tuple[WebSearchItem, Optional[SearchResult]]]:
+        """ Perform the searches for the planned queries, yielding each (item, result) as it completes """
+        print("Searching...")
+        num_completed = 0
+        num_succeeded = 0
+        async for item, result in SearchScheduler().run(search_plan.searches, self.search):
+            num_completed += 1
+            num_succeeded += result is not None
+            print(f"Searching... {num_completed}/{len(search_plan.searches)} completed")
+            yield item, result
+        print(f"Finished searching with {num_succeeded}/{len(search_plan.searches)} results")
+
+    async def search(self, item: WebSearchItem) -> Optional[SearchResult]:
+        """ Perform a single web search, answering from the search cache when possible """
+        self.cache_lookups += 1
+        # SQLite calls block, so they run on a worker thread rather than the event loop
+        cached = await asyncio.to_thread(search_cache.get, item.query)
+        if cached is not None:
+            self.cache_hits += 1
+            self.saved_seconds += cached.latency
+            print(f"Search cache hit: {item.query}")
+            return SearchResult(cached.result, cached.created)
         input_text = f"Search term: {item.query}\nReason for searching: {item.reason}"
+        start = time.perf_counter()
         try:
             result = await Runner.run(
                 search_agent,
                 input_text,
             )
-            return str(result.final_output)
         except Exception as e:
             print(f"Search failed: {e}")
             return None
+        summary = str(result.final_output)
+        fetched = time.time()
+        try:
+            await asyncio.to_thread(search_cache.put, item.query, summary, time.perf_counter() - start)
+        except sqlite3.Error as e:
+            print(f"Search cache write failed: {e}")
+        return SearchResult(summary, fetched)
+
+    def cache_summary(self) -> str:
+        """ Human readable cache hit rate and time saved for this run """
+        hit_rate = self.cache_hits / self.cache_lookups if self.cache_lookups else 0.0
+        summary = f"cache hits {self.cache_hits}/{self.cache_lookups} ({hit_rate:.0%}), ~{self.saved_seconds:.1f}s saved"
+        if self.speculative_hits:
+            summary += f", {self.speculative_hits} prefetched"
+        return summary
+
+    def writer_input(self, query: str, search_results: list[str]) -> str:
+        """ Writer prompt with the search summaries deduplicated, ranked and trimmed to the evidence budget """
+        evidence = compress_evidence(query, search_results)
+        return f"Original query: {query}\nSummarized search results:\n{evidence}"
 
     async def write_report(self, query: str, search_results: list[str]) -> ReportData:
         """ Write a markdown report from search results """
         print("Thinking about report...")
-        input_text = f"Original query: {query}\nSummarized search results: {search_results}"
+        input_text = self.writer_input(query, search_results)
         result = await Runner.run(
             writer_agent,
             input_text,
@@ -101,6 +256,23 @@ class ResearchManagerAgent:
         print("Finished writing report")
         return result.final_output_as(ReportData)
 
+    async def stream_report(self, query: str, search_results: list[str]) -> AsyncIterator[tuple[str, Optional[ReportData]]]:
+        """ Write the report, yielding (markdown so far, None) while it streams and (markdown, report) at the end """
+        print("Thinking about report...")
+        input_text = self.writer_input(query, search_results)
+        result = Runner.run_streamed(
+            writer_agent,
+            input_text,
+        )
+        markdown = JSONFieldStream("markdown_report")
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                if markdown.feed(event.data.delta):
+                    yield markdown.text, None
+        print("Finished writing report")
+        report = result.final_output_as(ReportData)
+        yield report.markdown_report, report
+
     async def send_email(self, report: ReportData, recipient_email: str):
         """ Use the email agent to email the report to the user """
         print("Emailing report...")
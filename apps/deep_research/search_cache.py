@@ -0,0 +1,165 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+CACHE_PATH = os.getenv("SEARCH_CACHE_DB", ".research_cache/search.db")
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+# Token-set Jaccard similarity at which two queries count as the same search
+CACHE_SIMILARITY = float(os.getenv("SEARCH_CACHE_SIMILARITY", "0.8"))
+
+STOPWORDS = frozenset("a an and are for from how in is of on or the to what with".split())
+
+
+def normalize_query(query: str) -> str:
+    """ Lowercase, strip punctuation and collapse whitespace """
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+def _stem(token: str) -> str:
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+def query_tokens(normalized: str) -> frozenset:
+    tokens = [token for token in normalized.split() if token not in STOPWORDS] or normalized.split()
+    return frozenset(_stem(token) for token in tokens)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class CachedSearch(NamedTuple):
+    result: str
+    latency: float
+    """ Seconds the original search took, i.e. the time a hit saves """
+    created: float
+    """ Unix time the original search was stored """
+
+
+class SearchCache:
+    """ Persistent cache of search summaries keyed by normalized query.
+
+    Exact normalized matches are a primary-key lookup. Near duplicates ("AI chip
+    market 2024" vs "2024 AI chips market") are found through an inverted token
+    table: the entries sharing the most tokens with the query are scored by token
+    Jaccard and the best one above `similarity` wins. Entries expire after `ttl`
+    seconds and the least recently used are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, similarity=CACHE_SIMILARITY):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                latency REAL NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS searches_last_access ON searches (last_access);
+            CREATE TABLE IF NOT EXISTS search_tokens (
+                token TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (token, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS search_tokens_key ON search_tokens (key);
+            """
+        )
+
+    def get(self, query: str) -> Optional[CachedSearch]:
+        """ Return a fresh cached summary for the query or a near duplicate of it, else None """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, result, latency, created FROM searches WHERE key = ? AND created > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                row = self._nearest(key, now)
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE searches SET last_access = ? WHERE key = ?", (now, row[0]))
+            self.hits += 1
+            self.saved_seconds += row[2]
+            return CachedSearch(*row[1:])
+
+    def put(self, query: str, result: str, latency: float) -> None:
+        """ Store a search summary along with how long the search took """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO searches (key, result, latency, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, result, latency, now, now),
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO search_tokens (token, key) VALUES (?, ?)",
+                    [(token, key) for token in query_tokens(key)],
+                )
+                self._evict(now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                # Leave the connection outside a transaction, or every later BEGIN fails
+                self._db.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def _nearest(self, key: str, now: float):
+        tokens = query_tokens(key)
+        if not tokens:
+            return None
+        placeholders = ",".join("?" * len(tokens))
+        candidates = self._db.execute(
+            f"""
+            SELECT s.key, s.result, s.latency, s.created FROM search_tokens t JOIN searches s ON s.key = t.key
+            WHERE t.token IN ({placeholders}) AND s.created > ?
+            GROUP BY s.key ORDER BY COUNT(*) DESC LIMIT 20
+            """,
+            (*tokens, now - self.ttl),
+        ).fetchall()
+        best, best_score = None, self.similarity
+        for candidate in candidates:
+            score = jaccard(tokens, query_tokens(candidate[0]))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _evict(self, now: float) -> None:
+        stale = [row[0] for row in self._db.execute(
+            "SELECT key FROM searches WHERE created <= ? "
+            "UNION SELECT key FROM (SELECT key FROM searches ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (now - self.ttl, self.max_entries),
+        )]
+        if stale:
+            self._db.executemany("DELETE FROM searches WHERE key = ?", [(key,) for key in stale])
+            self._db.executemany("DELETE FROM search_tokens WHERE key = ?", [(key,) for key in stale])
+
+
+search_cache = SearchCache()
@@ -0,0 +1,113 @@
+import asyncio
+import math
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MAX_CONCURRENT_SEARCHES = int(os.getenv("MAX_CONCURRENT_SEARCHES", "4"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "90"))
+SEARCHES_DEADLINE = float(os.getenv("SEARCHES_DEADLINE", "180"))
+# Start a second attempt of a search that has not finished after this many seconds
+HEDGE_AFTER = float(os.getenv("SEARCH_HEDGE_AFTER", "30"))
+# Fraction of searches that must succeed before the report can be written from partial results,
+# and how long stragglers still get once that quorum is reached
+SEARCH_QUORUM = float(os.getenv("SEARCH_QUORUM", "1.0"))
+QUORUM_GRACE = float(os.getenv("SEARCH_QUORUM_GRACE", "15"))
+
+
+class SearchScheduler:
+    """ Runs searches with bounded concurrency, deadlines and hedged retries.
+
+    At most `max_concurrency` attempts run at once. Each attempt is cut off after
+    `timeout` seconds. A search that fails, or is still running `hedge_after`
+    seconds after it got a slot, gets one more attempt and whichever attempt succeeds first wins.
+    Results are yielded as they complete. Once `quorum` of the searches have
+    succeeded the rest get `quorum_grace` more seconds, and at `deadline` anything
+    still running is cancelled.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENT_SEARCHES,
+        timeout: float = SEARCH_TIMEOUT,
+        deadline: float = SEARCHES_DEADLINE,
+        hedge_after: float = HEDGE_AFTER,
+        quorum: float = SEARCH_QUORUM,
+        quorum_grace: float = QUORUM_GRACE,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.quorum = quorum
+        self.quorum_grace = quorum_grace
+
+    async def run(
+        self, items: list[T], search: Callable[[T], Awaitable[Optional[R]]]
+    ) -> AsyncIterator[tuple[T, Optional[R]]]:
+        """ Yield (item, result) as each search finishes; result is None if every attempt failed """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def attempt(item: T, started: Optional[asyncio.Event] = None) -> Optional[R]:
+            async with semaphore:
+                if started is not None:
+                    started.set()
+                try:
+                    return await asyncio.wait_for(search(item), self.timeout)
+                except asyncio.TimeoutError:
+                    print(f"Search timed out after {self.timeout:.0f}s")
+                    return None
+
+        async def hedged(item: T) -> tuple[T, Optional[R]]:
+            started = asyncio.Event()
+            attempts = {asyncio.create_task(attempt(item, started))}
+            hedged_yet = False
+            try:
+                # The hedge clock starts once the first attempt holds a slot; waiting for one is not slowness,
+                # and hedging then would only add load when the scheduler is already saturated
+                waiting = asyncio.create_task(started.wait())
+                try:
+                    await asyncio.wait(attempts | {waiting}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiting.cancel()
+                while attempts:
+                    done, attempts = await asyncio.wait(
+                        attempts,
+                        timeout=None if hedged_yet else self.hedge_after,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for task in done:
+                        if not task.cancelled() and task.exception() is None and task.result() is not None:
+                            return item, task.result()
+                    if not hedged_yet:
+                        hedged_yet = True
+                        attempts.add(asyncio.create_task(attempt(item)))
+                return item, None
+            finally:
+                for task in attempts:
+                    task.cancel()
+
+        tasks = {asyncio.create_task(hedged(item)) for item in items}
+        needed = math.ceil(self.quorum * len(items))
+        succeeded = 0
+        stop_at = time.monotonic() + self.deadline
+        try:
+            while tasks:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    print(f"Cancelling {len(tasks)} unfinished searches")
+                    break
+                done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item, result = task.result()
+                    succeeded += result is not None
+                    yield item, result
+                if tasks and succeeded >= needed:
+                    # Quorum reached: tighten the deadline so stragglers cannot hold up the report
+                    stop_at = min(stop_at, time.monotonic() + self.quorum_grace)
+        finally:
+            for task in tasks:
+                task.cancel()
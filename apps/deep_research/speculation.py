@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from agents import Runner
+from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
+from search_scheduler import SearchScheduler
+
+# Prefetches the user never follows up on are dropped after this many seconds
+SPECULATION_TTL = float(os.getenv("SPECULATION_TTL", "900"))
+MAX_SPECULATIONS = 32
+
+
+def _normalize(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+class Speculation:
+    """ A plan for the bare query and its searches, running in the background.
+
+    The searches go through a SearchScheduler like any other, so they share its
+    concurrency cap, hedging and deadline; each query's outcome lands in a future.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        search: Callable[[WebSearchItem], Awaitable[Any]],
+        scheduler: Optional[SearchScheduler] = None,
+    ):
+        self.query = query
+        self.created = time.monotonic()
+        self._search = search
+        self.scheduler = scheduler or SearchScheduler()
+        self.searches: dict[str, asyncio.Future] = {}
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self.plan_task = asyncio.create_task(self._plan())
+
+    async def _plan(self) -> WebSearchPlan:
+        result = await Runner.run(planner_agent, input=f"Query: {self.query}")
+        plan = result.final_output_as(WebSearchPlan)
+        loop = asyncio.get_running_loop()
+        self.searches = {item.query: loop.create_future() for item in plan.searches}
+        self._prefetch_task = asyncio.create_task(self._prefetch(plan.searches))
+        print(f"Speculatively prefetching {len(plan.searches)} searches")
+        return plan
+
+    async def _prefetch(self, items: list[WebSearchItem]):
+        try:
+            async for item, result in self.scheduler.run(items, self._search_wanted):
+                future = self.searches[item.query]
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Searches the scheduler gave up on at its deadline
+            for future in self.searches.values():
+                if not future.done():
+                    future.cancel()
+
+    async def _search_wanted(self, item: WebSearchItem) -> Any:
+        # Searches results() no longer wants give their scheduler slot straight back
+        if self.searches[item.query].done():
+            return None
+        return await self._search(item)
+
+    async def plan(self) -> Optional[WebSearchPlan]:
+        try:
+            return await self.plan_task
+        except Exception as e:
+            print(f"Speculative planning failed: {e}")
+            return None
+
+    async def results(self, queries: list[str]) -> dict[str, Any]:
+        """ Await the prefetched searches for `queries`, at most until the scheduler's deadline.
+
+        Searches that are no longer wanted are cancelled, and so is anything still
+        running when the wait ends; the caller runs those searches itself. Returns
+        what `search` returned for each query that succeeded in time.
+        """
+        for query, future in self.searches.items():
+            if query not in queries:
+                future.cancel()
+        wanted = {query: self.searches[query] for query in queries if query in self.searches}
+        try:
+            if wanted:
+                _, unfinished = await asyncio.wait(wanted.values(), timeout=self.scheduler.deadline)
+                if unfinished:
+                    print(f"{len(unfinished)} prefetched searches missed the deadline, searching again")
+        finally:
+            self.cancel()
+        return {
+            query: future.result() for query, future in wanted.items()
+            if future.done() and not future.cancelled() and future.result() is not None
+        }
+
+    def cancel(self):
+        self.plan_task.cancel()
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+        for future in self.searches.values():
+            future.cancel()
+
+
+class Speculator:
+    """ Starts planning and searching on the bare query while the user answers the clarifying questions.
+
+    When the answers arrive, the research run takes the speculation for its query,
+    shows the planner what was already searched so it only adds what is missing,
+    and reuses the prefetched results for the searches it keeps. Prefetched
+    summaries also land in the search cache, so rephrased searches still hit.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, ttl: float = SPECULATION_TTL, max_entries: int = MAX_SPECULATIONS):
+        self._enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._speculations: OrderedDict[str, Speculation] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        # Read lazily so a .env loaded after import still applies
+        if self._enabled is None:
+            return os.getenv("SPECULATIVE_PLANNING", "0") == "1"
+        return self._enabled
+
+    def start(self, query: str, search: Callable[[WebSearchItem], Awaitable[Any]]) -> Optional[Speculation]:
+        """ Begin prefetching for `query` on the running event loop; a no-op when disabled """
+        if not self.enabled or not query.strip():
+            return None
+        self._evict()
+        key = _normalize(query)
+        if key in self._speculations:
+            return self._speculations[key]
+        speculation = Speculation(query, search)
+        self._speculations[key] = speculation
+        while len(self._speculations) > self.max_entries:
+            self._speculations.popitem(last=False)[1].cancel()
+        return speculation
+
+    def take(self, query: str) -> Optional[Speculation]:
+        """ Hand over the speculation for `query`, if there is a live one """
+        self._evict()
+        return self._speculations.pop(_normalize(query), None)
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, s in self._speculations.items() if now - s.created > self.ttl]:
+            self._speculations.pop(key).cancel()
+
+
+speculator = Speculator()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import job_queue
+from job_queue import DONE, JobQueue
+
+
+class FakeManager:
+    """ ResearchManagerAgent stand-in that streams two progress chunks """
+
+    def __init__(self):
+        self.report = SimpleNamespace(markdown_report="final report")
+
+    async def run(self, query, questions, answers):
+        yield f"researching {query}"
+        await asyncio.sleep(0.01)
+        yield "done"
+
+    async def send_email(self, report, email):
+        pass
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(path=os.path.join(self.tmp.name, "jobs.db"), workers=1, poll_interval=0.01)
+        patcher = mock.patch.object(job_queue, "ResearchManagerAgent", FakeManager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        # asyncio.wait_for() can swallow a cancellation that lands as its timeout fires, so cancel until done
+        pending = self.queue._tasks
+        while pending:
+            for task in pending:
+                task.cancel()
+            _, pending = await asyncio.wait(pending, timeout=0.1)
+        self.queue._db.close()
+        self.tmp.cleanup()
+
+    async def test_identical_submissions_share_a_job(self):
+        first = await self.queue.submit("query", [], [], send_email_flag=True, recipient_email="a@example.com")
+        second = await self.queue.submit("query", [], [], send_email_flag=True, recipient_email="b@example.com")
+        self.assertEqual(first, second)
+        chunks = [chunk async for chunk in self.queue.follow(first)]
+        self.assertEqual(chunks[-1], "final report")
+        self.assertEqual(self.queue.get(first)["status"], DONE)
+        self.assertEqual(sorted(self.queue._recipients(first)), ["a@example.com", "b@example.com"])
+
+    async def test_failed_submit_rolls_back(self):
+        real_db = self.queue._db
+        failing = mock.MagicMock(wraps=real_db)
+
+        def execute(sql, *args):
+            if "INTO job_recipients" in sql:
+                raise sqlite3.OperationalError("disk I/O error")
+            return real_db.execute(sql, *args)
+
+        failing.execute.side_effect = execute
+        self.queue._db = failing
+        with self.assertRaises(sqlite3.OperationalError):
+            await self.queue.submit("query", [], [], send_email_flag=True, recipient_email="a@example.com")
+        self.queue._db = real_db
+        self.assertFalse(real_db.in_transaction)
+        self.assertEqual(real_db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+        # The connection is usable again
+        job_id = await self.queue.submit("query", [], [])
+        self.assertIsNotNone(self.queue.get(job_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import contextlib
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import research_manager
+from planner_agent import WebSearchItem, WebSearchPlan
+from report_cache import ReportCache
+from search_cache import SearchCache
+from writer_agent import ReportData
+
+
+class TestCachedSearchStage(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ReportCache(os.path.join(self.tmp.name, "reports.db"), ttl={"searches": 100})
+        self.addCleanup(self.tmp.cleanup)
+
+    async def run_research(self, key, queries, fetched=None):
+        searched = []
+
+        async def stream_searches(plan):
+            for item in plan.searches:
+                searched.append(item.query)
+                yield item, research_manager.SearchResult(f"new {item.query}", (fetched or time.time)())
+
+        async def stream_report(query, results):
+            yield "report", ReportData(short_summary="", markdown_report="report", follow_up_questions=[])
+
+        manager = research_manager.ResearchManagerAgent()
+        plan = WebSearchPlan(searches=[WebSearchItem(reason="test", query=query) for query in queries])
+        self.cache.put(key, "plan", plan.model_dump())
+        with mock.patch.object(research_manager, "report_cache", self.cache), \
+                mock.patch.object(research_manager, "trace", lambda *args, **kwargs: contextlib.nullcontext()), \
+                mock.patch.object(manager, "stream_searches", stream_searches), \
+                mock.patch.object(manager, "stream_report", stream_report):
+            async for _ in manager.research(key, "query", [], []):
+                pass
+        return searched
+
+    async def test_reused_results_keep_their_fetch_time(self):
+        now = time.time()
+        self.cache.put("key", "searches", [
+            {"query": "fresh", "result": "old fresh", "fetched": now - 50},
+            {"query": "expired", "result": "old expired", "fetched": now - 200},
+            {"query": "untimed", "result": "old untimed"},
+            {"query": "failed", "result": None, "fetched": now - 10},
+        ])
+        searched = await self.run_research("key", ["fresh", "expired", "untimed", "failed"])
+        self.assertEqual(searched, ["expired", "untimed", "failed"])
+
+        entries = {entry["query"]: entry for entry in self.cache.get("key", "searches")}
+        self.assertEqual(entries["fresh"]["result"], "old fresh")
+        self.assertEqual(entries["fresh"]["fetched"], now - 50)
+        for query in ("expired", "untimed", "failed"):
+            self.assertEqual(entries[query]["result"], f"new {query}")
+            self.assertGreaterEqual(entries[query]["fetched"], now)
+
+    async def test_search_cache_hits_keep_their_fetch_time(self):
+        # A summary served from the search cache was fetched when the cache stored it, not now
+        now = time.time()
+        await self.run_research("key", ["cached"], fetched=lambda: now - 90)
+        entries = self.cache.get("key", "searches")
+        self.assertEqual(entries, [{"query": "cached", "result": "new cached", "fetched": now - 90}])
+        with mock.patch.object(time, "time", return_value=now + 20):
+            self.assertEqual(await self.run_research("key", ["cached"]), ["cached"])
+
+    async def test_search_returns_the_cached_fetch_time(self):
+        search_cache = SearchCache(path=os.path.join(self.tmp.name, "search.db"))
+        self.addCleanup(search_cache._db.close)
+        with mock.patch.object(time, "time", return_value=time.time() - 600):
+            search_cache.put("cached query", "old summary", 3.0)
+        with mock.patch.object(research_manager, "search_cache", search_cache):
+            result = await research_manager.ResearchManagerAgent().search(WebSearchItem(reason="test", query="cached query"))
+        self.assertEqual(result, research_manager.SearchResult("old summary", search_cache.get("cached query").created))
+        self.assertLess(result.fetched, time.time() - 500)
+
+    async def test_rewritten_results_still_expire(self):
+        self.cache.put("key", "searches", [
+            {"query": "a", "result": "first a", "fetched": time.time() - 90},
+            {"query": "b", "result": None, "fetched": time.time()},
+        ])
+        self.assertEqual(await self.run_research("key", ["a", "b"]), ["b"])
+        # Rewriting the stage for "b" must not have refreshed "a": 20 seconds on, it has expired
+        with mock.patch.object(time, "time", return_value=time.time() + 20):
+            self.assertEqual(await self.run_research("key", ["a", "b"]), ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from search_cache import SearchCache
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SearchCache(path=os.path.join(self.tmp.name, "search.db"))
+
+    def tearDown(self):
+        self.cache._db.close()
+        self.tmp.cleanup()
+
+    def test_exact_and_near_duplicate_hits(self):
+        before = time.time()
+        self.cache.put("AI chip market 2024", "summary", 12.5)
+        hit = self.cache.get("ai chip market, 2024?")
+        self.assertEqual(hit[:2], ("summary", 12.5))
+        self.assertGreaterEqual(hit.created, before)
+        near = self.cache.get("2024 AI chips market")
+        self.assertEqual(near.result, "summary")
+        self.assertEqual(near.created, hit.created)
+        self.assertIsNone(self.cache.get("EV battery prices"))
+
+    def test_failed_put_rolls_back(self):
+        with mock.patch.object(self.cache, "_evict", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.cache.put("first query", "lost", 1.0)
+        self.assertFalse(self.cache._db.in_transaction)
+        self.assertIsNone(self.cache.get("first query"))
+        # The connection is usable again
+        self.cache.put("second query", "kept", 1.0)
+        self.assertEqual(self.cache.get("second query").result, "kept")
+
+    def test_expired_entries_miss(self):
+        cache = SearchCache(path=os.path.join(self.tmp.name, "expired.db"), ttl=-1)
+        cache.put("old query", "stale", 1.0)
+        self.assertIsNone(cache.get("old query"))
+        cache._db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
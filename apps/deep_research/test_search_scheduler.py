@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from collections import Counter
+
+from search_scheduler import SearchScheduler
+
+
+async def collect(scheduler, items, search):
+    return {item: result async for item, result in scheduler.run(items, search)}
+
+
+class TestSearchScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_queued_searches_are_not_hedged(self):
+        calls = Counter()
+
+        async def search(item):
+            calls[item] += 1
+            await asyncio.sleep(0.1)
+            return f"result {item}"
+
+        # Six 0.1s searches through one slot: the last waits 0.5s, far past hedge_after, before it starts
+        scheduler = SearchScheduler(max_concurrency=1, timeout=5, deadline=10, hedge_after=0.15)
+        results = await collect(scheduler, list(range(6)), search)
+        self.assertEqual(results, {i: f"result {i}" for i in range(6)})
+        self.assertEqual(calls, Counter({i: 1 for i in range(6)}))
+
+    async def test_slow_search_is_hedged_after_it_starts(self):
+        calls = Counter()
+
+        async def search(item):
+            calls[item] += 1
+            await asyncio.sleep(5 if calls[item] == 1 else 0.01)
+            return f"attempt {calls[item]}"
+
+        scheduler = SearchScheduler(max_concurrency=2, timeout=10, deadline=10, hedge_after=0.1)
+        results = await collect(scheduler, ["slow"], search)
+        self.assertEqual(results, {"slow": "attempt 2"})
+
+    async def test_failed_search_is_retried_once(self):
+        calls = Counter()
+
+        async def search(item):
+            calls[item] += 1
+            return None
+
+        scheduler = SearchScheduler(max_concurrency=2, timeout=1, deadline=5, hedge_after=1)
+        results = await collect(scheduler, ["broken"], search)
+        self.assertEqual(results, {"broken": None})
+        self.assertEqual(calls["broken"], 2)
+
+    async def test_deadline_cancels_stragglers(self):
+        async def search(item):
+            await asyncio.sleep(0 if item == "fast" else 3600)
+            return item
+
+        scheduler = SearchScheduler(max_concurrency=2, timeout=3600, deadline=0.2, hedge_after=3600)
+        results = await asyncio.wait_for(collect(scheduler, ["fast", "stuck"], search), 2)
+        self.assertEqual(results, {"fast": "fast"})
+
+
+if __name__ == '__main__':
+    unittest.main()
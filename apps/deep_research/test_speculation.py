@@ -0,0 +1,71 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import speculation
+from planner_agent import WebSearchItem, WebSearchPlan
+from search_scheduler import SearchScheduler
+
+
+def planned(*queries):
+    plan = WebSearchPlan(searches=[WebSearchItem(reason="test", query=query) for query in queries])
+    return SimpleNamespace(final_output_as=lambda _: plan)
+
+
+class TestSpeculation(unittest.IsolatedAsyncioTestCase):
+    async def test_stuck_prefetch_is_cut_off_at_the_deadline(self):
+        async def search(item):
+            if item.query == "stuck":
+                await asyncio.sleep(3600)
+            return f"summary of {item.query}"
+
+        scheduler = SearchScheduler(max_concurrency=2, timeout=3600, deadline=0.3, hedge_after=3600)
+        with mock.patch.object(speculation.Runner, "run", mock.AsyncMock(return_value=planned("fast", "stuck"))):
+            prefetch = speculation.Speculation("query", search, scheduler)
+            await prefetch.plan()
+            start = time.monotonic()
+            results = await prefetch.results(["fast", "stuck"])
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(results, {"fast": "summary of fast"})
+
+    async def test_concurrency_is_capped(self):
+        running = peak = 0
+
+        async def search(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return item.query
+
+        queries = [f"q{i}" for i in range(8)]
+        scheduler = SearchScheduler(max_concurrency=2, timeout=5, deadline=5, hedge_after=5)
+        with mock.patch.object(speculation.Runner, "run", mock.AsyncMock(return_value=planned(*queries))):
+            prefetch = speculation.Speculation("query", search, scheduler)
+            await prefetch.plan()
+            results = await prefetch.results(queries)
+        self.assertEqual(results, {query: query for query in queries})
+        self.assertLessEqual(peak, 2)
+
+    async def test_unwanted_searches_are_not_run(self):
+        started = []
+
+        async def search(item):
+            started.append(item.query)
+            await asyncio.sleep(0.05)
+            return item.query
+
+        scheduler = SearchScheduler(max_concurrency=1, timeout=5, deadline=5, hedge_after=5)
+        with mock.patch.object(speculation.Runner, "run", mock.AsyncMock(return_value=planned("a", "b", "c"))):
+            prefetch = speculation.Speculation("query", search, scheduler)
+            await prefetch.plan()
+            results = await prefetch.results(["a"])
+        self.assertEqual(results, {"a": "a"})
+        self.assertEqual(started, ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,29 +1,27 @@
 from dotenv import load_dotenv
-from openai import OpenAI
-import json
+from openai import OpenAI, AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 import os
-import requests
-from pypdf import PdfReader
+import glob
 import gradio as gr
+from profile_cache import load_profile
+from profile_index import ProfileIndex
+from history_manager import HistoryManager
+from push_dispatcher import push
+from tool_runner import ToolRegistry
 
 
 load_dotenv(override=True)
 
-def push(text):
-    requests.post(
-        "https://api.pushover.net/1/messages.json",
-        data={
-            "token": os.getenv("PUSHOVER_TOKEN"),
-            "user": os.getenv("PUSHOVER_USER"),
-            "message": text,
-        }
-    )
-
+registry = ToolRegistry(default_timeout=float(os.getenv("TOOL_TIMEOUT", "10")))
 
+@registry.register
 def record_user_details(email, name="Name not provided", notes="not provided"):
     push(f"Recording {name} with email {email} and notes {notes}")
     return {"recorded": "ok"}
 
+@registry.register
 def record_unknown_question(question):
     push(f"Recording {question}")
     return {"recorded": "ok"}
@@ -72,35 +70,46 @@ record_unknown_question_json = {
 tools = [{"type": "function", "function": record_user_details_json},
         {"type": "function", "function": record_unknown_question_json}]
 
+# Upper bound on model <-> tool exchanges per user message; the last round is forced to answer in text
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "5"))
+
+# "full" sends the whole profile every turn in one fixed system prompt, which the API can cache;
+# "rag" sends a fixed prompt plus a second system message holding the profile excerpts relevant to the question
+PROFILE_CONTEXT = os.getenv("PROFILE_CONTEXT", "full")
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+
+# Older turns beyond the budget are folded into a per-session running summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+
+
+def session_id(request):
+    return getattr(request, "session_hash", None) or "default"
+
 
 class Me:
 
     def __init__(self):
         self.openai = OpenAI()
+        self.async_openai = AsyncOpenAI()
         self.name = "Ed Donner"
-        reader = PdfReader("me/linkedin.pdf")
-        self.linkedin = ""
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                self.linkedin += text
-        with open("me/summary.txt", "r", encoding="utf-8") as f:
-            self.summary = f.read()
+        self.linkedin, self.summary = load_profile("me/linkedin.pdf", "me/summary.txt")
+        documents = {"Summary": self.summary, "LinkedIn Profile": self.linkedin}
+        for path in sorted(glob.glob("knowledgebase/*.txt")):
+            with open(path, "r", encoding="utf-8") as f:
+                documents[os.path.basename(path)] = f.read()
+        self.index = ProfileIndex.from_documents(documents)
+        self._instructions = self.build_instructions()
+        self._system_prompt = self.build_system_prompt()
+        self._rag_prompt = self.build_system_prompt(rag=True)
+        self.history = HistoryManager(token_budget=HISTORY_TOKEN_BUDGET, keep_turns=HISTORY_KEEP_TURNS)
 
 
     def handle_tool_call(self, tool_calls):
-        results = []
-        for tool_call in tool_calls:
-            tool_name = tool_call.function.name
-            arguments = json.loads(tool_call.function.arguments)
-            print(f"Tool called: {tool_name}", flush=True)
-            tool = globals().get(tool_name)
-            result = tool(**arguments) if tool else {}
-            results.append({"role": "tool","content": json.dumps(result),"tool_call_id": tool_call.id})
-        return results
+        return registry.run(tool_calls)
     
-    def system_prompt(self):
-        system_prompt = f"You are acting as {self.name}. You are answering questions on {self.name}'s website, \
+    def build_instructions(self):
+        return f"You are acting as {self.name}. You are answering questions on {self.name}'s website, \
 particularly questions related to {self.name}'s career, background, skills and experience. \
 Your responsibility is to represent {self.name} for interactions on the website as faithfully as possible. \
 You are given a summary of {self.name}'s background and LinkedIn profile which you can use to answer questions. \
@@ -108,12 +117,31 @@ Be professional and engaging, as if talking to a potential client or future empl
 If you don't know the answer to any question, use your record_unknown_question tool to record the question that you couldn't answer, even if it's about something trivial or unrelated to career. \
 If the user is engaging in discussion, try to steer them towards getting in touch via email; ask for their email and record it using your record_user_details tool. "
 
-        system_prompt += f"\n\n## Summary:\n{self.summary}\n\n## LinkedIn Profile:\n{self.linkedin}\n\n"
-        system_prompt += f"With this context, please chat with the user, always staying in character as {self.name}."
-        return system_prompt
+    def build_system_prompt(self, rag=False):
+        if rag:
+            context = f"Relevant excerpts from {self.name}'s Summary and LinkedIn Profile follow in the next system message."
+        else:
+            context = f"## Summary:\n{self.summary}\n\n## LinkedIn Profile:\n{self.linkedin}"
+        return f"{self._instructions}\n\n{context}\n\nWith this context, please chat with the user, always staying in character as {self.name}."
+
+    def system_messages(self, message=None, history=None):
+        # Both prompts never change while the process is up, so they are built once in __init__ and
+        # stay a stable prefix; in rag mode only the excerpts message after them varies per question
+        if PROFILE_CONTEXT == "full" or message is None:
+            return [{"role": "system", "content": self._system_prompt}]
+        # Include the previous user turn so follow-ups like "tell me more" still retrieve the right excerpts
+        previous = [turn["content"] for turn in history or [] if turn.get("role") == "user" and isinstance(turn.get("content"), str)]
+        query = " ".join(previous[-1:] + [message])
+        # A greeting matches nothing, so it gets as many leading chunks as a question gets hits
+        excerpts = self.index.context(query, k=RAG_TOP_K, fallback=RAG_TOP_K)
+        return [
+            {"role": "system", "content": self._rag_prompt},
+            {"role": "system", "content": f"## Relevant excerpts from {self.name}'s Summary and LinkedIn Profile:\n{excerpts}"},
+        ]
     
-    def chat(self, message, history):
-        messages = [{"role": "system", "content": self.system_prompt()}] + history + [{"role": "user", "content": message}]
+    def chat(self, message, history, request: gr.Request = None):
+        recent = self.history.compact(history, session_id(request), self.openai)
+        messages = self.system_messages(message, history) + recent + [{"role": "user", "content": message}]
         done = False
         while not done:
             response = self.openai.chat.completions.create(model="gpt-4o-mini", messages=messages, tools=tools)
@@ -126,9 +154,62 @@ If the user is engaging in discussion, try to steer them towards getting in touc
             else:
                 done = True
         return response.choices[0].message.content
+
+    async def chat_stream(self, message, history, request: gr.Request = None):
+        """ Async generator version of chat that streams the reply to gr.ChatInterface as tokens arrive """
+        recent = await self.history.acompact(history, session_id(request), self.async_openai)
+        messages = self.system_messages(message, history) + recent + [{"role": "user", "content": message}]
+        for round_number in range(MAX_TOOL_ROUNDS + 1):
+            last_round = round_number == MAX_TOOL_ROUNDS
+            stream = await self.async_openai.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                tools=tools,
+                tool_choice="none" if last_round else "auto",
+                stream=True,
+            )
+            reply = ""
+            pending_calls = {}
+            finish_reason = None
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    reply += choice.delta.content
+                    yield reply
+                # Tool calls arrive in fragments keyed by index; stitch the name and arguments together
+                for fragment in choice.delta.tool_calls or []:
+                    call = pending_calls.setdefault(fragment.index, {"id": "", "name": "", "arguments": ""})
+                    if fragment.id:
+                        call["id"] = fragment.id
+                    if fragment.function and fragment.function.name:
+                        call["name"] += fragment.function.name
+                    if fragment.function and fragment.function.arguments:
+                        call["arguments"] += fragment.function.arguments
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            if finish_reason != "tool_calls" or not pending_calls:
+                return
+
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id=call["id"],
+                    type="function",
+                    function=Function(name=call["name"], arguments=call["arguments"] or "{}"),
+                )
+                for _, call in sorted(pending_calls.items())
+            ]
+            messages.append({
+                "role": "assistant",
+                "content": reply or None,
+                "tool_calls": [tool_call.model_dump() for tool_call in tool_calls],
+            })
+            # Tools do blocking I/O, so the registry runs them on its thread pool off the event loop
+            messages.extend(await registry.arun(tool_calls))
     
 
 if __name__ == "__main__":
     me = Me()
-    gr.ChatInterface(me.chat, type="messages").launch()
+    gr.ChatInterface(me.chat_stream, type="messages").launch()
     
\ No newline at end of file
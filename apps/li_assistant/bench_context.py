@@ -0,0 +1,69 @@
+# Prompt-size benchmark: full profile context vs retrieved excerpts.
+# Offline by default (prompt tokens and prompt build time); --live also times a real
+# gpt-4o-mini completion per question in each mode.
+#
+#   python bench_context.py
+#   python bench_context.py --live
+
+import argparse
+import os
+import time
+
+from history_manager import count_tokens
+
+
+QUESTIONS = [
+    "Hi there!",
+    "What certifications do you hold?",
+    "Tell me about your experience with cloud and AI.",
+    "Which books have you written?",
+    "Where are you based?",
+    "What did you publish during your PhD?",
+    "Have you won any awards?",
+    "What's your favourite programming language?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="also time real completions (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+    if not args.live:
+        # Me creates OpenAI clients eagerly; no request is made offline
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+    import app
+    me = app.Me()
+
+    totals = {"full": [0, 0.0, 0.0], "rag": [0, 0.0, 0.0]}
+    print(f"{'question':48} {'full tok':>9} {'rag tok':>8}")
+    for question in QUESTIONS:
+        row = {}
+        for mode in ("full", "rag"):
+            app.PROFILE_CONTEXT = mode
+            start = time.perf_counter()
+            prompt = me.system_messages(question, [])
+            build = time.perf_counter() - start
+            tokens = sum(count_tokens(message["content"]) for message in prompt)
+            latency = 0.0
+            if args.live:
+                start = time.perf_counter()
+                me.chat(question, [])
+                latency = time.perf_counter() - start
+            totals[mode][0] += tokens
+            totals[mode][1] += build
+            totals[mode][2] += latency
+            row[mode] = tokens
+        print(f"{question[:48]:48} {row['full']:>9} {row['rag']:>8}")
+
+    n = len(QUESTIONS)
+    for mode, (tokens, build, latency) in totals.items():
+        line = f"{mode:>4}: avg {tokens / n:7.0f} prompt tokens, prompt build {build / n * 1000:.3f} ms"
+        if args.live:
+            line += f", completion {latency / n:.2f} s"
+        print(line)
+    print(f"Prompt tokens saved by rag: {1 - totals['rag'][0] / totals['full'][0]:.0%}")
+
+
+if __name__ == "__main__":
+    main()
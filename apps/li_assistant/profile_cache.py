@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+from pypdf import PdfReader
+
+
+CACHE_DIR = os.getenv("PROFILE_CACHE_DIR", ".profile_cache")
+CACHE_VERSION = 1
+
+
+def _content_hash(*paths):
+    """ Hash the raw bytes of the profile sources so any edit invalidates the cache """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def extract_linkedin(pdf_path):
+    """ Extract the text of every page of the LinkedIn PDF export """
+    reader = PdfReader(pdf_path)
+    linkedin = ""
+    for page in reader.pages:
+        text = page.extract_text()
+        if text:
+            linkedin += text
+    return linkedin
+
+
+def load_profile(pdf_path="me/linkedin.pdf", summary_path="me/summary.txt", cache_dir=CACHE_DIR):
+    """ Return (linkedin, summary), reusing the on-disk extraction when the sources are unchanged """
+    key = _content_hash(pdf_path, summary_path)
+    cache_path = os.path.join(cache_dir, f"profile-{key}.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached["linkedin"], cached["summary"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    linkedin = extract_linkedin(pdf_path)
+    with open(summary_path, "r", encoding="utf-8") as f:
+        summary = f.read()
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temp file and rename so concurrent replicas never read a partial cache
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"linkedin": linkedin, "summary": summary}, f)
+        os.replace(tmp_path, cache_path)
+        for name in os.listdir(cache_dir):
+            if name.startswith("profile-") and name.endswith(".json") and name != os.path.basename(cache_path):
+                os.remove(os.path.join(cache_dir, name))
+    except OSError as e:
+        print(f"Profile cache not written: {e}", flush=True)
+    return linkedin, summary
@@ -0,0 +1,223 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+PUSHOVER_URL = "https://api.pushover.net/1/messages.json"
+# Pushover rejects messages longer than this
+MAX_MESSAGE_LENGTH = 1024
+
+
+class PushDispatcher:
+    """ Sends Pushover notifications from a background thread so callers never wait on the network.
+
+    Messages go onto a bounded queue. The worker drains whatever arrives within
+    `coalesce_window` seconds into a single notification, posts it over a pooled
+    session with a timeout, and retries transient failures with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        max_queue=100,
+        coalesce_window=2.0,
+        max_batch=10,
+        max_retries=4,
+        backoff=0.5,
+        timeout=5.0,
+    ):
+        self._url = url
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        # Resolved lazily so a PUSHOVER_URL loaded from .env after import is still honoured
+        return self._url or os.getenv("PUSHOVER_URL", PUSHOVER_URL)
+
+    def push(self, text):
+        """ Queue a message and return immediately; False if the queue is full and the message was dropped """
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"Push queue full, dropped: {text}", flush=True)
+            return False
+
+    def flush(self, timeout=None):
+        """ Block until every queued message has been sent or given up on """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="push-dispatcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        # A message that would have pushed the previous notification past MAX_MESSAGE_LENGTH starts the next one
+        pending = None
+        while True:
+            batch = [self.queue.get() if pending is None else pending]
+            pending = None
+            deadline = time.monotonic() + self.coalesce_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    text = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if len(self._format(batch + [text])) > MAX_MESSAGE_LENGTH:
+                    pending = text
+                    break
+                batch.append(text)
+            try:
+                self._send(self._format(batch))
+            except Exception as e:
+                self.failed += 1
+                print(f"Push failed: {e}", flush=True)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    @staticmethod
+    def _format(batch):
+        if len(batch) == 1:
+            return batch[0]
+        return f"{len(batch)} notifications:\n" + "\n".join(f"- {text}" for text in batch)
+
+    def _send(self, message):
+        # Only a single message can be over the limit; it goes out in consecutive parts rather than truncated
+        parts = [message[i:i + MAX_MESSAGE_LENGTH] for i in range(0, len(message), MAX_MESSAGE_LENGTH)] or [message]
+        for part in parts:
+            self._post(part)
+
+    def _post(self, message):
+        payload = {
+            "token": os.getenv("PUSHOVER_TOKEN"),
+            "user": os.getenv("PUSHOVER_USER"),
+            "message": message,
+        }
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+                # Only server errors and throttling are worth retrying
+                if response.status_code < 500 and response.status_code != 429:
+                    if response.ok:
+                        self.sent += 1
+                    else:
+                        self.failed += 1
+                        print(f"Push rejected ({response.status_code}): {response.text[:200]}", flush=True)
+                    return
+            except requests.RequestException as e:
+                print(f"Push attempt {attempt + 1} failed: {e}", flush=True)
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random() / 2))
+        self.failed += 1
+        print(f"Push gave up after {self.max_retries + 1} attempts", flush=True)
+
+
+class LocalPushoverServer:
+    """ Stand-in for the Pushover endpoint on localhost, for tests and local runs.
+
+    Records every message it receives. `fail_first` makes the first N requests
+    return 500 and `delay` slows every response, to exercise retries and timeouts.
+    """
+
+    def __init__(self, fail_first=0, delay=0.0):
+        self.messages = []
+        self.requests = 0
+        self.fail_first = fail_first
+        self.delay = delay
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                server.requests += 1
+                time.sleep(server.delay)
+                if server.requests <= server.fail_first:
+                    status, body = 500, {"status": 0}
+                else:
+                    server.messages.append(form.get("message", [""])[0])
+                    status, body = 200, {"status": 1}
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/1/messages.json"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+dispatcher = PushDispatcher()
+atexit.register(dispatcher.flush, 5.0)
+
+
+def push(text):
+    """ Fire-and-forget push notification through the shared dispatcher """
+    return dispatcher.push(text)
+
+
+if __name__ == "__main__":
+    # Smoke test against the local stand-in: a burst of five messages with one transient failure
+    with LocalPushoverServer(fail_first=1) as server:
+        local = PushDispatcher(url=server.url, coalesce_window=0.2, backoff=0.05)
+        start = time.perf_counter()
+        for i in range(5):
+            local.push(f"message {i}")
+        print(f"Queued 5 messages in {(time.perf_counter() - start) * 1000:.2f} ms")
+        local.flush(timeout=10)
+        print(f"Server saw {server.requests} requests, delivered {len(server.messages)} notification(s)")
+        print(server.messages[0] if server.messages else "")
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class ToolRegistry:
+    """ Name -> function registry that runs a turn's tool calls concurrently.
+
+    Every call in a turn is submitted to a shared thread pool at once, so a turn
+    with several calls costs roughly the slowest call rather than the sum. Results
+    come back in the same order as the tool calls, each tagged with its tool_call_id.
+    A call that exceeds its timeout gets an error result; the thread itself cannot
+    be interrupted and finishes in the background.
+    """
+
+    def __init__(self, max_workers=8, default_timeout=10.0):
+        self.default_timeout = default_timeout
+        self._tools = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def register(self, fn=None, *, name=None, timeout=None):
+        """ Register a tool function, usable as @registry.register or @registry.register(timeout=...) """
+        def decorator(fn):
+            self._tools[name or fn.__name__] = (fn, timeout or self.default_timeout)
+            return fn
+        return decorator(fn) if fn is not None else decorator
+
+    def metrics(self):
+        """ Per-tool call counts, failures and latency in milliseconds """
+        with self._metrics_lock:
+            return {
+                tool: {**stats, "avg_ms": stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0}
+                for tool, stats in self._metrics.items()
+            }
+
+    def run(self, tool_calls):
+        """ Execute the tool calls of one model turn in parallel and return the tool messages in order """
+        started = time.monotonic()
+        futures = [self._submit(tool_call) for tool_call in tool_calls]
+        results = []
+        for tool_call, (future, timeout) in zip(tool_calls, futures):
+            try:
+                result = future.result(timeout=max(0.0, started + timeout - time.monotonic()))
+            except FutureTimeout:
+                result = self._timed_out(tool_call.function.name, timeout)
+            results.append(self._message(tool_call, result))
+        return results
+
+    async def arun(self, tool_calls):
+        """ asyncio flavour of run() for the streaming chat loop """
+        async def one(tool_call):
+            future, timeout = self._submit(tool_call)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                return self._timed_out(tool_call.function.name, timeout)
+
+        results = await asyncio.gather(*(one(tool_call) for tool_call in tool_calls))
+        return [self._message(tool_call, result) for tool_call, result in zip(tool_calls, results)]
+
+    def _submit(self, tool_call):
+        tool_name = tool_call.function.name
+        print(f"Tool called: {tool_name}", flush=True)
+        fn, timeout = self._tools.get(tool_name, (None, self.default_timeout))
+        return self._executor.submit(self._invoke, tool_name, fn, tool_call.function.arguments), timeout
+
+    def _invoke(self, tool_name, fn, arguments):
+        start = time.perf_counter()
+        failed = False
+        try:
+            if fn is None:
+                failed = True
+                return {"error": f"Unknown tool {tool_name}"}
+            return fn(**json.loads(arguments or "{}"))
+        except Exception as e:
+            failed = True
+            print(f"Tool {tool_name} failed: {e}", flush=True)
+            return {"error": str(e)}
+        finally:
+            self._record(tool_name, (time.perf_counter() - start) * 1000, failed)
+
+    def _record(self, tool_name, elapsed_ms, failed=False, timed_out=False):
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(
+                tool_name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            if timed_out:
+                stats["timeouts"] += 1
+                return
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def _timed_out(self, tool_name, timeout):
+        print(f"Tool {tool_name} timed out after {timeout}s", flush=True)
+        self._record(tool_name, 0.0, timed_out=True)
+        return {"error": f"{tool_name} timed out"}
+
+    @staticmethod
+    def _message(tool_call, result):
+        return {"role": "tool", "content": json.dumps(result), "tool_call_id": tool_call.id}
@@ -0,0 +1,75 @@
+# Startup benchmark for the profile assistant.
+# Compares a cold start (PDF parsed from scratch) with a warm start (extraction read from the
+# content-hash cache), and the per-turn cost of rebuilding the system prompt vs reusing it.
+#
+#   python bench_startup.py --runs 5
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from profile_cache import load_profile
+
+
+PDF_PATH = "me/linkedin.pdf"
+SUMMARY_PATH = "me/summary.txt"
+
+
+def build_prompt(name, summary, linkedin):
+    """ Same shape as Me.build_system_prompt, without needing an OpenAI client """
+    prompt = f"You are acting as {name}. You are answering questions on {name}'s website. "
+    prompt += f"\n\n## Summary:\n{summary}\n\n## LinkedIn Profile:\n{linkedin}\n\n"
+    prompt += f"With this context, please chat with the user, always staying in character as {name}."
+    return prompt
+
+
+def time_it(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=10000)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="profile-bench-")
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            load_profile(PDF_PATH, SUMMARY_PATH, cache_dir=cache_dir)
+
+        def warm():
+            load_profile(PDF_PATH, SUMMARY_PATH, cache_dir=cache_dir)
+
+        cold_best, cold_mean = time_it(cold, args.runs)
+        warm()  # make sure the cache is populated
+        warm_best, warm_mean = time_it(warm, args.runs)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"Cold start: best {cold_best * 1000:.1f} ms, mean {cold_mean * 1000:.1f} ms")
+    print(f"Warm start: best {warm_best * 1000:.1f} ms, mean {warm_mean * 1000:.1f} ms")
+    print(f"Speedup:    {cold_mean / warm_mean:.1f}x")
+
+    linkedin, summary = load_profile(PDF_PATH, SUMMARY_PATH)
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        build_prompt("Ed Donner", summary, linkedin)
+    rebuild = (time.perf_counter() - start) / args.turns
+    cached = build_prompt("Ed Donner", summary, linkedin)
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        _ = cached
+    reuse = (time.perf_counter() - start) / args.turns
+    print(f"Per-turn prompt: rebuild {rebuild * 1e6:.2f} us, reuse {reuse * 1e6:.3f} us ({len(cached)} chars)")
+
+
+if __name__ == "__main__":
+    main()
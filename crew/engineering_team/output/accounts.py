@@ -1,32 +1,57 @@
 import datetime
+from types import MappingProxyType
+from typing import Iterator, Optional
+
+from ledger import Ledger, Transaction
+from prices import PriceFeed, price_feed
+from valuation import MarkToMarket
 
 def get_share_price(symbol: str) -> float:
-    """Returns the current price of a share. Test implementation with fixed prices.
+    """Returns the current price of a share from the default price feed.
     
     Args:
         symbol: The stock symbol to get the price for.
         
     Returns:
-        float: The current price of the share.
+        float: The current price of the share, or 0.0 for an unknown symbol.
     """
-    prices = {
-        'AAPL': 150.00,
-        'TSLA': 700.00,
-        'GOOGL': 2800.00
-    }
-    return prices.get(symbol, 0.0)
+    return price_feed.get_price(symbol)
 
 
 class Account:
     """A class representing a user's account in a trading simulation platform."""
 
-    def __init__(self) -> None:
-        """Initialize a new account with zero balance, no holdings, and no transactions."""
+    def __init__(self, snapshot_path: Optional[str] = None, snapshot_every: int = 100_000,
+                 price_feed: PriceFeed = price_feed) -> None:
+        """Initialize a new account with zero balance, no holdings, and no transactions.
+        
+        Args:
+            snapshot_path: If set, the account is snapshotted to this path every `snapshot_every` transactions.
+            snapshot_every: Number of transactions between automatic snapshots.
+            price_feed: Where trades and valuations get share prices; defaults to the module feed.
+        """
         self.balance = 0.0
-        self.transactions = []
+        self.transactions = Ledger()
         self.holdings = {}
         self.initial_deposit = 0.0
         self.user_id = None
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.price_feed = price_feed
+        self._valuation: Optional[MarkToMarket] = None
+
+    def _record(self, kind: str, amount: float, symbol: Optional[str] = None, quantity: int = 0, price: float = 0.0) -> None:
+        """Append a transaction to the ledger and snapshot if one is due."""
+        self.transactions.append(kind, amount, self.balance, symbol, quantity, price)
+        if self.snapshot_path and len(self.transactions) % self.snapshot_every == 0:
+            self.snapshot(self.snapshot_path)
+
+    def _record_many(self, rows) -> None:
+        """Append a batch of trades already applied to the balance and holdings, see Ledger.extend()."""
+        before = len(self.transactions)
+        self.transactions.extend(rows)
+        if self.snapshot_path and len(self.transactions) // self.snapshot_every > before // self.snapshot_every:
+            self.snapshot(self.snapshot_path)
 
     def create_account(self, user_id: str, initial_deposit: float) -> None:
         """Create a new account with an initial deposit.
@@ -45,15 +70,10 @@ class Account:
             raise ValueError("Initial deposit must be positive")
         
         self.user_id = user_id
+        self.transactions.user_id = user_id
         self.initial_deposit = initial_deposit
         self.balance = initial_deposit
-        self.transactions.append({
-            'type': 'ACCOUNT_CREATION',
-            'user_id': user_id,
-            'amount': initial_deposit,
-            'balance': self.balance,
-            'timestamp': datetime.datetime.now()
-        })
+        self._record('ACCOUNT_CREATION', initial_deposit)
 
     def deposit_funds(self, amount: float) -> None:
         """Deposit funds into the account.
@@ -68,12 +88,7 @@ class Account:
             raise ValueError("Deposit amount must be positive")
         
         self.balance += amount
-        self.transactions.append({
-            'type': 'DEPOSIT',
-            'amount': amount,
-            'balance': self.balance,
-            'timestamp': datetime.datetime.now()
-        })
+        self._record('DEPOSIT', amount)
 
     def withdraw_funds(self, amount: float) -> bool:
         """Withdraw funds from the account if sufficient funds exist.
@@ -94,12 +109,7 @@ class Account:
             return False
         
         self.balance -= amount
-        self.transactions.append({
-            'type': 'WITHDRAWAL',
-            'amount': amount,
-            'balance': self.balance,
-            'timestamp': datetime.datetime.now()
-        })
+        self._record('WITHDRAWAL', amount)
         return True
 
     def buy_shares(self, symbol: str, quantity: int) -> bool:
@@ -118,7 +128,7 @@ class Account:
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
         
-        price = get_share_price(symbol)
+        price = self.price_feed.get_price(symbol)
         if price == 0.0:
             raise ValueError(f"Invalid stock symbol: {symbol}")
         
@@ -134,15 +144,7 @@ class Account:
         else:
             self.holdings[symbol] = quantity
         
-        self.transactions.append({
-            'type': 'BUY',
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': price,
-            'total': total_cost,
-            'balance': self.balance,
-            'timestamp': datetime.datetime.now()
-        })
+        self._record('BUY', total_cost, symbol, quantity, price)
         return True
 
     def sell_shares(self, symbol: str, quantity: int) -> bool:
@@ -164,7 +166,7 @@ class Account:
         if symbol not in self.holdings or self.holdings[symbol] < quantity:
             return False
         
-        price = get_share_price(symbol)
+        price = self.price_feed.get_price(symbol)
         if price == 0.0:
             raise ValueError(f"Invalid stock symbol: {symbol}")
         
@@ -176,15 +178,7 @@ class Account:
         if self.holdings[symbol] == 0:
             del self.holdings[symbol]
         
-        self.transactions.append({
-            'type': 'SELL',
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': price,
-            'total': total_value,
-            'balance': self.balance,
-            'timestamp': datetime.datetime.now()
-        })
+        self._record('SELL', total_value, symbol, quantity, price)
         return True
 
     def calculate_portfolio_value(self) -> float:
@@ -193,9 +187,7 @@ class Account:
         Returns:
             float: Total current value of the portfolio.
         """
-        holdings_value = sum(get_share_price(symbol) * quantity 
-                           for symbol, quantity in self.holdings.items())
-        return self.balance + holdings_value
+        return self.balance + self.price_feed.value(self.holdings)
 
     def calculate_profit_loss(self) -> float:
         """Calculate the profit or loss relative to initial deposit.
@@ -205,18 +197,84 @@ class Account:
         """
         return self.calculate_portfolio_value() - self.initial_deposit
 
-    def get_holdings(self) -> dict:
+    def get_holdings(self) -> MappingProxyType:
         """Get the current holdings of the account.
         
         Returns:
-            dict: The current holdings of the account (stock symbols with quantities).
+            MappingProxyType: A read-only live view of the holdings (stock symbols with quantities).
         """
-        return self.holdings.copy()
+        return MappingProxyType(self.holdings)
 
-    def list_transactions(self) -> list:
+    def mark_to_market(self) -> MarkToMarket:
+        """Point-in-time and range valuation of the account (P&L curve, drawdown, exposure).
+        
+        Returns:
+            MarkToMarket: The account's valuation engine, updated incrementally as transactions are added.
+        """
+        if self._valuation is None or self._valuation.ledger is not self.transactions:
+            self._valuation = MarkToMarket(self.transactions, self.price_feed)
+        return self._valuation
+
+    def list_transactions(self) -> Ledger:
         """List all executed transactions.
         
         Returns:
-            list: A list of all executed transactions.
+            Ledger: The append-only transaction ledger, a read-only sequence of dict-like transactions.
+        """
+        return self.transactions
+
+    def iter_transactions(self, cursor: int = 0) -> Iterator[Transaction]:
+        """Iterate transactions from a cursor without copying.
+        
+        Args:
+            cursor: Index of the first transaction to return; pass the last seen index + 1 to resume.
+            
+        Returns:
+            Iterator[Transaction]: The transactions from `cursor` onwards.
+        """
+        return self.transactions.iter(cursor)
+
+    def transactions_between(self, start: Optional[datetime.datetime] = None,
+                             end: Optional[datetime.datetime] = None) -> Iterator[Transaction]:
+        """Iterate the transactions with start <= timestamp < end, found by binary search.
+        
+        Args:
+            start: Earliest timestamp to include, or None for the beginning.
+            end: Timestamp to stop before, or None for the end.
+            
+        Returns:
+            Iterator[Transaction]: The transactions in the time range.
+        """
+        return self.transactions.between(start, end)
+
+    def snapshot(self, path: str) -> None:
+        """Write the ledger and account state to disk; only new transactions are written.
+        
+        Args:
+            path: Base path of the snapshot files.
+        """
+        self.transactions.snapshot(path, {
+            'balance': self.balance,
+            'holdings': self.holdings,
+            'initial_deposit': self.initial_deposit,
+        })
+
+    @classmethod
+    def restore(cls, path: str, snapshot_every: int = 100_000) -> 'Account':
+        """Load an account from a snapshot, continuing to snapshot to the same path.
+        
+        Args:
+            path: Base path of the snapshot files.
+            snapshot_every: Number of transactions between automatic snapshots.
+            
+        Returns:
+            Account: The restored account.
         """
-        return self.transactions.copy()
\ No newline at end of file
+        ledger, state = Ledger.load(path)
+        account = cls(snapshot_path=path, snapshot_every=snapshot_every)
+        account.transactions = ledger
+        account.user_id = ledger.user_id
+        account.balance = state['balance']
+        account.holdings = dict(state['holdings'])
+        account.initial_deposit = state['initial_deposit']
+        return account
\ No newline at end of file
@@ -1,9 +1,13 @@
 import gradio as gr
 import datetime
-from accounts import Account, get_share_price
+import pandas as pd
+from exchange import Exchange
+from prices import price_feed
+from storage import AccountStore
 
-account = Account()
-account_created = False
+# One exchange for the whole app, persisted to ACCOUNTS_DB so accounts survive a restart;
+# each browser session keeps its own user ID in gr.State
+exchange = Exchange(store=AccountStore())
 
 def format_transactions(transactions):
     if not transactions:
@@ -29,49 +33,53 @@ def format_holdings(holdings):
         return "No holdings."
     
     formatted = ""
-    total_value = 0.0
+    prices = price_feed.get_prices(list(holdings))
+    quantities = list(holdings.values())
     
-    for symbol, quantity in holdings.items():
-        price = get_share_price(symbol)
-        value = price * quantity
-        total_value += value
-        formatted += f"{symbol}: {quantity} shares @ ${price:.2f} = ${value:.2f}\n"
+    for symbol, quantity, price in zip(holdings, quantities, prices.tolist()):
+        formatted += f"{symbol}: {quantity} shares @ ${price:.2f} = ${price * quantity:.2f}\n"
     
-    formatted += f"\nTotal Holdings Value: ${total_value:.2f}"
+    formatted += f"\nTotal Holdings Value: ${float(prices @ quantities):.2f}"
     return formatted
 
-def create_account(user_id, initial_deposit):
-    global account_created
+def create_account(user_id, initial_deposit, session_user):
+    if session_user is not None:
+        return f"This session already has an account for user {session_user}", session_user
     
     try:
         if not user_id or user_id.strip() == "":
-            return "Error: User ID is required"
+            return "Error: User ID is required", session_user
+        
+        if user_id in exchange.account_ids:
+            account = exchange.account(user_id)
+            return f"Welcome back {user_id}. Current balance: ${account.balance:.2f}", user_id
         
         initial_deposit = float(initial_deposit)
-        account.create_account(user_id, initial_deposit)
-        account_created = True
-        return f"Account created for user {user_id} with initial deposit of ${initial_deposit:.2f}"
+        exchange.open_account(user_id, initial_deposit)
+        return f"Account created for user {user_id} with initial deposit of ${initial_deposit:.2f}", user_id
     except ValueError as e:
-        return f"Error: {str(e)}"
+        return f"Error: {str(e)}", session_user
 
-def deposit(amount):
-    if not account_created:
+def deposit(amount, session_user):
+    if session_user is None:
         return "Please create an account first."
     
     try:
         amount = float(amount)
-        account.deposit_funds(amount)
+        exchange.deposit_funds(session_user, amount)
+        account = exchange.account(session_user)
         return f"Successfully deposited ${amount:.2f}. New balance: ${account.balance:.2f}"
     except ValueError as e:
         return f"Error: {str(e)}"
 
-def withdraw(amount):
-    if not account_created:
+def withdraw(amount, session_user):
+    if session_user is None:
         return "Please create an account first."
     
     try:
         amount = float(amount)
-        success = account.withdraw_funds(amount)
+        success = exchange.withdraw_funds(session_user, amount)
+        account = exchange.account(session_user)
         if success:
             return f"Successfully withdrew ${amount:.2f}. New balance: ${account.balance:.2f}"
         else:
@@ -79,14 +87,15 @@ def withdraw(amount):
     except ValueError as e:
         return f"Error: {str(e)}"
 
-def buy_shares(symbol, quantity):
-    if not account_created:
+def buy_shares(symbol, quantity, session_user):
+    if session_user is None:
         return "Please create an account first."
     
     try:
         quantity = int(quantity)
         symbol = symbol.upper()
-        success = account.buy_shares(symbol, quantity)
+        success = exchange.buy_shares(session_user, symbol, quantity)
+        account = exchange.account(session_user)
         if success:
             return f"Successfully bought {quantity} shares of {symbol}. New balance: ${account.balance:.2f}"
         else:
@@ -94,14 +103,15 @@ def buy_shares(symbol, quantity):
     except ValueError as e:
         return f"Error: {str(e)}"
 
-def sell_shares(symbol, quantity):
-    if not account_created:
+def sell_shares(symbol, quantity, session_user):
+    if session_user is None:
         return "Please create an account first."
     
     try:
         quantity = int(quantity)
         symbol = symbol.upper()
-        success = account.sell_shares(symbol, quantity)
+        success = exchange.sell_shares(session_user, symbol, quantity)
+        account = exchange.account(session_user)
         if success:
             return f"Successfully sold {quantity} shares of {symbol}. New balance: ${account.balance:.2f}"
         else:
@@ -111,10 +121,11 @@ def sell_shares(symbol, quantity):
     except ValueError as e:
         return f"Error: {str(e)}"
 
-def get_account_summary():
-    if not account_created:
+def get_account_summary(session_user):
+    if session_user is None:
         return "Please create an account first."
     
+    account = exchange.account(session_user)
     portfolio_value = account.calculate_portfolio_value()
     profit_loss = account.calculate_profit_loss()
     profit_loss_str = "profit" if profit_loss >= 0 else "loss"
@@ -123,25 +134,40 @@ def get_account_summary():
     summary += f"User ID: {account.user_id}\n"
     summary += f"Cash Balance: ${account.balance:.2f}\n"
     summary += f"Portfolio Value: ${portfolio_value:.2f}\n"
-    summary += f"Profit/Loss: ${profit_loss:.2f} ({profit_loss_str})\n\n"
+    summary += f"Profit/Loss: ${profit_loss:.2f} ({profit_loss_str})\n"
+    summary += f"Max Drawdown: ${account.mark_to_market().at()['max_drawdown']:.2f}\n\n"
     
     summary += "Current Holdings:\n"
     summary += format_holdings(account.get_holdings())
     
     return summary
 
-def get_transaction_history():
-    if not account_created:
+def get_pnl_chart(session_user):
+    if session_user is None:
+        return pd.DataFrame(columns=['time', 'cash', 'value', 'pnl', 'drawdown'])
+    return exchange.account(session_user).mark_to_market().curve()
+
+def get_exposure_chart(session_user):
+    if session_user is None:
+        return pd.DataFrame(columns=['symbol', 'value'])
+    exposure = exchange.account(session_user).mark_to_market().exposure()
+    return pd.DataFrame({'symbol': list(exposure), 'value': list(exposure.values())})
+
+def get_transaction_history(session_user):
+    if session_user is None:
         return "Please create an account first."
     
-    transactions = account.list_transactions()
+    transactions = exchange.account(session_user).list_transactions()
     return format_transactions(transactions)
 
 def get_available_stocks():
-    return "Available Stocks for Demo:\nAAPL: $150.00\nTSLA: $700.00\nGOOGL: $2800.00"
+    symbols = exchange.symbols
+    prices = price_feed.get_prices(symbols)
+    return "Available Stocks for Demo:\n" + "\n".join(f"{symbol}: ${price:.2f}" for symbol, price in zip(symbols, prices.tolist()))
 
 with gr.Blocks(title="Trading Simulation Platform") as demo:
     gr.Markdown("# Trading Simulation Platform")
+    session_user = gr.State(None)
     
     with gr.Tab("Account Management"):
         with gr.Group():
@@ -151,7 +177,7 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
                 initial_deposit_input = gr.Textbox(label="Initial Deposit ($)")
             create_account_btn = gr.Button("Create Account")
             create_account_output = gr.Textbox(label="Result", interactive=False)
-            create_account_btn.click(create_account, inputs=[user_id_input, initial_deposit_input], outputs=[create_account_output])
+            create_account_btn.click(create_account, inputs=[user_id_input, initial_deposit_input, session_user], outputs=[create_account_output, session_user])
         
         with gr.Group():
             gr.Markdown("### Deposit & Withdraw")
@@ -160,13 +186,13 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
                     deposit_input = gr.Textbox(label="Amount to Deposit ($)")
                     deposit_btn = gr.Button("Deposit")
                     deposit_output = gr.Textbox(label="Result", interactive=False)
-                    deposit_btn.click(deposit, inputs=[deposit_input], outputs=[deposit_output])
+                    deposit_btn.click(deposit, inputs=[deposit_input, session_user], outputs=[deposit_output])
                 
                 with gr.Column():
                     withdraw_input = gr.Textbox(label="Amount to Withdraw ($)")
                     withdraw_btn = gr.Button("Withdraw")
                     withdraw_output = gr.Textbox(label="Result", interactive=False)
-                    withdraw_btn.click(withdraw, inputs=[withdraw_input], outputs=[withdraw_output])
+                    withdraw_btn.click(withdraw, inputs=[withdraw_input, session_user], outputs=[withdraw_output])
     
     with gr.Tab("Trading"):
         gr.Markdown("### Available Stocks")
@@ -179,7 +205,7 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
                 buy_quantity_input = gr.Textbox(label="Quantity")
             buy_btn = gr.Button("Buy Shares")
             buy_output = gr.Textbox(label="Result", interactive=False)
-            buy_btn.click(buy_shares, inputs=[buy_symbol_input, buy_quantity_input], outputs=[buy_output])
+            buy_btn.click(buy_shares, inputs=[buy_symbol_input, buy_quantity_input, session_user], outputs=[buy_output])
         
         with gr.Group():
             gr.Markdown("### Sell Shares")
@@ -188,21 +214,29 @@ with gr.Blocks(title="Trading Simulation Platform") as demo:
                 sell_quantity_input = gr.Textbox(label="Quantity")
             sell_btn = gr.Button("Sell Shares")
             sell_output = gr.Textbox(label="Result", interactive=False)
-            sell_btn.click(sell_shares, inputs=[sell_symbol_input, sell_quantity_input], outputs=[sell_output])
+            sell_btn.click(sell_shares, inputs=[sell_symbol_input, sell_quantity_input, session_user], outputs=[sell_output])
     
     with gr.Tab("Portfolio"):
         with gr.Group():
             gr.Markdown("### Account Summary")
             summary_btn = gr.Button("Get Account Summary")
             summary_output = gr.Textbox(label="Account Summary", interactive=False, lines=10)
-            summary_btn.click(get_account_summary, inputs=[], outputs=[summary_output])
+            pnl_plot = gr.LinePlot(x="time", y="pnl", title="Profit/Loss (net of deposits and withdrawals)")
+            drawdown_plot = gr.LinePlot(x="time", y="drawdown", title="Drawdown from peak P&L")
+            exposure_plot = gr.BarPlot(x="symbol", y="value", title="Exposure by Symbol")
+            summary_btn.click(get_account_summary, inputs=[session_user], outputs=[summary_output])
+            summary_btn.click(get_pnl_chart, inputs=[session_user], outputs=[pnl_plot])
+            summary_btn.click(get_pnl_chart, inputs=[session_user], outputs=[drawdown_plot])
+            summary_btn.click(get_exposure_chart, inputs=[session_user], outputs=[exposure_plot])
     
     with gr.Tab("Transactions"):
         with gr.Group():
             gr.Markdown("### Transaction History")
             history_btn = gr.Button("Get Transaction History")
             history_output = gr.Textbox(label="Transactions", interactive=False, lines=15)
-            history_btn.click(get_transaction_history, inputs=[], outputs=[history_output])
+            value_plot = gr.LinePlot(x="time", y="value", title="Portfolio Value")
+            history_btn.click(get_transaction_history, inputs=[session_user], outputs=[history_output])
+            history_btn.click(get_pnl_chart, inputs=[session_user], outputs=[value_plot])
 
 if __name__ == "__main__":
     demo.launch()
\ No newline at end of file
@@ -0,0 +1,93 @@
+# Orders per second through the Exchange: batched execute() at several batch sizes,
+# the writer thread fed by concurrent submitters, and one Account call per order.
+#
+#   python bench_exchange.py
+#   python bench_exchange.py --accounts 10000 --orders 1000000 --threads 16
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from accounts import Account
+from exchange import BUY, SELL, SYMBOLS, Exchange
+
+
+def random_orders(rng, accounts, count):
+    return (
+        rng.integers(0, accounts, count),
+        np.where(rng.random(count) < 0.55, BUY, SELL).astype(np.uint8),
+        rng.integers(0, len(SYMBOLS), count),
+        rng.integers(1, 10, count),
+    )
+
+
+def new_exchange(accounts):
+    exchange = Exchange(max_batch=10_000)
+    for i in range(accounts):
+        exchange.open_account(f"user{i}", 100_000.0)
+    return exchange
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=5_000)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--sequential-orders', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--submitted-orders', type=int, default=200_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    print(f"{args.accounts:,} accounts, {len(SYMBOLS)} symbols\n")
+    print(f"{'mode':<34} {'orders':>10} {'filled':>8} {'orders / s':>12}")
+
+    accounts = [Account() for _ in range(args.accounts)]
+    for i, account in enumerate(accounts):
+        account.create_account(f"user{i}", 100_000.0)
+    orders = random_orders(rng, args.accounts, args.sequential_orders)
+    methods = {BUY: Account.buy_shares, SELL: Account.sell_shares}
+    filled = 0
+    start = time.perf_counter()
+    for index, side, symbol, quantity in zip(*(column.tolist() for column in orders)):
+        filled += methods[side](accounts[index], SYMBOLS[symbol], quantity)
+    rate = args.sequential_orders / (time.perf_counter() - start)
+    print(f"{'Account method per order':<34} {args.sequential_orders:>10,} {filled / args.sequential_orders:>8.0%} {rate:>12,.0f}")
+
+    for batch_size in args.batch_sizes:
+        exchange = new_exchange(args.accounts)
+        orders = random_orders(rng, args.accounts, args.orders)
+        filled = 0
+        start = time.perf_counter()
+        for offset in range(0, args.orders, batch_size):
+            filled += exchange.execute(*(column[offset:offset + batch_size] for column in orders)).sum()
+        rate = args.orders / (time.perf_counter() - start)
+        print(f"{f'execute(), batches of {batch_size:,}':<34} {args.orders:>10,} {filled / args.orders:>8.0%} {rate:>12,.0f}")
+
+    exchange = new_exchange(args.accounts)
+    per_thread = args.submitted_orders // args.threads
+    orders = random_orders(rng, args.accounts, per_thread * args.threads)
+    sides = {BUY: 'BUY', SELL: 'SELL'}
+    results = [[] for _ in range(args.threads)]
+
+    def submitter(thread):
+        rows = slice(thread * per_thread, (thread + 1) * per_thread)
+        for index, side, symbol, quantity in zip(*(column[rows].tolist() for column in orders)):
+            results[thread].append(exchange.submit(f"user{index}", sides[side], SYMBOLS[symbol], quantity))
+
+    threads = [threading.Thread(target=submitter, args=(thread,)) for thread in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    filled = sum(future.result() for futures in results for future in futures)
+    rate = per_thread * args.threads / (time.perf_counter() - start)
+    label = f"submit() from {args.threads} threads"
+    print(f"{label:<34} {per_thread * args.threads:>10,} {filled / (per_thread * args.threads):>8.0%} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
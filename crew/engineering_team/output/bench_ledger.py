@@ -0,0 +1,110 @@
+# Ledger-backed Account against the original list-of-dicts transactions, up to 10M trades.
+#
+#   python bench_ledger.py
+#   python bench_ledger.py --trades 1000000 --legacy-trades 200000
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+import tracemalloc
+
+from accounts import Account, get_share_price
+
+SYMBOLS = ['AAPL', 'TSLA', 'GOOGL']
+
+
+class LegacyAccount:
+    """The original storage: one dict with a datetime per transaction, copied on every listing."""
+
+    def __init__(self):
+        self.balance = 0.0
+        self.transactions = []
+        self.holdings = {}
+
+    def trade(self, kind, symbol, quantity):
+        price = get_share_price(symbol)
+        total = price * quantity
+        if kind == 'BUY':
+            self.balance -= total
+            self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
+        else:
+            self.balance += total
+            self.holdings[symbol] -= quantity
+        self.transactions.append({
+            'type': kind, 'symbol': symbol, 'quantity': quantity, 'price': price,
+            'total': total, 'balance': self.balance, 'timestamp': datetime.datetime.now(),
+        })
+
+    def list_transactions(self):
+        return self.transactions.copy()
+
+
+def run_trades(trade, count):
+    # Each buy is followed by selling the same lot, so holdings stay bounded and every trade is valid
+    for i in range(count):
+        pair = i // 2
+        trade('BUY' if i % 2 == 0 else 'SELL', SYMBOLS[pair % 3], 1 + pair % 5)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trades', type=int, default=10_000_000)
+    parser.add_argument('--legacy-trades', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    legacy = LegacyAccount()
+    legacy.balance = 1e12
+    start = time.perf_counter()
+    run_trades(legacy.trade, args.legacy_trades)
+    legacy_rate = args.legacy_trades / (time.perf_counter() - start)
+    start = time.perf_counter()
+    legacy.list_transactions()
+    legacy_list = time.perf_counter() - start
+    tracemalloc.start()
+    sample = LegacyAccount()
+    sample.balance = 1e12
+    run_trades(sample.trade, 100_000)
+    legacy_bytes = tracemalloc.get_traced_memory()[0] / 100_000
+    tracemalloc.stop()
+    del legacy, sample
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'account')
+        account = Account(snapshot_path=path, snapshot_every=1_000_000)
+        account.create_account('bench', 1e12)
+        trades = {'BUY': account.buy_shares, 'SELL': account.sell_shares}
+        start = time.perf_counter()
+        run_trades(lambda kind, symbol, quantity: trades[kind](symbol, quantity), args.trades)
+        elapsed = time.perf_counter() - start
+        rate = args.trades / elapsed
+
+        start = time.perf_counter()
+        account.list_transactions()
+        list_time = time.perf_counter() - start
+        middle = account.transactions[len(account.transactions) // 2]['timestamp']
+        start = time.perf_counter()
+        first, last = account.transactions.span(middle, middle + datetime.timedelta(milliseconds=1))
+        span_time = time.perf_counter() - start
+        start = time.perf_counter()
+        account.snapshot(path)
+        incremental = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = Account.restore(path)
+        restore_time = time.perf_counter() - start
+        assert restored.balance == account.balance and restored.holdings == account.holdings
+        assert len(restored.transactions) == len(account.transactions)
+
+    print(f"{'':<28} {'legacy':>14} {'ledger':>14}")
+    print(f"{'trades':<28} {args.legacy_trades:>14,} {args.trades:>14,}")
+    print(f"{'trades / s':<28} {legacy_rate:>14,.0f} {rate:>14,.0f}")
+    print(f"{'bytes / trade':<28} {legacy_bytes:>14,.0f} {account.transactions.rows.itemsize:>14,}")
+    print(f"{'list_transactions()':<28} {legacy_list * 1000:>12.1f}ms {list_time * 1e6:>12.1f}us")
+    print(f"\n1 ms time-range lookup: {last - first:,} trades found in {span_time * 1e6:.1f}us")
+    print(f"snapshots every 1M trades included above; final incremental snapshot {incremental * 1000:.1f}ms")
+    print(f"restore of {len(restored.transactions):,} transactions: {restore_time:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
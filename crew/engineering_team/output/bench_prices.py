@@ -0,0 +1,85 @@
+# Price lookups and portfolio valuation: the dict-literal get_share_price and
+# per-holding loop against the cached PriceFeed snapshot and a dot product,
+# plus loading and querying a replayed tick file.
+#
+#   python bench_prices.py
+#   python bench_prices.py --symbols 2000 --ticks 5000000 --format parquet
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from prices import DEMO_PRICES, ReplayPriceFeed, StaticPriceFeed
+
+
+def legacy_get_share_price(symbol):
+    prices = {
+        'AAPL': 150.00,
+        'TSLA': 700.00,
+        'GOOGL': 2800.00
+    }
+    return prices.get(symbol, 0.0)
+
+
+def per_call(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--ticks', type=int, default=1_000_000)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='parquet')
+    parser.add_argument('--repeat', type=int, default=10_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    demo = StaticPriceFeed(DEMO_PRICES)
+    holdings = {'AAPL': 10, 'TSLA': 3, 'GOOGL': 1}
+    print(f"{'demo prices':<40} {'us / call':>10}")
+    print(f"{'legacy get_share_price()':<40} {per_call(lambda: legacy_get_share_price('TSLA'), args.repeat):>10.3f}")
+    print(f"{'PriceFeed.get_price()':<40} {per_call(lambda: demo.get_price('TSLA'), args.repeat):>10.3f}")
+    legacy = lambda: sum(legacy_get_share_price(symbol) * quantity for symbol, quantity in holdings.items())
+    print(f"{'legacy valuation, 3 holdings':<40} {per_call(legacy, args.repeat):>10.3f}")
+    print(f"{'PriceFeed.value(), 3 holdings':<40} {per_call(lambda: demo.value(holdings), args.repeat):>10.3f}")
+
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    wide = StaticPriceFeed(dict(zip(symbols, rng.uniform(1, 1000, args.symbols).round(2).tolist())))
+    book = dict(zip(symbols, rng.integers(1, 100, args.symbols).tolist()))
+    loop = lambda: sum(wide.get_price(symbol) * quantity for symbol, quantity in book.items())
+    print(f"\n{f'{args.symbols} holdings':<40} {'us / call':>10}")
+    print(f"{'per-holding get_price() loop':<40} {per_call(loop, args.repeat // 10):>10.1f}")
+    print(f"{'PriceFeed.value() dot product':<40} {per_call(lambda: wide.value(book), args.repeat // 10):>10.1f}")
+    assert abs(loop() - wide.value(book)) < 1e-6 * loop()
+
+    times = pd.Timestamp('2024-01-02 09:30') + pd.to_timedelta(np.sort(rng.integers(0, 6.5 * 3600 * 1000, args.ticks)), unit='ms')
+    ticks = pd.DataFrame({
+        'timestamp': times,
+        'symbol': np.array(symbols)[rng.integers(0, args.symbols, args.ticks)],
+        'price': rng.uniform(1, 1000, args.ticks).round(2),
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"ticks.{args.format}")
+        if args.format == 'parquet':
+            ticks.to_parquet(path)
+        else:
+            ticks.to_csv(path, index=False)
+        start = time.perf_counter()
+        replay = ReplayPriceFeed(path, ttl=0.5, speed=60.0)
+        load = time.perf_counter() - start
+    print(f"\nreplay of {args.ticks:,} ticks ({args.format}) loaded in {load:.2f}s, "
+          f"{len(replay.tick_symbols):,} symbols")
+    moments = rng.uniform(replay.start, replay.end, 1000)
+    print(f"{'prices_at(t), all symbols':<40} {per_call(lambda: replay.prices_at(moments[0]), args.repeat):>10.2f} us")
+    print(f"{'get_prices() from cached snapshot':<40} {per_call(lambda: replay.get_prices(symbols[:50]), args.repeat):>10.2f} us (50 symbols)")
+
+
+if __name__ == '__main__':
+    main()
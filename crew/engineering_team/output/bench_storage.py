@@ -0,0 +1,85 @@
+# Write throughput and recovery time of the SQLite account store: batched
+# Exchange orders saved one commit per batch against one commit per order,
+# then restarting an Exchange from the store with and without snapshots, and
+# the first (lazy) read of an account's history.
+#
+#   python bench_storage.py
+#   python bench_storage.py --accounts 10000 --orders 2000000
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from exchange import BUY, SELL, SYMBOLS, Exchange
+from storage import AccountStore
+
+
+def random_orders(rng, accounts, count):
+    return (
+        rng.integers(0, accounts, count),
+        np.where(rng.random(count) < 0.55, BUY, SELL).astype(np.uint8),
+        rng.integers(0, len(SYMBOLS), count),
+        rng.integers(1, 10, count),
+    )
+
+
+def fill(store, accounts, orders, batch_size, rng):
+    exchange = Exchange(store=store)
+    for i in range(accounts):
+        exchange.open_account(f"user{i}", 100_000.0)
+    columns = random_orders(rng, accounts, orders)
+    start = time.perf_counter()
+    filled = 0
+    for offset in range(0, orders, batch_size):
+        filled += exchange.execute(*(column[offset:offset + batch_size] for column in columns)).sum()
+    return exchange, filled, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=1_000)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--single-orders', type=int, default=5_000)
+    parser.add_argument('--snapshot-every', type=int, default=200)
+    args = parser.parse_args()
+    rng = np.random.default_rng(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, filled, elapsed = fill(AccountStore(os.path.join(tmp, 'single.db')), args.accounts,
+                                  args.single_orders, 1, rng)
+        print(f"one commit per order:        {args.single_orders / elapsed:>10,.0f} orders/s ({filled:,} filled)")
+
+        path = os.path.join(tmp, 'accounts.db')
+        exchange, filled, elapsed = fill(AccountStore(path, snapshot_every=args.snapshot_every),
+                                         args.accounts, args.orders, args.batch_size, rng)
+        print(f"batches of {args.batch_size:,}, one commit each: {args.orders / elapsed:>10,.0f} orders/s "
+              f"({filled:,} transactions saved, {os.path.getsize(path) / 1e6:.0f} MB + WAL)")
+        expected = exchange.portfolio_values()
+        exchange.store.close()
+
+        for label, snapshot_every in (('snapshot + log tail', args.snapshot_every), ('full log replay', 10 ** 12)):
+            start = time.perf_counter()
+            store = AccountStore(path, snapshot_every=snapshot_every)
+            if snapshot_every > args.orders:
+                # Recover as if no snapshot had ever been taken
+                store._db.execute("UPDATE accounts SET snapshot_seq = 0, balance = 0, holdings = '{}'")
+            restored = Exchange(store=store)
+            elapsed = time.perf_counter() - start
+            assert np.allclose(restored.portfolio_values(), expected)
+            print(f"recovery, {label + ':':<20} {elapsed:>8.2f}s for {len(restored):,} accounts")
+            store.close()
+
+        store = AccountStore(path)
+        restored = Exchange(store=store)
+        account = restored.account('user0')
+        start = time.perf_counter()
+        count = len(list(account.list_transactions()))
+        print(f"first history read of one account: {(time.perf_counter() - start) * 1000:.1f}ms for {count:,} rows")
+
+
+if __name__ == '__main__':
+    main()
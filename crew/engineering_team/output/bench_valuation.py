@@ -0,0 +1,122 @@
+# Point-in-time P&L and P&L curves from the MarkToMarket prefix arrays against
+# replaying the transactions by hand, on an account with a long history marked
+# to a replayed random-walk price feed.
+#
+#   python bench_valuation.py
+#   python bench_valuation.py --transactions 5000000 --points 1000
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from accounts import Account
+from ledger import KIND_CODES, ROW
+from prices import ReplayPriceFeed
+
+SYMBOLS = ['AAPL', 'TSLA', 'GOOGL']
+
+
+def replay_pnl(account, feed, when):
+    """What answering "P&L at time t" took before: walk the transactions up to t."""
+    cash, contributions, positions = 0.0, 0.0, {}
+    cutoff = when.timestamp()
+    for tx in account.list_transactions():
+        if tx['timestamp'].timestamp() > cutoff:
+            break
+        cash = tx['balance']
+        if tx['type'] in ('ACCOUNT_CREATION', 'DEPOSIT'):
+            contributions += tx['amount']
+        elif tx['type'] == 'WITHDRAWAL':
+            contributions -= tx['amount']
+        elif tx['type'] == 'BUY':
+            positions[tx['symbol']] = positions.get(tx['symbol'], 0) + tx['quantity']
+        else:
+            positions[tx['symbol']] -= tx['quantity']
+    prices = dict(zip(feed.tick_symbols, feed.prices_at(cutoff)))
+    return cash + sum(prices[symbol] * quantity for symbol, quantity in positions.items()) - contributions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--replayed', type=int, default=100_000)
+    parser.add_argument('--points', type=int, default=500)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+    start = datetime.datetime(2024, 1, 2, 9, 30).timestamp()
+    times = start + np.arange(args.transactions) * 0.01
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ticks.parquet')
+        tick_times = np.repeat(start + np.arange(0, args.transactions * 0.01 + 1, 1.0), len(SYMBOLS))
+        walk = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(tick_times))))
+        pd.DataFrame({
+            'timestamp': pd.to_datetime(tick_times, unit='s'),
+            'symbol': SYMBOLS * (len(tick_times) // len(SYMBOLS)),
+            'price': walk.round(2),
+        }).to_parquet(path)
+        feed = ReplayPriceFeed(path, clock=lambda: times[-1])
+
+    # A long trading history written straight into the ledger: alternating buys and sells of one share
+    account = Account(price_feed=feed)
+    account.create_account('bench', 1e9)
+    account.transactions.rows['ts'][:] = times[0]
+    for symbol in SYMBOLS:
+        account.transactions.symbol_id(symbol)
+    count = args.transactions - 1
+    symbols = np.arange(count) // 2 % len(SYMBOLS)
+    rows = np.zeros(count, dtype=ROW)
+    rows['kind'] = np.where(np.arange(count) % 2 == 0, KIND_CODES['BUY'], KIND_CODES['SELL'])
+    rows['symbol'] = symbols
+    rows['quantity'] = 1
+    rows['price'] = feed.history(times[1:], SYMBOLS)[np.arange(count), symbols]
+    rows['amount'] = rows['price']
+    rows['balance'] = 1e9 + np.cumsum(np.where(rows['kind'] == KIND_CODES['BUY'], -rows['amount'], rows['amount']))
+    rows['ts'] = times[1:]
+    account.transactions.extend(rows)
+
+    valuation = account.mark_to_market()
+    began = time.perf_counter()
+    valuation.update()
+    build = time.perf_counter() - began
+    print(f"{args.transactions:,} transactions, prefix arrays built in {build:.2f}s "
+          f"({args.transactions / build:,.0f} rows/s)")
+
+    moments = [datetime.datetime.fromtimestamp(t) for t in rng.uniform(times[0], times[-1], 200)]
+    began = time.perf_counter()
+    states = [valuation.at(moment) for moment in moments]
+    point = (time.perf_counter() - began) / len(moments)
+
+    early = [moment for moment in moments if moment.timestamp() < times[min(args.replayed, args.transactions) - 1]][:5]
+    began = time.perf_counter()
+    replayed = [replay_pnl(account, feed, moment) for moment in early]
+    replay = (time.perf_counter() - began) / max(len(early), 1)
+    for moment, pnl in zip(early, replayed):
+        assert abs(valuation.at(moment)['pnl'] - pnl) < 1e-4 * max(1.0, abs(pnl)), (moment, pnl)
+
+    began = time.perf_counter()
+    curve = valuation.curve(points=args.points)
+    curve_time = time.perf_counter() - began
+
+    account.buy_shares('AAPL', 1)
+    valuation.update()  # the first update after the bulk build grows the arrays once
+    began = time.perf_counter()
+    for _ in range(100):
+        account.buy_shares('AAPL', 1)
+        valuation.update()
+    incremental = (time.perf_counter() - began) / 100
+
+    print(f"P&L at t: {point * 1e6:.1f}us (replaying the transactions: {replay * 1000:.1f}ms "
+          f"for a t within the first {args.replayed:,})")
+    print(f"{args.points}-point P&L / drawdown curve: {curve_time * 1000:.2f}ms")
+    print(f"one new trade + update(): {incremental * 1e6:.1f}us")
+    print(f"max drawdown ${states[-1]['max_drawdown']:,.2f}, final P&L ${curve['pnl'].iloc[-1]:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
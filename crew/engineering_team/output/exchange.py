@@ -0,0 +1,418 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, Sequence
+
+import numpy as np
+
+from accounts import Account
+from ledger import KIND_CODES, ROW
+from prices import PriceFeed, price_feed
+from storage import AccountStore
+
+BUY = KIND_CODES['BUY']
+SELL = KIND_CODES['SELL']
+SIDES = {'BUY': BUY, 'SELL': SELL}
+
+SYMBOLS = ['AAPL', 'TSLA', 'GOOGL']
+# Cash checks are done in integer micro-dollars so the running balances are exact
+MICROS = 1_000_000
+# Vectorized passes over the accounts with rejected orders before settling the rest order by order
+VECTOR_PASSES = 4
+
+
+def grouped_cumsum(values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Running sum of `values` that restarts wherever the sorted `keys` change."""
+    if not len(values):
+        return values
+    total = np.cumsum(values)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    lengths = np.diff(np.r_[starts, len(values)])
+    return total - np.repeat(total[starts] - values[starts], lengths)
+
+
+class Exchange:
+    """Many accounts trading against one price vector.
+
+    Cash and positions of every account are kept in NumPy arrays, so a batch of
+    orders is checked and applied in a few array passes instead of one
+    Account.buy_shares()/sell_shares() call per order. Orders keep the same
+    semantics as the Account methods applied in order: an order that the cash or
+    shares left by the account's earlier orders in the batch can't cover is
+    rejected, and later orders are checked without it.
+
+    Each account is still an Account with its own ledger, which gets one slice of
+    the batch's rows; its balance and holdings are refreshed when read (account()).
+    All writes go through one lock. submit() queues orders for a single writer
+    thread that drains the queue into batches, so concurrent callers (e.g. Gradio
+    sessions) get batched execution without touching the arrays themselves.
+    """
+
+    def __init__(self, symbols: Sequence[str] = SYMBOLS, max_batch: int = 10_000,
+                 capacity: int = 1024, price_feed: PriceFeed = price_feed,
+                 store: Optional[AccountStore] = None) -> None:
+        """Create an exchange, with the accounts already in `store` if one is given.
+
+        Args:
+            symbols: The tradable stock symbols.
+            max_batch: Most orders the writer thread executes in one batch.
+            capacity: Number of accounts to allocate arrays for up front; they double as they fill.
+            price_feed: Source of the price vector, read once per batch.
+            store: Where accounts and transactions are persisted; every batch is saved in one commit.
+        """
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.price_feed = price_feed
+        self.accounts: list[Account] = []
+        self.account_ids: dict[str, int] = {}
+        self.cash = np.zeros(capacity)
+        self.positions = np.zeros((capacity, len(self.symbols)), dtype=np.int64)
+        self._stale = np.zeros(capacity, dtype=bool)
+        self.max_batch = max_batch
+        self.lock = threading.RLock()
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.store = store
+        if store is not None:
+            for account in store.load_all(self.price_feed):
+                self._register(account)
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def open_account(self, user_id: str, initial_deposit: float, snapshot_path: Optional[str] = None) -> int:
+        """Create an account and return its index.
+
+        Args:
+            user_id: The unique identifier for the user.
+            initial_deposit: The amount of money to initially deposit into the account.
+            snapshot_path: If set, the account's ledger is snapshotted to this path.
+
+        Returns:
+            int: The account index, usable in execute().
+
+        Raises:
+            ValueError: If the user ID is taken, or the Account rejects the user ID or deposit.
+        """
+        with self.lock:
+            if user_id in self.account_ids:
+                raise ValueError(f"User ID {user_id} is already taken")
+            account = Account(snapshot_path=snapshot_path, price_feed=self.price_feed)
+            account.create_account(user_id, initial_deposit)
+            # The account only joins the exchange once the store has it
+            if self.store is not None:
+                self.store.save([account])
+            return self._register(account)
+
+    def _register(self, account: Account) -> int:
+        """Add an account's cash and holdings to the arrays and return its index."""
+        # Batches write symbol ids by exchange position, so every ledger must intern the
+        # exchange's symbols first: fresh ledgers do, and stored ones load lazily after this
+        if account.transactions.symbols[:len(self.symbols)] != self.symbols:
+            for symbol in self.symbols:
+                account.transactions.symbol_id(symbol)
+            if account.transactions.symbols[:len(self.symbols)] != self.symbols:
+                raise ValueError(f"Ledger of {account.user_id} already uses other symbol ids")
+        index = len(self.accounts)
+        if index == len(self.cash):
+            self.cash = np.resize(self.cash, index * 2)
+            self.positions = np.vstack([self.positions, np.zeros_like(self.positions)])
+            self._stale = np.resize(self._stale, index * 2)
+        self.cash[index] = account.balance
+        self.positions[index] = 0
+        for symbol, quantity in account.holdings.items():
+            if symbol not in self.symbol_ids:
+                raise ValueError(f"Account {account.user_id} holds {symbol}, which is not traded here")
+            self.positions[index, self.symbol_ids[symbol]] = quantity
+        self._stale[index] = False
+        self.accounts.append(account)
+        self.account_ids[account.user_id] = index
+        return index
+
+    def account(self, user_id: str) -> Account:
+        """The Account of `user_id`, with its balance and holdings brought up to date.
+
+        Batches only write the arrays and ledgers; an Account's balance and
+        holdings are refreshed when it is fetched here. Read it freely, but trade
+        and move funds through the exchange.
+
+        Raises:
+            KeyError: If there is no account for the user.
+        """
+        with self.lock:
+            index = self.account_ids[user_id]
+            if self._stale[index]:
+                self._sync(index)
+            return self.accounts[index]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Current price of each of `symbols`, from the feed's cached snapshot."""
+        return self.price_feed.get_prices(self.symbols)
+
+    def portfolio_values(self) -> np.ndarray:
+        """Cash plus market value of every account, in account index order."""
+        with self.lock:
+            count = len(self.accounts)
+            return self.cash[:count] + self.positions[:count] @ self.prices
+
+    def deposit_funds(self, user_id: str, amount: float) -> None:
+        """Deposit funds into an account, see Account.deposit_funds()."""
+        with self.lock:
+            index = self.account_ids[user_id]
+            if amount <= 0:
+                raise ValueError("Deposit amount must be positive")
+            self._move_funds(index, 'DEPOSIT', amount)
+
+    def withdraw_funds(self, user_id: str, amount: float) -> bool:
+        """Withdraw funds from an account, see Account.withdraw_funds()."""
+        with self.lock:
+            index = self.account_ids[user_id]
+            if amount <= 0:
+                raise ValueError("Withdrawal amount must be positive")
+            if amount > self.cash[index]:
+                return False
+            self._move_funds(index, 'WITHDRAWAL', amount)
+            return True
+
+    def _move_funds(self, index: int, kind: str, amount: float) -> None:
+        """Persist a DEPOSIT or WITHDRAWAL row, then apply it to the account, like _apply()."""
+        account = self.accounts[index]
+        if self._stale[index]:
+            self._sync(index)
+        balance = account.balance + amount if kind == 'DEPOSIT' else account.balance - amount
+        row = np.array([(KIND_CODES[kind], -1, 0, 0.0, amount, balance, time.time())], dtype=ROW)
+        if self.store is not None:
+            self.store.save([account], {account.user_id: row})
+        account.balance = balance
+        self.cash[index] = balance
+        try:
+            account._record_many(row)
+        except OSError as e:
+            print(f"Ledger snapshot of {account.user_id} failed: {e}")
+
+    def execute(self, accounts: np.ndarray, sides: np.ndarray, symbols: np.ndarray,
+                quantities: np.ndarray) -> np.ndarray:
+        """Execute a batch of orders at the current prices.
+
+        Orders on a symbol the feed has no valid price for are rejected, and the
+        rest of the batch is executed without them.
+
+        Args:
+            accounts: Account index of each order, as returned by open_account().
+            sides: BUY or SELL per order.
+            symbols: Index into `self.symbols` per order.
+            quantities: Number of shares per order.
+
+        Returns:
+            np.ndarray: Boolean array, True for the orders that were filled.
+
+        Raises:
+            ValueError: If any quantity is not positive, or any account, side or symbol is out of range.
+        """
+        return self._execute(accounts, sides, symbols, quantities)[0]
+
+    def _execute(self, accounts, sides, symbols, quantities) -> tuple[np.ndarray, np.ndarray]:
+        """execute(), also returning which orders had a valid price."""
+        accounts = np.asarray(accounts, dtype=np.intp)
+        sides = np.asarray(sides, dtype=np.uint8)
+        symbols = np.asarray(symbols, dtype=np.intp)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if (quantities <= 0).any():
+            raise ValueError("Quantity must be positive")
+        # Checked before anything is priced or saved: a bad index would otherwise wrap around or
+        # reach an unused slot, and an unknown side would be applied as a sell
+        if ((accounts < 0) | (accounts >= len(self.accounts))).any():
+            raise ValueError("Account index out of range")
+        if ((symbols < 0) | (symbols >= len(self.symbols))).any():
+            raise ValueError("Symbol index out of range")
+        if not np.isin(sides, (BUY, SELL)).all():
+            raise ValueError("Side must be BUY or SELL")
+        with self.lock:
+            prices = self.prices[symbols]
+            priced = np.isfinite(prices) & (prices > 0.0)
+            prices = np.where(priced, prices, 0.0)
+            buys = sides == BUY
+            totals = prices * quantities
+            cash_delta = np.where(buys, -np.round(totals * MICROS), np.round(totals * MICROS)).astype(np.int64)
+            share_delta = np.where(buys, quantities, -quantities)
+
+            # Orders grouped by account, and by account and symbol, keeping submission order within a group
+            by_account = np.argsort(accounts, kind='stable')
+            position_keys = accounts * len(self.symbols) + symbols
+            by_position = np.argsort(position_keys, kind='stable')
+            start_cash = np.round(self.cash[accounts] * MICROS).astype(np.int64)
+            start_shares = self.positions[accounts, symbols]
+
+            filled = priced.copy()
+            bad = np.zeros(len(accounts), dtype=bool)
+            check_cash, check_shares = by_account, by_position
+            passes = 0
+            while len(check_cash):
+                cash = start_cash[check_cash] + grouped_cumsum(
+                    np.where(filled[check_cash], cash_delta[check_cash], 0), accounts[check_cash])
+                shares = start_shares[check_shares] + grouped_cumsum(
+                    np.where(filled[check_shares], share_delta[check_shares], 0), position_keys[check_shares])
+                bad[check_cash] = cash < 0
+                bad[check_shares] |= shares < 0
+                failed = check_cash[bad[check_cash] & filled[check_cash]]
+                if not len(failed):
+                    break
+                # Only each account's first failing order is certainly unfillable; the ones
+                # after it are rechecked, in the next pass over just those accounts, once it
+                # no longer spends the cash or shares
+                failed_accounts, first = np.unique(accounts[failed], return_index=True)
+                filled[failed[first]] = False
+                retry = np.zeros(len(self.accounts), dtype=bool)
+                retry[failed_accounts] = True
+                check_cash = check_cash[retry[accounts[check_cash]]]
+                check_shares = check_shares[retry[accounts[check_shares]]]
+                passes += 1
+                if passes == VECTOR_PASSES:
+                    # Each pass drops one order per account, so an account with many unaffordable
+                    # orders would take a pass per order; settle what is left in one sequential scan
+                    self._settle(check_cash, accounts, position_keys, cash_delta, share_delta,
+                                 start_cash, start_shares, priced, filled)
+                    break
+
+            balances = start_cash[by_account] + grouped_cumsum(
+                np.where(filled[by_account], cash_delta[by_account], 0), accounts[by_account])
+            self._apply(accounts, sides, symbols, quantities, prices, totals, filled,
+                        by_account, balances / MICROS)
+            return filled, priced
+
+    @staticmethod
+    def _settle(orders, accounts, position_keys, cash_delta, share_delta, start_cash, start_shares,
+                priced, filled) -> None:
+        """Decide `orders` (grouped by account, in submission order) one at a time, in place in `filled`."""
+        cash: dict[int, int] = {}
+        shares: dict[int, int] = {}
+        for i, account, key, spend, move, priced_order in zip(
+                orders.tolist(), accounts[orders].tolist(), position_keys[orders].tolist(),
+                cash_delta[orders].tolist(), share_delta[orders].tolist(), priced[orders].tolist()):
+            balance = cash.get(account, start_cash[i])
+            held = shares.get(key, start_shares[i])
+            fills = priced_order and balance + spend >= 0 and held + move >= 0
+            filled[i] = fills
+            if fills:
+                cash[account] = balance + spend
+                shares[key] = held + move
+
+    def _apply(self, accounts, sides, symbols, quantities, prices, totals, filled, by_account, balances) -> None:
+        """Persist the filled orders, then move them into the cash and position arrays and the ledgers.
+
+        Nothing in memory changes until the store has committed the batch, so if
+        saving raises, none of the orders went through.
+        """
+        ordered = by_account[filled[by_account]]
+        if not len(ordered):
+            return
+
+        # Ledger rows for the whole batch, grouped by account; symbol ids match because
+        # open_account() interned the exchange's symbols first in every ledger
+        rows = np.empty(len(ordered), dtype=ROW)
+        rows['kind'] = sides[ordered]
+        rows['symbol'] = symbols[ordered]
+        rows['quantity'] = quantities[ordered]
+        rows['price'] = prices[ordered]
+        rows['amount'] = totals[ordered]
+        rows['balance'] = balances[filled[by_account]]
+        rows['ts'] = time.time()
+        keys = accounts[ordered]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(ordered)]
+        slices = [(self.accounts[index], index, start, end)
+                  for index, start, end in zip(keys[starts].tolist(), starts.tolist(), ends.tolist())]
+        if self.store is not None:
+            self.store.save((account for account, *_ in slices),
+                            {account.user_id: rows[start:end] for account, _, start, end in slices})
+
+        count = len(self.accounts)
+        signed_shares = np.where(sides == BUY, quantities, -quantities)
+        self.positions[:count] += np.bincount(
+            accounts[filled] * len(self.symbols) + symbols[filled],
+            weights=signed_shares[filled], minlength=count * len(self.symbols),
+        ).astype(np.int64).reshape(count, len(self.symbols))
+        # Each account's cash is the running balance after its last filled order
+        self.cash[keys[ends - 1]] = rows['balance'][ends - 1]
+        self._stale[keys[starts]] = True
+        for account, index, start, end in slices:
+            if account.snapshot_path:
+                # The snapshot taken by _record_many() must see the new balance and holdings
+                self._sync(index)
+            try:
+                account._record_many(rows[start:end])
+            except OSError as e:
+                # The orders are filled and stored; only the account's optional ledger snapshot failed
+                print(f"Ledger snapshot of {account.user_id} failed: {e}")
+
+    def _sync(self, index: int) -> None:
+        """Copy an account's cash and positions from the arrays into its Account."""
+        account = self.accounts[index]
+        account.balance = float(self.cash[index])
+        # Updated in place, so views from Account.get_holdings() keep following the account
+        account.holdings.clear()
+        account.holdings.update({self.symbols[j]: int(self.positions[index, j])
+                                 for j in np.flatnonzero(self.positions[index])})
+        self._stale[index] = False
+
+    def submit(self, user_id: str, side: str, symbol: str, quantity: int) -> Future:
+        """Queue one order for the writer thread.
+
+        Args:
+            user_id: The account placing the order.
+            side: 'BUY' or 'SELL'.
+            symbol: Stock symbol of the shares.
+            quantity: Number of shares.
+
+        Returns:
+            Future: Resolves to True if the order was filled, False if cash or shares were insufficient.
+
+        Raises:
+            ValueError: If the quantity is not positive or the symbol is invalid.
+            KeyError: If there is no account for the user.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if symbol not in self.symbol_ids:
+            raise ValueError(f"Invalid stock symbol: {symbol}")
+        future: Future = Future()
+        self._queue.put((future, self.account_ids[user_id], SIDES[side], self.symbol_ids[symbol], quantity))
+        if self._writer is None:
+            with self.lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write, name='exchange-writer', daemon=True)
+                    self._writer.start()
+        return future
+
+    def buy_shares(self, user_id: str, symbol: str, quantity: int) -> bool:
+        """Buy shares through the writer thread, see Account.buy_shares()."""
+        return self.submit(user_id, 'BUY', symbol, quantity).result()
+
+    def sell_shares(self, user_id: str, symbol: str, quantity: int) -> bool:
+        """Sell shares through the writer thread, see Account.sell_shares()."""
+        return self.submit(user_id, 'SELL', symbol, quantity).result()
+
+    def _write(self) -> None:
+        """Writer thread: execute whatever is queued as one batch, then wait for more."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            futures = [order[0] for order in batch]
+            try:
+                filled, priced = self._execute(*(np.array(column) for column in list(zip(*batch))[1:]))
+            except Exception as e:
+                # Raised before anything was applied, so none of the orders went through
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for order, success, valid in zip(batch, filled.tolist(), priced.tolist()):
+                if valid:
+                    order[0].set_result(success)
+                else:
+                    order[0].set_exception(ValueError(f"Invalid stock symbol: {self.symbols[order[3]]}"))
@@ -0,0 +1,305 @@
+import datetime
+import json
+import os
+import time
+from collections.abc import Mapping
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+KINDS = ['ACCOUNT_CREATION', 'DEPOSIT', 'WITHDRAWAL', 'BUY', 'SELL']
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# The keys each transaction type exposes, matching the dicts Account used to store
+FIELDS = {
+    'ACCOUNT_CREATION': ('type', 'user_id', 'amount', 'balance', 'timestamp'),
+    'DEPOSIT': ('type', 'amount', 'balance', 'timestamp'),
+    'WITHDRAWAL': ('type', 'amount', 'balance', 'timestamp'),
+    'BUY': ('type', 'symbol', 'quantity', 'price', 'total', 'balance', 'timestamp'),
+    'SELL': ('type', 'symbol', 'quantity', 'price', 'total', 'balance', 'timestamp'),
+}
+
+# One packed row per transaction: 43 bytes instead of a dict with a datetime per trade.
+# 'amount' holds the deposit / withdrawal amount or the trade total.
+ROW = np.dtype([
+    ('kind', 'u1'),
+    ('symbol', 'i2'),
+    ('quantity', 'i8'),
+    ('price', 'f8'),
+    ('amount', 'f8'),
+    ('balance', 'f8'),
+    ('ts', 'f8'),
+])
+
+
+class Transaction(Mapping):
+    """A read-only, dict-like view of one ledger row.
+
+    Views hold only the ledger and a row index, so iterating a ledger creates no
+    copies of the data. Values are read from the row on access, so existing code
+    that does `tx['timestamp'].strftime(...)` or `tx['type'] == 'BUY'` keeps working.
+    """
+
+    __slots__ = ('_ledger', '_index')
+
+    def __init__(self, ledger: 'Ledger', index: int) -> None:
+        self._ledger = ledger
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    def __getitem__(self, key: str):
+        row = self._ledger.rows[self._index]
+        kind = KINDS[row['kind']]
+        if key not in FIELDS[kind]:
+            raise KeyError(key)
+        if key == 'type':
+            return kind
+        if key == 'timestamp':
+            return datetime.datetime.fromtimestamp(float(row['ts']))
+        if key == 'user_id':
+            return self._ledger.user_id
+        if key == 'symbol':
+            return self._ledger.symbols[row['symbol']]
+        if key == 'quantity':
+            return int(row['quantity'])
+        if key == 'total':
+            return float(row['amount'])
+        return float(row[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS[KINDS[self._ledger.rows[self._index]['kind']]])
+
+    def __len__(self) -> int:
+        return len(FIELDS[KINDS[self._ledger.rows[self._index]['kind']]])
+
+    def __repr__(self) -> str:
+        return f"Transaction({dict(self)!r})"
+
+
+class Ledger:
+    """An append-only transaction log stored in a growable structured NumPy array.
+
+    Rows are never modified once written, timestamps never go backwards, and
+    symbols are interned to small integers. Range queries by position or by time
+    therefore return views of the array (time ranges are found by binary search),
+    and snapshot() only has to write the rows added since the previous snapshot.
+    """
+
+    def __init__(self, user_id: Optional[str] = None, capacity: int = 1024) -> None:
+        """Create an empty ledger.
+
+        Args:
+            user_id: The owner of the ledger, reported by ACCOUNT_CREATION rows.
+            capacity: Number of rows to allocate up front; the array doubles as it fills.
+        """
+        self.user_id = user_id
+        self._rows = np.zeros(capacity, dtype=ROW)
+        self._size = 0
+        self._persisted = 0
+        self._last_ts = float('-inf')
+        self.symbols: list[str] = []
+        self._symbol_ids: dict[str, int] = {}
+        self._loader: Optional[Callable[['Ledger'], np.ndarray]] = None
+
+    @classmethod
+    def lazy(cls, user_id: Optional[str], count: int, loader: Callable[['Ledger'], np.ndarray]) -> 'Ledger':
+        """A ledger of `count` stored rows that are only read when first needed.
+
+        len() is known up front; anything that touches the rows (including
+        appending) calls `loader` once with the ledger, which interns the
+        symbols it needs and returns the ROW array.
+        """
+        ledger = cls(user_id)
+        ledger._size = count
+        ledger._loader = loader
+        return ledger
+
+    def _load(self) -> None:
+        if self._loader is None:
+            return
+        loader, self._loader = self._loader, None
+        rows = loader(self)
+        if len(rows) != self._size:
+            raise ValueError(f"Ledger of {self.user_id} expected {self._size} stored rows, loaded {len(rows)}")
+        self._rows = np.zeros(max(1024, self._size * 2), dtype=ROW)
+        self._rows[:self._size] = rows
+        if self._size:
+            self._last_ts = float(rows[-1]['ts'])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return self.iter()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Transaction(self, i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("ledger index out of range")
+        return Transaction(self, index)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The filled part of the array (a view, not a copy)."""
+        self._load()
+        return self._rows[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return self._size * ROW.itemsize
+
+    def symbol_id(self, symbol: str) -> int:
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self._symbol_ids[symbol]
+
+    def append(self, kind: str, amount: float, balance: float, symbol: Optional[str] = None,
+               quantity: int = 0, price: float = 0.0, ts: Optional[float] = None) -> int:
+        """Append one transaction and return its index.
+
+        Args:
+            kind: One of KINDS.
+            amount: The deposit or withdrawal amount, or the trade total.
+            balance: The cash balance after the transaction.
+            symbol: Stock symbol for trades.
+            quantity: Number of shares for trades.
+            price: Share price for trades.
+            ts: Unix timestamp; defaults to now, and is clamped so it never precedes the previous row.
+
+        Returns:
+            int: Index of the new row.
+        """
+        self._load()
+        if self._size == len(self._rows):
+            grown = np.zeros(len(self._rows) * 2, dtype=ROW)
+            grown[:self._size] = self._rows[:self._size]
+            self._rows = grown
+        ts = max(time.time() if ts is None else ts, self._last_ts)
+        self._last_ts = ts
+        self._rows[self._size] = (
+            KIND_CODES[kind], -1 if symbol is None else self.symbol_id(symbol), quantity, price, amount, balance, ts
+        )
+        self._size += 1
+        return self._size - 1
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append a batch of ROW records in one array write.
+
+        The 'symbol' field must hold ids this ledger already interned with
+        symbol_id(), and the batch's timestamps must not precede the last row.
+
+        Args:
+            rows: Structured array of dtype ROW.
+        """
+        self._load()
+        count = len(rows)
+        if not count:
+            return
+        if self._size + count > len(self._rows):
+            grown = np.zeros(max(len(self._rows) * 2, self._size + count), dtype=ROW)
+            grown[:self._size] = self._rows[:self._size]
+            self._rows = grown
+        self._rows[self._size:self._size + count] = rows
+        self._size += count
+        self._last_ts = max(self._last_ts, float(rows[-1]['ts']))
+
+    def iter(self, cursor: int = 0, stop: Optional[int] = None) -> Iterator[Transaction]:
+        """Iterate transactions from position `cursor` up to (not including) `stop`.
+
+        Args:
+            cursor: Position to start from; pass the last seen index + 1 to resume.
+            stop: Position to stop at; defaults to the current end of the ledger.
+
+        Returns:
+            Iterator[Transaction]: Views of the rows, created one at a time.
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        return (Transaction(self, index) for index in range(cursor, stop))
+
+    def span(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None) -> tuple[int, int]:
+        """Positions [first, last) of the transactions with start <= timestamp < end.
+
+        Args:
+            start: Earliest timestamp to include, or None for the beginning.
+            end: Timestamp to stop before, or None for the end.
+
+        Returns:
+            tuple[int, int]: Positions suitable for iter() or rows slicing.
+        """
+        ts = self.rows['ts']
+        first = 0 if start is None else int(np.searchsorted(ts, start.timestamp(), side='left'))
+        last = self._size if end is None else int(np.searchsorted(ts, end.timestamp(), side='left'))
+        return first, max(first, last)
+
+    def between(self, start: Optional[datetime.datetime] = None,
+                end: Optional[datetime.datetime] = None) -> Iterator[Transaction]:
+        """Iterate the transactions with start <= timestamp < end."""
+        return self.iter(*self.span(start, end))
+
+    def snapshot(self, path: str, state: Optional[dict] = None) -> None:
+        """Persist the ledger to `path`.rows and `path`.json.
+
+        Rows added since the last snapshot are appended to the rows file, then the
+        header (row count, symbols, and any extra `state`) is replaced atomically.
+        Bytes past the recorded row count, left by a crash between the two steps,
+        are ignored by load().
+
+        Args:
+            path: Base path of the snapshot files.
+            state: Extra JSON-serializable data to store in the header.
+        """
+        self._load()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rows_path = f"{path}.rows"
+        persisted = self._persisted
+        if not os.path.exists(rows_path):
+            persisted = 0
+        with open(rows_path, 'r+b' if persisted else 'wb') as f:
+            # Truncate anything a crashed snapshot wrote past the committed rows
+            f.seek(persisted * ROW.itemsize)
+            f.truncate()
+            f.write(self._rows[persisted:self._size].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        header = {'rows': self._size, 'user_id': self.user_id, 'symbols': self.symbols, 'state': state or {}}
+        tmp = f"{path}.json.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, f"{path}.json")
+        self._persisted = self._size
+
+    @classmethod
+    def load(cls, path: str) -> tuple['Ledger', dict]:
+        """Load a ledger written by snapshot().
+
+        Args:
+            path: Base path of the snapshot files.
+
+        Returns:
+            tuple[Ledger, dict]: The ledger and the extra state stored with it.
+        """
+        with open(f"{path}.json") as f:
+            header = json.load(f)
+        count = header['rows']
+        rows = np.fromfile(f"{path}.rows", dtype=ROW, count=count)
+        if len(rows) < count:
+            raise ValueError(f"Snapshot {path} is missing rows: expected {count}, found {len(rows)}")
+        ledger = cls(header['user_id'], capacity=max(1024, count * 2))
+        ledger._rows[:count] = rows
+        ledger._size = ledger._persisted = count
+        if count:
+            ledger._last_ts = float(rows[count - 1]['ts'])
+        for symbol in header['symbols']:
+            ledger.symbol_id(symbol)
+        return ledger, header['state']
@@ -0,0 +1,187 @@
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# The fixed prices the demo has always used
+DEMO_PRICES = {
+    'AAPL': 150.00,
+    'TSLA': 700.00,
+    'GOOGL': 2800.00,
+}
+# Fewest holdings PriceFeed.value() values with a dot product instead of a plain sum
+VECTOR_MIN = 32
+
+
+class PriceFeed:
+    """Source of current share prices, cached as an in-memory snapshot.
+
+    Subclasses implement fetch(), which returns every symbol's price at once.
+    The snapshot is kept as a symbol index plus a price vector and refreshed
+    when it is older than `ttl` seconds, so lookups between refreshes are a dict
+    hit (get_price) or one array gather (get_prices). Unknown symbols are priced
+    0.0, which Account treats as an invalid symbol.
+    """
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        """
+        Args:
+            ttl: Seconds a snapshot is served before fetch() is called again; math.inf never refreshes.
+        """
+        self.ttl = ttl
+        self.refreshes = 0
+        self._symbols: list[str] = []
+        self._index: dict[str, int] = {}
+        self._prices = np.zeros(0)
+        self._price_map: dict[str, float] = {}
+        self._fetched_at = -math.inf
+        self._lock = threading.Lock()
+
+    def fetch(self) -> dict[str, float]:
+        """Return the current price of every symbol the feed knows."""
+        raise NotImplementedError
+
+    def _check(self) -> None:
+        """Fetch a new snapshot if the cached one is older than the TTL."""
+        if time.monotonic() - self._fetched_at < self.ttl:
+            return
+        with self._lock:
+            if time.monotonic() - self._fetched_at < self.ttl:
+                return
+            prices = dict(self.fetch())
+            if list(prices) != self._symbols:
+                self._symbols = list(prices)
+                self._index = {symbol: i for i, symbol in enumerate(self._symbols)}
+            self._prices = np.fromiter(prices.values(), dtype=float, count=len(prices))
+            self._price_map = prices
+            self._fetched_at = time.monotonic()
+            self.refreshes += 1
+
+    def refresh(self) -> None:
+        """Drop the cached snapshot so the next lookup fetches again."""
+        self._fetched_at = -math.inf
+
+    @property
+    def symbols(self) -> list[str]:
+        self._check()
+        return list(self._symbols)
+
+    def get_price(self, symbol: str) -> float:
+        """Price of one share of `symbol`, or 0.0 if the feed doesn't know it."""
+        self._check()
+        return self._price_map.get(symbol, 0.0)
+
+    def get_prices(self, symbols: Sequence[str]) -> np.ndarray:
+        """Prices of `symbols` as a vector in the same order, 0.0 for unknown symbols."""
+        self._check()
+        index, prices = self._index, self._prices
+        positions = np.fromiter((index.get(symbol, -1) for symbol in symbols), dtype=np.intp, count=len(symbols))
+        return np.where(positions >= 0, prices[positions] if len(prices) else 0.0, 0.0)
+
+    def value(self, holdings: dict[str, int]) -> float:
+        """Market value of `holdings` (symbol to quantity).
+
+        Large books are valued as one dot product of quantities and prices; below
+        VECTOR_MIN holdings building the arrays costs more than it saves.
+        """
+        if len(holdings) < VECTOR_MIN:
+            self._check()
+            prices = self._price_map
+            return float(sum(prices.get(symbol, 0.0) * quantity for symbol, quantity in holdings.items()))
+        quantities = np.fromiter(holdings.values(), dtype=float, count=len(holdings))
+        return float(quantities @ self.get_prices(list(holdings)))
+
+
+class StaticPriceFeed(PriceFeed):
+    """Fixed prices, e.g. the demo prices or a test fixture."""
+
+    def __init__(self, prices: dict[str, float]) -> None:
+        super().__init__(ttl=math.inf)
+        self.prices = dict(prices)
+
+    def fetch(self) -> dict[str, float]:
+        return self.prices
+
+
+class ReplayPriceFeed(PriceFeed):
+    """Replays historical prices from a local CSV or Parquet tick file.
+
+    The file needs `timestamp`, `symbol` and `price` columns, one row per tick.
+    Ticks are sorted once by symbol and time into a single search key, so the
+    prices of every symbol at any moment come from one vectorized binary search
+    (prices_at()), with memory proportional to the number of ticks. The replay
+    clock starts at the first tick when the feed is created and runs `speed`
+    times faster than real time; pass `clock` to drive it yourself instead.
+    """
+
+    def __init__(self, path: str, ttl: float = 1.0, speed: float = 1.0,
+                 clock: Optional[Callable[[], float]] = None) -> None:
+        """
+        Args:
+            path: A .csv or .parquet tick file.
+            ttl: Seconds a snapshot is served before the replay clock is read again.
+            speed: Replay seconds per real second.
+            clock: Returns the current replay time as a Unix timestamp; overrides `speed`.
+        """
+        super().__init__(ttl=ttl)
+        ticks = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+        micros = pd.to_datetime(ticks['timestamp']).to_numpy(dtype='datetime64[us]').astype(np.int64)
+        codes, symbols = pd.factorize(ticks['symbol'], sort=True)
+        self.tick_symbols = [str(symbol) for symbol in symbols]
+        self._codes = {symbol: code for code, symbol in enumerate(self.tick_symbols)}
+        self.start = int(micros.min()) / 1e6
+        self.end = int(micros.max()) / 1e6
+        # Ticks of one symbol are contiguous and in time order under this key
+        self._span = int(micros.max() - micros.min()) + 1
+        self._origin = int(micros.min())
+        keys = codes.astype(np.int64) * self._span + (micros - self._origin)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._tick_prices = ticks['price'].to_numpy(dtype=float)[order]
+        self._first = np.searchsorted(self._keys, np.arange(len(symbols), dtype=np.int64) * self._span)
+        if clock is None:
+            started = time.time()
+            clock = lambda: self.start + (time.time() - started) * speed
+        self.clock = clock
+
+    def prices_at(self, ts: float) -> np.ndarray:
+        """Prices of `tick_symbols` at Unix time `ts`: each symbol's last tick at or before it, else 0.0."""
+        return self.history(np.array([ts]), self.tick_symbols)[0]
+
+    def history(self, times: np.ndarray, symbols: Sequence[str]) -> np.ndarray:
+        """Prices of `symbols` at each of `times`, as a len(times) x len(symbols) matrix.
+
+        Args:
+            times: Unix timestamps.
+            symbols: Symbols to price; ones without ticks are priced 0.0.
+
+        Returns:
+            np.ndarray: Each symbol's last tick at or before each time, else 0.0.
+        """
+        codes = np.array([self._codes.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+        known = np.maximum(codes, 0)
+        offsets = np.clip(np.round(np.asarray(times, dtype=float) * 1e6).astype(np.int64) - self._origin,
+                          -1, self._span - 1)
+        queries = known[None, :] * self._span + offsets[:, None]
+        found = np.searchsorted(self._keys, queries.ravel(), side='right').reshape(queries.shape) - 1
+        valid = (found >= self._first[known][None, :]) & (codes >= 0)[None, :]
+        return np.where(valid, self._tick_prices[np.maximum(found, 0)], 0.0)
+
+    def fetch(self) -> dict[str, float]:
+        return dict(zip(self.tick_symbols, self.prices_at(self.clock()).tolist()))
+
+
+def default_feed() -> PriceFeed:
+    """Replay PRICE_TICKS if it names a tick file, otherwise the fixed demo prices."""
+    path = os.getenv('PRICE_TICKS')
+    if path:
+        return ReplayPriceFeed(path, ttl=float(os.getenv('PRICE_TTL', '1.0')),
+                               speed=float(os.getenv('PRICE_REPLAY_SPEED', '1.0')))
+    return StaticPriceFeed(DEMO_PRICES)
+
+
+price_feed = default_feed()
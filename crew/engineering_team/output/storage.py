@@ -0,0 +1,255 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from accounts import Account
+from ledger import KIND_CODES, ROW, Ledger
+from prices import PriceFeed, price_feed
+
+ACCOUNTS_DB = os.getenv('ACCOUNTS_DB', 'accounts.db')
+# Transactions between state snapshots; recovery replays at most this many rows per account
+SNAPSHOT_EVERY = int(os.getenv('ACCOUNTS_SNAPSHOT_EVERY', '10000'))
+
+BUY = KIND_CODES['BUY']
+SELL = KIND_CODES['SELL']
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS accounts ("
+    "user_id TEXT PRIMARY KEY, initial_deposit REAL NOT NULL, "
+    "snapshot_seq INTEGER NOT NULL, balance REAL NOT NULL, holdings TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS transactions ("
+    "user_id TEXT NOT NULL, seq INTEGER NOT NULL, kind INTEGER NOT NULL, symbol TEXT, "
+    "quantity INTEGER NOT NULL, price REAL NOT NULL, amount REAL NOT NULL, balance REAL NOT NULL, "
+    "ts REAL NOT NULL, PRIMARY KEY (user_id, seq)) WITHOUT ROWID",
+)
+
+
+def replay(balance: float, holdings: dict[str, int], rows: Iterable[tuple]) -> tuple[float, dict[str, int]]:
+    """Apply (kind, symbol, quantity, balance) log rows to a snapshot's balance and holdings."""
+    holdings = dict(holdings)
+    for kind, symbol, quantity, balance in rows:
+        if kind == BUY:
+            holdings[symbol] = holdings.get(symbol, 0) + quantity
+        elif kind == SELL:
+            holdings[symbol] -= quantity
+            if not holdings[symbol]:
+                del holdings[symbol]
+    return balance, holdings
+
+
+def advance(rows: np.ndarray, symbols: list[str], balance: float,
+            holdings: dict[str, int]) -> tuple[float, dict[str, int]]:
+    """Balance and holdings after ROW `rows`, given their values before them."""
+    if not len(rows):
+        return balance, holdings
+    trades = (rows['kind'] == BUY) | (rows['kind'] == SELL)
+    shares = np.where(rows['kind'] == BUY, rows['quantity'], -rows['quantity'])[trades]
+    change = np.bincount(rows['symbol'][trades], weights=shares, minlength=len(symbols))
+    holdings = dict(holdings)
+    for index in np.flatnonzero(change).tolist():
+        symbol = symbols[index]
+        holdings[symbol] = holdings.get(symbol, 0) + int(change[index])
+        if not holdings[symbol]:
+            del holdings[symbol]
+    return float(rows['balance'][-1]), holdings
+
+
+class AccountStore:
+    """Accounts and their transactions persisted in SQLite (WAL mode).
+
+    The transactions table is an append-only log keyed by (user_id, seq), where
+    seq is the row's position in the account's ledger. save() writes every row
+    the given accounts added since they were last saved, for all of them in one
+    executemany and one transaction, so a batch of trades costs one commit.
+    Each account row also carries a snapshot (balance, holdings and the seq it
+    covers), refreshed every SNAPSHOT_EVERY transactions in the same commit.
+
+    load() rebuilds an account from its snapshot plus the log tail after it;
+    the ledger itself is a lazy Ledger that reads the full history only when
+    something first touches it.
+    """
+
+    def __init__(self, path: str = ACCOUNTS_DB, snapshot_every: int = SNAPSHOT_EVERY) -> None:
+        """
+        Args:
+            path: SQLite database file, created if missing.
+            snapshot_every: Transactions between state snapshots of an account.
+        """
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        # Rows of each account already in the log, and the seq its snapshot covers
+        self._saved: dict[str, int] = {}
+        self._snapshots: dict[str, tuple[int, float, dict[str, int]]] = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL keeps every commit across an application crash; only an OS crash can lose the last ones
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def user_ids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT user_id FROM accounts ORDER BY rowid")]
+
+    def save(self, accounts: Iterable[Account], pending: Optional[dict[str, np.ndarray]] = None) -> int:
+        """Write the transactions the accounts added since their last save, in one commit.
+
+        New accounts are inserted; accounts that crossed a multiple of
+        `snapshot_every` transactions get a new snapshot derived from their ledger.
+
+        Args:
+            accounts: Accounts to persist.
+            pending: ROW records per user ID that follow the account's ledger but are
+                not in it yet. They are written as if they were, so a batch can be made
+                durable before it is applied; the caller then appends them to the ledger.
+
+        Returns:
+            int: Number of transaction rows written.
+        """
+        with self._lock:
+            batches, created, snapshots = [], [], []
+            for account in accounts:
+                user_id = account.user_id
+                ledger = account.transactions
+                saved = self._saved.get(user_id)
+                if saved is None:
+                    saved = 0
+                    created.append((user_id, account.initial_deposit, 0, 0.0, '{}'))
+                    self._snapshots[user_id] = (0, 0.0, {})
+                # Only touch the ledger's rows (and so load a lazy one) when it has unsaved rows
+                rows = ledger.rows[saved:] if len(ledger) > saved else np.empty(0, dtype=ROW)
+                if pending and user_id in pending:
+                    rows = np.concatenate([rows, pending[user_id]])
+                if not len(rows):
+                    continue
+                symbols = np.array(ledger.symbols + [None], dtype=object)[rows['symbol']]
+                batches.append((user_id, saved, rows, symbols))
+                if (saved + len(rows)) // self.snapshot_every > saved // self.snapshot_every:
+                    snapshots.append((user_id, ledger, saved, rows))
+            written = sum(len(rows) for _, _, rows, _ in batches)
+            if not created and not written:
+                return 0
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO accounts (user_id, initial_deposit, snapshot_seq, balance, holdings) "
+                    "VALUES (?, ?, ?, ?, ?)", created,
+                )
+                self._db.executemany(
+                    "INSERT INTO transactions (user_id, seq, kind, symbol, quantity, price, amount, balance, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row for user_id, saved, rows, symbols in batches for row in zip(
+                        [user_id] * len(rows), range(saved, saved + len(rows)), rows['kind'].tolist(),
+                        symbols.tolist(), rows['quantity'].tolist(), rows['price'].tolist(),
+                        rows['amount'].tolist(), rows['balance'].tolist(), rows['ts'].tolist(),
+                    )),
+                )
+                new_snapshots = {}
+                for user_id, ledger, saved, rows in snapshots:
+                    seq, balance, holdings = self._snapshots[user_id]
+                    count = saved + len(rows)
+                    if seq < saved:
+                        rows = np.concatenate([ledger.rows[seq:saved], rows])
+                    balance, holdings = advance(rows, ledger.symbols, balance, holdings)
+                    new_snapshots[user_id] = (count, balance, holdings)
+                    self._db.execute(
+                        "UPDATE accounts SET snapshot_seq = ?, balance = ?, holdings = ? WHERE user_id = ?",
+                        (count, balance, json.dumps(holdings), user_id),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                for user_id, *_ in created:
+                    self._snapshots.pop(user_id, None)
+                raise
+            for user_id, saved, rows, _ in batches:
+                self._saved[user_id] = saved + len(rows)
+            for user_id, *_ in created:
+                self._saved.setdefault(user_id, 0)
+            self._snapshots.update(new_snapshots)
+            return written
+
+    def _read_rows(self, user_id: str, ledger: Ledger) -> np.ndarray:
+        """Loader for a lazy ledger: the account's whole log as ROW records."""
+        with self._lock:
+            log = self._db.execute(
+                "SELECT kind, symbol, quantity, price, amount, balance, ts FROM transactions "
+                "WHERE user_id = ? ORDER BY seq", (user_id,),
+            ).fetchall()
+        rows = np.zeros(len(log), dtype=ROW)
+        if not log:
+            return rows
+        kinds, symbols, quantities, prices, amounts, balances, ts = zip(*log)
+        rows['kind'] = kinds
+        rows['symbol'] = [-1 if symbol is None else ledger.symbol_id(symbol) for symbol in symbols]
+        rows['quantity'] = quantities
+        rows['price'] = prices
+        rows['amount'] = amounts
+        rows['balance'] = balances
+        rows['ts'] = ts
+        return rows
+
+    def load(self, user_id: str, price_feed: PriceFeed = price_feed) -> Account:
+        """Rebuild an account from its snapshot and the log tail after it.
+
+        Args:
+            user_id: The account to load.
+            price_feed: Price feed for the restored Account.
+
+        Returns:
+            Account: The account, with a ledger that reads its history on first use.
+
+        Raises:
+            KeyError: If the store has no such account.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT initial_deposit, snapshot_seq, balance, holdings FROM accounts WHERE user_id = ?", (user_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(user_id)
+            tail = self._db.execute(
+                "SELECT kind, symbol, quantity, balance FROM transactions WHERE user_id = ? AND seq >= ? ORDER BY seq",
+                (user_id, row[1]),
+            ).fetchall()
+        return self._restore(user_id, *row, tail, price_feed)
+
+    def _restore(self, user_id: str, initial_deposit: float, seq: int, balance: float, holdings: str,
+                 tail: list[tuple], price_feed: PriceFeed) -> Account:
+        holdings = {symbol: int(quantity) for symbol, quantity in json.loads(holdings).items()}
+        self._snapshots[user_id] = (seq, balance, holdings)
+        balance, holdings = replay(balance, holdings, tail)
+        count = seq + len(tail)
+        self._saved[user_id] = count
+
+        account = Account(price_feed=price_feed)
+        account.user_id = user_id
+        account.initial_deposit = initial_deposit
+        account.balance = balance
+        account.holdings = holdings
+        account.transactions = Ledger.lazy(user_id, count, lambda ledger: self._read_rows(user_id, ledger))
+        return account
+
+    def load_all(self, price_feed: PriceFeed = price_feed) -> list[Account]:
+        """Every stored account, in creation order, see load(); two queries however many accounts."""
+        with self._lock:
+            accounts = self._db.execute(
+                "SELECT user_id, initial_deposit, snapshot_seq, balance, holdings FROM accounts ORDER BY rowid"
+            ).fetchall()
+            tails: dict[str, list[tuple]] = {}
+            for user_id, *row in self._db.execute(
+                "SELECT t.user_id, t.kind, t.symbol, t.quantity, t.balance FROM transactions t "
+                "JOIN accounts a ON a.user_id = t.user_id WHERE t.seq >= a.snapshot_seq ORDER BY t.user_id, t.seq"
+            ):
+                tails.setdefault(user_id, []).append(row)
+        return [self._restore(*account, tails.get(account[0], []), price_feed) for account in accounts]
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from accounts import Account
+from exchange import BUY, SELL, SYMBOLS, Exchange
+from prices import StaticPriceFeed
+from storage import AccountStore
+
+PRICES = {'AAPL': 150.0, 'TSLA': 700.0, 'GOOGL': 2800.0}
+
+
+class TestExchangeBatches(unittest.TestCase):
+    def test_batch_matches_orders_one_by_one(self):
+        feed = StaticPriceFeed(PRICES)
+        rng = np.random.default_rng(11)
+        users = [f"user{i}" for i in range(20)]
+        deposits = rng.integers(1_000, 20_000, len(users)).astype(float)
+        exchange = Exchange(price_feed=feed)
+        reference = {}
+        for user, deposit in zip(users, deposits):
+            exchange.open_account(user, deposit)
+            reference[user] = Account(price_feed=feed)
+            reference[user].create_account(user, deposit)
+
+        for _ in range(5):
+            count = 400
+            accounts = rng.integers(0, len(users), count)
+            sides = np.where(rng.random(count) < 0.6, BUY, SELL).astype(np.uint8)
+            symbols = rng.integers(0, len(SYMBOLS), count)
+            quantities = rng.integers(1, 8, count)
+            filled = exchange.execute(accounts, sides, symbols, quantities)
+            expected = [
+                (reference[users[a]].buy_shares if side == BUY else reference[users[a]].sell_shares)(SYMBOLS[s], int(q))
+                for a, side, s, q in zip(accounts.tolist(), sides.tolist(), symbols.tolist(), quantities.tolist())
+            ]
+            self.assertEqual(filled.tolist(), expected)
+            self.assertFalse(filled.all())
+
+        for user in users:
+            account = exchange.account(user)
+            self.assertAlmostEqual(account.balance, reference[user].balance, places=6)
+            self.assertEqual(account.holdings, reference[user].holdings)
+            self.assertEqual(
+                [(tx['type'], tx.get('symbol'), tx.get('quantity')) for tx in account.list_transactions()],
+                [(tx['type'], tx.get('symbol'), tx.get('quantity')) for tx in reference[user].list_transactions()],
+            )
+            for ours, theirs in zip(account.list_transactions(), reference[user].list_transactions()):
+                self.assertAlmostEqual(ours['balance'], theirs['balance'], places=6)
+
+    def test_many_rejections_on_one_account(self):
+        feed = StaticPriceFeed(PRICES)
+        exchange = Exchange(price_feed=feed)
+        exchange.open_account('alice', 50_000.0)
+        reference = Account(price_feed=feed)
+        reference.create_account('alice', 50_000.0)
+        # Mostly unaffordable GOOGL buys between cheap AAPL trades: far more rejections than vectorized passes
+        rng = np.random.default_rng(3)
+        count = 2_000
+        sides = np.where(rng.random(count) < 0.7, BUY, SELL).astype(np.uint8)
+        symbols = rng.choice([0, 2], count)
+        quantities = np.where(symbols == 2, rng.integers(5, 30, count), rng.integers(1, 4, count))
+        filled = exchange.execute(np.zeros(count, dtype=int), sides, symbols, quantities)
+        expected = [
+            (reference.buy_shares if side == BUY else reference.sell_shares)(SYMBOLS[s], int(q))
+            for side, s, q in zip(sides.tolist(), symbols.tolist(), quantities.tolist())
+        ]
+        self.assertEqual(filled.tolist(), expected)
+        self.assertGreater(expected.count(False), 100)
+        self.assertAlmostEqual(exchange.account('alice').balance, reference.balance, places=6)
+        self.assertEqual(exchange.account('alice').holdings, reference.holdings)
+
+    def test_invalid_orders_are_rejected_up_front(self):
+        exchange = Exchange(price_feed=StaticPriceFeed(PRICES))
+        exchange.open_account('alice', 10_000.0)
+        for accounts, sides, symbols in (([0], [7], [0]), ([0], [BUY], [-1]), ([0], [BUY], [len(SYMBOLS)]),
+                                         ([-1], [BUY], [0]), ([1], [SELL], [0])):
+            with self.assertRaises(ValueError):
+                exchange.execute(accounts, sides, symbols, [1])
+        self.assertEqual(len(exchange.account('alice').transactions), 1)
+        self.assertEqual(exchange.account('alice').balance, 10_000.0)
+
+
+class TestExchangeFailures(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = AccountStore(os.path.join(self.tmp.name, 'accounts.db'))
+        self.exchange = Exchange(price_feed=StaticPriceFeed(PRICES), store=self.store)
+        self.exchange.open_account('alice', 10_000.0)
+        self.exchange.open_account('bob', 10_000.0)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_failed_save_applies_nothing(self):
+        cash = self.exchange.cash.copy()
+        positions = self.exchange.positions.copy()
+        with mock.patch.object(self.store, 'save', side_effect=sqlite3.OperationalError('database is locked')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.exchange.execute([0, 1], [BUY, BUY], [0, 0], [1, 2])
+        np.testing.assert_array_equal(self.exchange.cash, cash)
+        np.testing.assert_array_equal(self.exchange.positions, positions)
+        self.assertEqual(len(self.exchange.account('alice').transactions), 1)
+        self.assertEqual(self.exchange.account('alice').holdings, {})
+        # Nothing was written either, so the next batch saves cleanly
+        self.assertTrue(self.exchange.buy_shares('alice', 'AAPL', 1))
+        reopened = AccountStore(self.store.path)
+        self.assertEqual(reopened.load('alice').holdings, {'AAPL': 1})
+        reopened.close()
+
+    def test_failed_save_moves_no_funds(self):
+        with mock.patch.object(self.store, 'save', side_effect=sqlite3.OperationalError('database is locked')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.exchange.deposit_funds('alice', 500.0)
+            with self.assertRaises(sqlite3.OperationalError):
+                self.exchange.withdraw_funds('bob', 500.0)
+            with self.assertRaises(sqlite3.OperationalError):
+                self.exchange.open_account('carol', 1_000.0)
+        self.assertEqual(self.exchange.cash[:2].tolist(), [10_000.0, 10_000.0])
+        for user in ('alice', 'bob'):
+            self.assertEqual(self.exchange.account(user).balance, 10_000.0)
+            self.assertEqual(len(self.exchange.account(user).transactions), 1)
+        self.assertNotIn('carol', self.exchange.account_ids)
+        self.assertEqual(len(self.exchange), 2)
+        # Nothing was written, so the same moves go through afterwards
+        self.exchange.deposit_funds('alice', 500.0)
+        self.assertTrue(self.exchange.withdraw_funds('bob', 500.0))
+        self.assertFalse(self.exchange.withdraw_funds('bob', 1e6))
+        self.exchange.open_account('carol', 1_000.0)
+        reopened = AccountStore(self.store.path)
+        self.assertEqual([reopened.load(user).balance for user in ('alice', 'bob', 'carol')],
+                         [10_500.0, 9_500.0, 1_000.0])
+        reopened.close()
+
+    def test_holdings_view_follows_trades(self):
+        holdings = self.exchange.account('alice').get_holdings()
+        self.assertTrue(self.exchange.buy_shares('alice', 'AAPL', 3))
+        self.assertTrue(self.exchange.sell_shares('alice', 'AAPL', 1))
+        # Fetching the account refreshes its holdings, and the earlier view with them
+        self.exchange.account('alice')
+        self.assertEqual(dict(holdings), {'AAPL': 2})
+
+    def test_unpriced_symbol_only_rejects_its_orders(self):
+        self.exchange.price_feed = StaticPriceFeed({'AAPL': 150.0, 'TSLA': float('nan'), 'GOOGL': 0.0})
+        filled = self.exchange.execute([0, 0, 1], [BUY, BUY, BUY], [0, 1, 2], [2, 1, 1])
+        self.assertEqual(filled.tolist(), [True, False, False])
+        self.assertEqual(self.exchange.account('alice').holdings, {'AAPL': 2})
+        self.assertEqual(self.exchange.account('alice').balance, 9_700.0)
+        self.assertEqual(self.exchange.account('bob').balance, 10_000.0)
+
+    def test_submit_fails_only_unpriced_orders(self):
+        self.exchange.price_feed = StaticPriceFeed({'AAPL': 150.0, 'TSLA': 0.0, 'GOOGL': 2800.0})
+        good = self.exchange.submit('alice', 'BUY', 'AAPL', 1)
+        bad = self.exchange.submit('bob', 'BUY', 'TSLA', 1)
+        self.assertTrue(good.result(timeout=5))
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        self.assertEqual(self.exchange.account('alice').holdings, {'AAPL': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from ledger import Ledger
+
+T0 = datetime.datetime(2024, 1, 2, 9, 30).timestamp()
+
+
+def at(seconds):
+    return datetime.datetime.fromtimestamp(T0 + seconds)
+
+
+def filled_ledger():
+    ledger = Ledger('alice')
+    ledger.append('ACCOUNT_CREATION', 1000.0, 1000.0, ts=T0)
+    ledger.append('BUY', 300.0, 700.0, symbol='AAPL', quantity=2, price=150.0, ts=T0 + 10)
+    ledger.append('DEPOSIT', 50.0, 750.0, ts=T0 + 20)
+    ledger.append('SELL', 150.0, 900.0, symbol='AAPL', quantity=1, price=150.0, ts=T0 + 30)
+    return ledger
+
+
+class TestLedger(unittest.TestCase):
+    def test_iteration(self):
+        ledger = filled_ledger()
+        self.assertEqual([tx['type'] for tx in ledger], ['ACCOUNT_CREATION', 'BUY', 'DEPOSIT', 'SELL'])
+        self.assertEqual(dict(ledger[1]), {
+            'type': 'BUY', 'symbol': 'AAPL', 'quantity': 2, 'price': 150.0, 'total': 300.0,
+            'balance': 700.0, 'timestamp': at(10),
+        })
+        self.assertEqual(ledger[0]['user_id'], 'alice')
+        self.assertEqual([tx.index for tx in ledger.iter(2)], [2, 3])
+        self.assertEqual([tx.index for tx in ledger.iter(1, 3)], [1, 2])
+        with self.assertRaises(KeyError):
+            ledger[2]['symbol']
+
+    def test_between(self):
+        ledger = filled_ledger()
+        self.assertEqual([tx.index for tx in ledger.between(at(10), at(30))], [1, 2])
+        self.assertEqual([tx.index for tx in ledger.between(at(5))], [1, 2, 3])
+        self.assertEqual([tx.index for tx in ledger.between(end=at(10))], [0])
+        self.assertEqual(list(ledger.between(at(40))), [])
+        self.assertEqual(ledger.span(at(30), at(10)), (3, 3))
+
+    def test_timestamps_never_go_backwards(self):
+        ledger = filled_ledger()
+        ledger.append('DEPOSIT', 1.0, 901.0, ts=T0)
+        self.assertEqual(ledger[-1]['timestamp'], at(30))
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'alice')
+            ledger = filled_ledger()
+            ledger.snapshot(path, {'balance': 900.0})
+            ledger.append('WITHDRAWAL', 100.0, 800.0, ts=T0 + 40)
+            # The second snapshot only appends the new row
+            ledger.snapshot(path, {'balance': 800.0})
+            self.assertEqual(os.path.getsize(f"{path}.rows"), len(ledger) * ledger.rows.itemsize)
+            loaded, state = Ledger.load(path)
+        self.assertEqual(state, {'balance': 800.0})
+        self.assertEqual(loaded.user_id, 'alice')
+        self.assertEqual([dict(tx) for tx in loaded], [dict(tx) for tx in ledger])
+        loaded.append('DEPOSIT', 1.0, 801.0, symbol=None, ts=T0)
+        self.assertEqual(loaded[-1]['timestamp'], at(40))
+
+    def test_lazy_loader(self):
+        source = filled_ledger()
+        calls = []
+
+        def loader(ledger):
+            calls.append(ledger)
+            for symbol in source.symbols:
+                ledger.symbol_id(symbol)
+            return source.rows.copy()
+
+        ledger = Ledger.lazy('alice', len(source), loader)
+        self.assertEqual(len(ledger), 4)
+        self.assertEqual(calls, [])
+        self.assertEqual([dict(tx) for tx in ledger.between(at(10))], [dict(tx) for tx in source.between(at(10))])
+        ledger.append('DEPOSIT', 5.0, 905.0, ts=T0 + 50)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(ledger), 5)
+        self.assertEqual(ledger[3]['symbol'], 'AAPL')
+
+    def test_lazy_loader_row_count_mismatch(self):
+        ledger = Ledger.lazy('alice', 5, lambda _: filled_ledger().rows.copy())
+        with self.assertRaises(ValueError):
+            ledger.rows
+
+
+if __name__ == '__main__':
+    unittest.main()
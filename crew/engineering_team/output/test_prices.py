@@ -0,0 +1,61 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from prices import VECTOR_MIN, PriceFeed, ReplayPriceFeed, StaticPriceFeed
+
+T0 = datetime.datetime(2024, 1, 2, 9, 30).timestamp()
+
+
+class CountingFeed(PriceFeed):
+    def __init__(self, ttl):
+        super().__init__(ttl=ttl)
+        self.prices = {'AAPL': 150.0, 'TSLA': 700.0}
+
+    def fetch(self):
+        return self.prices
+
+
+class TestPriceFeed(unittest.TestCase):
+    def test_snapshot_is_cached_for_the_ttl(self):
+        feed = CountingFeed(ttl=3600)
+        self.assertEqual(feed.get_price('AAPL'), 150.0)
+        feed.prices = {'AAPL': 151.0, 'TSLA': 701.0}
+        self.assertEqual(feed.get_price('AAPL'), 150.0)
+        self.assertEqual(feed.refreshes, 1)
+        feed.refresh()
+        self.assertEqual(feed.get_prices(['TSLA', 'NOPE', 'AAPL']).tolist(), [701.0, 0.0, 151.0])
+        self.assertEqual(feed.refreshes, 2)
+
+    def test_value_small_and_large_books(self):
+        prices = {f"S{i}": float(i + 1) for i in range(VECTOR_MIN * 2)}
+        feed = StaticPriceFeed(prices)
+        small = {'S0': 3, 'S1': 2, 'NOPE': 5}
+        self.assertEqual(feed.value(small), 3 * 1.0 + 2 * 2.0)
+        large = {symbol: 2 for symbol in prices}
+        self.assertAlmostEqual(feed.value(large), 2 * sum(prices.values()))
+
+    def test_replay_prices(self):
+        ticks = pd.DataFrame({
+            'timestamp': pd.to_datetime([T0, T0, T0 + 10, T0 + 20], unit='s'),
+            'symbol': ['AAPL', 'TSLA', 'AAPL', 'TSLA'],
+            'price': [100.0, 200.0, 110.0, 190.0],
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ticks.parquet')
+            ticks.to_parquet(path)
+            now = [T0 + 15]
+            feed = ReplayPriceFeed(path, ttl=0, clock=lambda: now[0])
+        self.assertEqual(feed.get_prices(['AAPL', 'TSLA']).tolist(), [110.0, 200.0])
+        now[0] = T0 + 25
+        self.assertEqual(feed.get_price('TSLA'), 190.0)
+        history = feed.history(np.array([T0 - 1, T0, T0 + 12]), ['AAPL', 'TSLA', 'NOPE'])
+        np.testing.assert_array_equal(history, [[0.0, 0.0, 0.0], [100.0, 200.0, 0.0], [110.0, 200.0, 0.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from exchange import BUY, SELL, SYMBOLS, Exchange
+from prices import StaticPriceFeed
+from storage import AccountStore
+
+FEED = StaticPriceFeed({'AAPL': 150.0, 'TSLA': 700.0, 'GOOGL': 2800.0})
+
+
+def state(exchange):
+    """Balance, holdings and transaction list of every account."""
+    result = {}
+    for user_id in exchange.account_ids:
+        account = exchange.account(user_id)
+        result[user_id] = (account.balance, dict(account.holdings),
+                           [dict(tx) for tx in account.list_transactions()])
+    return result
+
+
+class TestAccountStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'accounts.db')
+        self.rng = np.random.default_rng(5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def trade(self, exchange, count):
+        exchange.execute(
+            self.rng.integers(0, len(exchange), count),
+            np.where(self.rng.random(count) < 0.6, BUY, SELL).astype(np.uint8),
+            self.rng.integers(0, len(SYMBOLS), count),
+            self.rng.integers(1, 5, count),
+        )
+
+    def restart(self, store):
+        store.close()
+        store = AccountStore(self.path, snapshot_every=7)
+        return store, Exchange(price_feed=FEED, store=store)
+
+    def test_save_restart_save_restart(self):
+        store = AccountStore(self.path, snapshot_every=7)
+        exchange = Exchange(price_feed=FEED, store=store)
+        for i in range(5):
+            exchange.open_account(f"user{i}", 20_000.0)
+        self.trade(exchange, 60)
+        exchange.deposit_funds('user0', 500.0)
+        exchange.withdraw_funds('user1', 250.0)
+        before = state(exchange)
+
+        store, exchange = self.restart(store)
+        self.assertEqual(store.user_ids(), [f"user{i}" for i in range(5)])
+        self.assertEqual(state(exchange), before)
+
+        # A second round of trading on the restored accounts, including a new one
+        exchange.open_account('user5', 5_000.0)
+        self.trade(exchange, 60)
+        self.trade(exchange, 25)
+        before = state(exchange)
+
+        store, exchange = self.restart(store)
+        self.assertEqual(state(exchange), before)
+        np.testing.assert_allclose(exchange.portfolio_values(),
+                                   [before[user][0] + FEED.value(before[user][1]) for user in before])
+        store.close()
+
+    def test_history_is_read_lazily(self):
+        store = AccountStore(self.path, snapshot_every=7)
+        exchange = Exchange(price_feed=FEED, store=store)
+        exchange.open_account('alice', 20_000.0)
+        self.trade(exchange, 30)
+        expected = state(exchange)['alice']
+        store.close()
+
+        store = AccountStore(self.path, snapshot_every=7)
+        account = store.load('alice', FEED)
+        # Balance and holdings come from the snapshot and log tail; the ledger is not loaded yet
+        self.assertIsNotNone(account.transactions._loader)
+        self.assertEqual((account.balance, account.holdings), expected[:2])
+        self.assertEqual([dict(tx) for tx in account.list_transactions()], expected[2])
+        self.assertIsNone(account.transactions._loader)
+        with self.assertRaises(KeyError):
+            store.load('nobody')
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ledger import Ledger
+from prices import ReplayPriceFeed, StaticPriceFeed
+from valuation import MarkToMarket
+
+T0 = datetime.datetime(2024, 1, 2, 9, 30).timestamp()
+
+
+def history():
+    """A ledger of deposits, withdrawals and trades, one row every 10 seconds."""
+    ledger = Ledger('alice')
+    balance = 0.0
+    rows = [
+        ('ACCOUNT_CREATION', 10_000.0, None, 0, 0.0),
+        ('BUY', None, 'AAPL', 10, 100.0),
+        ('BUY', None, 'TSLA', 5, 200.0),
+        ('DEPOSIT', 1_000.0, None, 0, 0.0),
+        ('SELL', None, 'AAPL', 4, 120.0),
+        ('WITHDRAWAL', 500.0, None, 0, 0.0),
+        ('BUY', None, 'AAPL', 3, 90.0),
+        ('SELL', None, 'TSLA', 5, 150.0),
+    ]
+    for i, (kind, amount, symbol, quantity, price) in enumerate(rows):
+        if symbol is not None:
+            amount = quantity * price
+        balance += -amount if kind in ('WITHDRAWAL', 'BUY') else amount
+        ledger.append(kind, amount, balance, symbol=symbol, quantity=quantity, price=price, ts=T0 + 10 * i)
+    return ledger
+
+
+def replay(ledger, when, price_of):
+    """Cash, positions, contributions and P&L at `when` by walking the transactions."""
+    cash, contributions, positions = 0.0, 0.0, {}
+    for tx in ledger:
+        if tx['timestamp'].timestamp() > when:
+            break
+        cash = tx['balance']
+        if tx['type'] in ('ACCOUNT_CREATION', 'DEPOSIT'):
+            contributions += tx['amount']
+        elif tx['type'] == 'WITHDRAWAL':
+            contributions -= tx['amount']
+        else:
+            sign = 1 if tx['type'] == 'BUY' else -1
+            positions[tx['symbol']] = positions.get(tx['symbol'], 0) + sign * tx['quantity']
+    positions = {symbol: quantity for symbol, quantity in positions.items() if quantity}
+    value = cash + sum(price_of(symbol, when) * quantity for symbol, quantity in positions.items())
+    return positions, value, value - contributions
+
+
+def last_trade_price(ledger):
+    def price_of(symbol, when):
+        trades = [tx for tx in ledger if tx['type'] in ('BUY', 'SELL') and tx['symbol'] == symbol
+                  and tx['timestamp'].timestamp() <= when]
+        return trades[-1]['price']
+    return price_of
+
+
+class TestMarkToMarket(unittest.TestCase):
+    def check_against_replay(self, ledger, valuation, price_of):
+        # Peaks are taken at transaction times (and at the time asked about), as MarkToMarket documents
+        row_times = [tx['timestamp'].timestamp() for tx in ledger]
+        row_pnls = [replay(ledger, when, price_of)[2] for when in row_times]
+        for when in [T0 + t for t in np.arange(0, 75, 2.5)]:
+            positions, value, pnl = replay(ledger, when, price_of)
+            past = [p for t, p in zip(row_times, row_pnls) if t <= when]
+            peak = max(past + [pnl])
+            max_drawdown = max([max(past[:i + 1]) - p for i, p in enumerate(past)] + [peak - pnl])
+            state = valuation.at(datetime.datetime.fromtimestamp(when))
+            self.assertEqual(state['positions'], positions)
+            self.assertAlmostEqual(state['value'], value, places=6)
+            self.assertAlmostEqual(state['pnl'], pnl, places=6)
+            self.assertAlmostEqual(state['drawdown'], peak - pnl, places=6)
+            self.assertAlmostEqual(state['max_drawdown'], max_drawdown, places=6)
+
+    def test_marks_at_last_trade_price(self):
+        ledger = history()
+        valuation = MarkToMarket(ledger, StaticPriceFeed({'AAPL': 100.0, 'TSLA': 200.0}))
+        self.check_against_replay(ledger, valuation, last_trade_price(ledger))
+
+    def test_marks_from_replayed_prices(self):
+        ticks = pd.DataFrame({
+            'timestamp': pd.to_datetime(np.repeat(T0 + np.arange(0, 80, 5.0), 2), unit='s'),
+            'symbol': ['AAPL', 'TSLA'] * 16,
+            'price': np.round(np.r_[100 + np.arange(16) * 3.0, 200 - np.arange(16) * 4.0].reshape(2, 16).T.ravel(), 2),
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ticks.csv')
+            ticks.to_csv(path, index=False)
+            feed = ReplayPriceFeed(path, clock=lambda: T0 + 75)
+        ledger = history()
+        valuation = MarkToMarket(ledger, feed)
+
+        def price_of(symbol, when):
+            return feed.history(np.array([when]), [symbol])[0, 0]
+
+        self.check_against_replay(ledger, valuation, price_of)
+        curve = valuation.curve(datetime.datetime.fromtimestamp(T0), datetime.datetime.fromtimestamp(T0 + 70),
+                                points=15)
+        expected = [replay(ledger, when, price_of)[2] for when in T0 + np.linspace(0, 70, 15)]
+        np.testing.assert_allclose(curve['pnl'], expected)
+        self.assertTrue((curve['drawdown'] >= -1e-9).all())
+
+    def test_incremental_update_matches_full_build(self):
+        ledger = history()
+        feed = StaticPriceFeed({'AAPL': 100.0, 'TSLA': 200.0})
+        incremental = MarkToMarket(ledger, feed)
+        incremental.update()
+        ledger.append('BUY', 220.0, ledger[-1]['balance'] - 220.0, symbol='AAPL', quantity=2, price=110.0, ts=T0 + 80)
+        full = MarkToMarket(ledger, feed)
+        when = datetime.datetime.fromtimestamp(T0 + 85)
+        self.assertEqual(incremental.at(when), full.at(when))
+        self.assertEqual(len(incremental), len(ledger))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ledger import KIND_CODES, Ledger
+from prices import PriceFeed, price_feed
+
+BUY = KIND_CODES['BUY']
+SELL = KIND_CODES['SELL']
+FUNDING = {KIND_CODES['ACCOUNT_CREATION']: 1.0, KIND_CODES['DEPOSIT']: 1.0, KIND_CODES['WITHDRAWAL']: -1.0}
+
+# Prefix arrays kept per ledger row; 'positions' and 'marks' have one column per symbol
+COLUMNS = ('ts', 'cash', 'contributions', 'pnl', 'peak', 'max_drawdown')
+
+
+class MarkToMarket:
+    """Incremental mark-to-market of a ledger, for P&L at any time without replaying it.
+
+    For every ledger row it keeps the running state after that row: cash,
+    share positions, net contributions (deposits minus withdrawals), the marks
+    used to value the positions, and P&L = cash + positions . marks -
+    contributions with its running peak and running maximum drawdown (in
+    dollars, so deposits and withdrawals don't look like gains or losses).
+    These are prefix arrays, extended only by the rows appended since the last
+    update(), so a point-in-time query is one binary search over the
+    timestamps and a curve of N points is N of them, however long the history.
+
+    Marks are taken from the price feed's history when it has one (a
+    ReplayPriceFeed); otherwise each symbol is marked at the account's last
+    trade price up to that row. The current value uses the live feed.
+    """
+
+    def __init__(self, ledger: Ledger, price_feed: PriceFeed = price_feed) -> None:
+        """
+        Args:
+            ledger: The transaction ledger to value; it is read again on every update().
+            price_feed: Live prices for the current value, and historical marks if it has history().
+        """
+        self.ledger = ledger
+        self.price_feed = price_feed
+        self._size = 0
+        self._columns = {name: np.zeros(1024) for name in COLUMNS}
+        self._positions = np.zeros((1024, 0), dtype=np.int64)
+        self._marks = np.zeros((1024, 0))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def symbols(self) -> list[str]:
+        return self.ledger.symbols[:self._positions.shape[1]]
+
+    def _reserve(self, count: int, symbols: int) -> None:
+        capacity = len(self._positions)
+        if self._size + count > capacity:
+            capacity = max(capacity * 2, self._size + count)
+            for name, column in self._columns.items():
+                self._columns[name] = np.resize(column, capacity)
+        if capacity != len(self._positions) or symbols != self._positions.shape[1]:
+            positions = np.zeros((capacity, symbols), dtype=np.int64)
+            marks = np.zeros((capacity, symbols))
+            positions[:self._size, :self._positions.shape[1]] = self._positions[:self._size]
+            marks[:self._size, :self._marks.shape[1]] = self._marks[:self._size]
+            self._positions, self._marks = positions, marks
+
+    def update(self) -> None:
+        """Extend the prefix arrays with the ledger rows added since the last update."""
+        rows = self.ledger.rows[self._size:]
+        count = len(rows)
+        if not count:
+            return
+        symbols = len(self.ledger.symbols)
+        self._reserve(count, symbols)
+        last = self._size - 1
+        kinds = rows['kind']
+        trades = np.flatnonzero((kinds == BUY) | (kinds == SELL))
+        columns = rows['symbol'][trades].astype(np.intp)
+
+        shares = np.zeros((count, symbols), dtype=np.int64)
+        shares[trades, columns] = np.where(kinds[trades] == BUY, rows['quantity'][trades], -rows['quantity'][trades])
+        positions = np.cumsum(shares, axis=0)
+        # Each symbol's last trade price up to each row, carried over from the previous update
+        traded = np.full((count, symbols), -1, dtype=np.intp)
+        traded[trades, columns] = trades
+        traded = np.maximum.accumulate(traded, axis=0)
+        marks = np.where(traded >= 0, rows['price'][np.maximum(traded, 0)], 0.0)
+        if self._size:
+            positions += self._positions[last]
+            marks = np.where(traded >= 0, marks, self._marks[last])
+        history = getattr(self.price_feed, 'history', None)
+        if history is not None:
+            feed_marks = history(rows['ts'], self.ledger.symbols)
+            marks = np.where(feed_marks > 0.0, feed_marks, marks)
+
+        funding = np.zeros(count)
+        for kind, sign in FUNDING.items():
+            funding[kinds == kind] = sign
+        contributions = np.cumsum(funding * rows['amount'])
+        pnl = rows['balance'] + (positions * marks).sum(axis=1)
+        if self._size:
+            contributions += self._columns['contributions'][last]
+        pnl -= contributions
+        peak = np.maximum.accumulate(pnl)
+        if self._size:
+            peak = np.maximum(peak, self._columns['peak'][last])
+        max_drawdown = np.maximum.accumulate(peak - pnl)
+        if self._size:
+            max_drawdown = np.maximum(max_drawdown, self._columns['max_drawdown'][last])
+
+        added = slice(self._size, self._size + count)
+        for name, values in (('ts', rows['ts']), ('cash', rows['balance']), ('contributions', contributions),
+                             ('pnl', pnl), ('peak', peak), ('max_drawdown', max_drawdown)):
+            self._columns[name][added] = values
+        self._positions[added] = positions
+        self._marks[added] = marks
+        self._size += count
+
+    def _row(self, times: np.ndarray) -> np.ndarray:
+        """Index of the last row at or before each of `times`, -1 before the first."""
+        return np.searchsorted(self._columns['ts'][:self._size], times, side='right') - 1
+
+    def _prices(self, times: Optional[np.ndarray], rows: np.ndarray) -> np.ndarray:
+        """Marks for `rows` at `times`: the live feed for now, else the feed's history or the row's marks."""
+        if times is None:
+            return self.price_feed.get_prices(self.symbols)[None, :]
+        history = getattr(self.price_feed, 'history', None)
+        marks = self._marks[rows]
+        if history is None:
+            return marks
+        feed_marks = history(times, self.symbols)
+        return np.where(feed_marks > 0.0, feed_marks, marks)
+
+    def at(self, when: Optional[datetime.datetime] = None) -> dict:
+        """Account state at `when` (default: now, at live prices).
+
+        Args:
+            when: Point in time to value the account at.
+
+        Returns:
+            dict: cash, positions, value, pnl, drawdown and max_drawdown at that time;
+            all zero before the first transaction.
+        """
+        self.update()
+        times = None if when is None else np.array([when.timestamp()])
+        row = self._size - 1 if when is None else int(self._row(times)[0])
+        if row < 0:
+            return {'cash': 0.0, 'positions': {}, 'value': 0.0, 'pnl': 0.0, 'drawdown': 0.0, 'max_drawdown': 0.0}
+        rows = np.array([row])
+        positions = self._positions[row]
+        value = float(self._columns['cash'][row] + positions @ self._prices(times, rows)[0])
+        pnl = value - float(self._columns['contributions'][row])
+        peak = max(float(self._columns['peak'][row]), pnl)
+        return {
+            'cash': float(self._columns['cash'][row]),
+            'positions': {symbol: int(quantity) for symbol, quantity in zip(self.symbols, positions) if quantity},
+            'value': value,
+            'pnl': pnl,
+            'drawdown': peak - pnl,
+            'max_drawdown': max(float(self._columns['max_drawdown'][row]), peak - pnl),
+        }
+
+    def exposure(self, when: Optional[datetime.datetime] = None) -> dict[str, float]:
+        """Market value held in each symbol at `when` (default: now)."""
+        self.update()
+        times = None if when is None else np.array([when.timestamp()])
+        row = self._size - 1 if when is None else int(self._row(times)[0])
+        if row < 0:
+            return {}
+        values = self._positions[row] * self._prices(times, np.array([row]))[0]
+        return {symbol: float(value) for symbol, value in zip(self.symbols, values) if value}
+
+    def curve(self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+              points: int = 200) -> pd.DataFrame:
+        """Value, P&L and drawdown sampled at `points` evenly spaced times.
+
+        Args:
+            start: First sample time; defaults to the first transaction.
+            end: Last sample time; defaults to the last transaction, or now if later.
+            points: Number of samples, whatever the number of transactions in between.
+
+        Returns:
+            pd.DataFrame: time, cash, value, pnl and drawdown columns, one row per sample.
+        """
+        self.update()
+        if not self._size:
+            return pd.DataFrame(columns=['time', 'cash', 'value', 'pnl', 'drawdown'])
+        ts = self._columns['ts']
+        first = ts[0] if start is None else max(start.timestamp(), ts[0])
+        last = max(ts[self._size - 1], datetime.datetime.now().timestamp()) if end is None else end.timestamp()
+        times = np.linspace(first, max(first, last), points)
+        rows = self._row(times)
+        cash = self._columns['cash'][rows]
+        value = cash + (self._positions[rows] * self._prices(times, rows)).sum(axis=1)
+        pnl = value - self._columns['contributions'][rows]
+        peak = np.maximum(self._columns['peak'][rows], np.maximum.accumulate(pnl))
+        return pd.DataFrame({
+            'time': pd.to_datetime([datetime.datetime.fromtimestamp(t) for t in times.tolist()]),
+            'cash': cash,
+            'value': value,
+            'pnl': pnl,
+            'drawdown': peak - pnl,
+        })
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import tiktoken
+    # Resolved once: get_encoding() loads the BPE ranks, and a missing tiktoken should not be retried per call
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+# Summaries hold visitor details (names, emails), so they are kept for a bounded number of sessions and time
+MAX_SESSIONS = int(os.getenv("HISTORY_MAX_SESSIONS", "1000"))
+SUMMARY_TTL = float(os.getenv("HISTORY_SUMMARY_TTL", str(7 * 24 * 3600)))
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a chat between a website visitor and an assistant. "
+    "Merge the new messages into the existing summary. Keep every concrete fact: the visitor's name, "
+    "email, company, what they asked, what was answered and anything promised. Stay under 200 words. "
+    "Reply with the summary only."
+)
+
+
+def count_tokens(text):
+    if _ENCODING is None:
+        # Rough rule of thumb when tiktoken or its encodings are unavailable
+        return len(text) // 4
+    return len(_ENCODING.encode(text))
+
+
+class HistoryManager:
+    """ Keeps the history sent to the model within a token budget.
+
+    The last `keep_turns` user turns are sent verbatim. Anything older is folded into
+    a running summary that is cached per session, in memory and in `store_dir`, so each
+    old message is summarized once rather than on every turn. If the visible history no
+    longer starts with the messages the summary covers (the user cleared or retried),
+    the summary is rebuilt from scratch. At most `max_sessions` summaries are kept in
+    memory (least recently used first out), and summaries not updated for `ttl`
+    seconds are dropped from memory and deleted from disk.
+    """
+
+    def __init__(self, token_budget=2000, keep_turns=4, model="gpt-4o-mini", store_dir=".history_cache",
+                 max_sessions=MAX_SESSIONS, ttl=SUMMARY_TTL):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.model = model
+        self.store_dir = store_dir
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def compact(self, history, session_id, client):
+        """ Return the messages to send in place of history, summarizing with a sync OpenAI client """
+        state, older, recent = self._plan(history, session_id)
+        if state is None:
+            return recent
+        new = older[state["covered"]:]
+        if new:
+            response = client.chat.completions.create(model=self.model, messages=self._summary_request(state, new))
+            self._update(session_id, state, older, response.choices[0].message.content)
+        return self._assemble(state, recent)
+
+    async def acompact(self, history, session_id, client):
+        """ Same as compact(), with an AsyncOpenAI client """
+        state, older, recent = self._plan(history, session_id)
+        if state is None:
+            return recent
+        new = older[state["covered"]:]
+        if new:
+            response = await client.chat.completions.create(model=self.model, messages=self._summary_request(state, new))
+            self._update(session_id, state, older, response.choices[0].message.content)
+        return self._assemble(state, recent)
+
+    def _plan(self, history, session_id):
+        messages = [
+            {"role": turn["role"], "content": turn["content"]}
+            for turn in history
+            if turn.get("role") in ("user", "assistant") and isinstance(turn.get("content"), str)
+        ]
+        if self._tokens(messages) <= self.token_budget:
+            return None, [], messages
+
+        state = self._load(session_id)
+        covered = state["covered"]
+        if covered > len(messages) or state["digest"] != self._digest(messages[:covered]):
+            state = self._empty()
+            covered = 0
+        # While the summary plus everything after it still fits, reuse it as is; folding only
+        # happens when the budget is exceeded, so the summarizer runs every few turns at most
+        if covered and self._tokens(messages[covered:]) + count_tokens(state["summary"]) <= self.token_budget:
+            return state, messages[:covered], messages[covered:]
+
+        user_turns = [i for i, message in enumerate(messages) if message["role"] == "user"]
+        split = user_turns[-self.keep_turns] if len(user_turns) >= self.keep_turns else 0
+        split = max(split, covered)
+        older, recent = messages[:split], messages[split:]
+        # Even the verbatim window can be too long; drop its oldest messages but always keep the last one
+        while len(recent) > 1 and self._tokens(recent) > self.token_budget:
+            older.append(recent.pop(0))
+        return state, older, recent
+
+    def _summary_request(self, state, new):
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in new)
+        return [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Existing summary:\n{state['summary'] or '(none)'}\n\nNew messages:\n{transcript}"},
+        ]
+
+    def _update(self, session_id, state, older, summary):
+        state.update(covered=len(older), digest=self._digest(older), summary=summary or state["summary"])
+        self._save(session_id, state)
+
+    @staticmethod
+    def _assemble(state, recent):
+        if not state["summary"]:
+            return recent
+        summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{state['summary']}"}
+        return [summary] + recent
+
+    @staticmethod
+    def _tokens(messages):
+        return sum(count_tokens(message["content"]) + 4 for message in messages)
+
+    @staticmethod
+    def _digest(messages):
+        return hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, session_id):
+        return os.path.join(self.store_dir, re.sub(r"[^A-Za-z0-9_-]", "_", session_id) + ".json")
+
+    @staticmethod
+    def _empty():
+        return {"covered": 0, "digest": HistoryManager._digest([]), "summary": ""}
+
+    def _remember(self, session_id, state, updated):
+        """ Cache a session's state, evicting the least recently used beyond max_sessions; call with the lock held """
+        self._sessions[session_id] = (dict(state), updated)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _load(self, session_id):
+        now = time.time()
+        with self._lock:
+            if session_id in self._sessions:
+                state, updated = self._sessions[session_id]
+                if now - updated <= self.ttl:
+                    self._sessions.move_to_end(session_id)
+                    return dict(state)
+                del self._sessions[session_id]
+        path = self._path(session_id)
+        try:
+            updated = os.path.getmtime(path)
+            if now - updated > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state, updated = self._empty(), now
+        with self._lock:
+            self._remember(session_id, state, updated)
+        return dict(state)
+
+    def _save(self, session_id, state):
+        now = time.time()
+        with self._lock:
+            self._remember(session_id, state, now)
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            tmp_path = f"{self._path(session_id)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._path(session_id))
+        except OSError as e:
+            print(f"History summary not saved: {e}", flush=True)
+        # Sessions that never come back would otherwise leave their summary on disk forever
+        if now - self._purged_at > min(self.ttl, 3600):
+            self._purged_at = now
+            self.purge()
+
+    def purge(self):
+        """ Delete summary files not updated for `ttl` seconds; returns how many were removed """
+        cutoff = time.time() - self.ttl
+        removed = 0
+        try:
+            entries = list(os.scandir(self.store_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
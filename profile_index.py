@@ -0,0 +1,92 @@
+import math
+import re
+from collections import Counter
+
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his i in is it its me my of on or our she "
+    "that the their them they this to was we were what when where which who why will with you your "
+    "do does did can could would should about tell".split()
+)
+
+
+def stem(token):
+    """ Crude plural folding so "books" matches "book" and "certifications" matches "certification" """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(token) for token in re.findall(r"[a-z0-9+#]+", text.lower()) if token not in STOPWORDS]
+
+
+def chunk_text(text, chunk_words=120, overlap=30):
+    """ Split text into overlapping windows of roughly chunk_words words """
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class ProfileIndex:
+    """ Small in-memory TF-IDF index over the profile documents.
+
+    Pure Python and fully offline: the corpus is a few thousand words, so sparse
+    dict vectors and a linear cosine scan are well under a millisecond per query.
+    """
+
+    def __init__(self, chunks):
+        # chunks: list of (source, text)
+        self.chunks = chunks
+        term_counts = [Counter(tokenize(text)) for _, text in chunks]
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        n = len(chunks)
+        self.idf = {term: math.log((n + 1) / (df + 1)) + 1 for term, df in document_frequency.items()}
+        self.vectors = [self._vectorize(counts) for counts in term_counts]
+
+    @classmethod
+    def from_documents(cls, documents, chunk_words=120, overlap=30):
+        """ Build from {source name: text}, skipping documents whose text is a duplicate of an earlier one """
+        chunks = []
+        seen = set()
+        for source, text in documents.items():
+            key = " ".join(text.split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            chunks.extend((source, chunk) for chunk in chunk_text(text, chunk_words, overlap))
+        return cls(chunks)
+
+    def _vectorize(self, counts):
+        vector = {term: (1 + math.log(count)) * self.idf.get(term, 0.0) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items() if weight} if norm else {}
+
+    def search(self, query, k=4):
+        """ Return up to k (score, source, text) tuples ranked by cosine similarity """
+        query_vector = self._vectorize(Counter(tokenize(query)))
+        if not query_vector:
+            return []
+        scored = []
+        for (source, text), vector in zip(self.chunks, self.vectors):
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items())
+            if score > 0:
+                scored.append((score, source, text))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+    def context(self, query, k=4, fallback=1):
+        """ Markdown excerpts for the prompt; falls back to the leading chunks when nothing matches """
+        hits = self.search(query, k)
+        if not hits:
+            hits = [(0.0, source, text) for source, text in self.chunks[:fallback]]
+        return "\n\n".join(f"### From {source}\n{text}" for _, source, text in hits)
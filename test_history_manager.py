@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from history_manager import HistoryManager, count_tokens
+
+
+class FakeClient:
+    """ Sync OpenAI client stand-in whose summary lists how many messages it was given """
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages):
+        self.calls += 1
+        message = SimpleNamespace(content=f"summary {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def conversation(turns):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} " + "word " * 60})
+        history.append({"role": "assistant", "content": f"answer {i} " + "word " * 60})
+    return history
+
+
+class TestHistoryManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def manager(self, **kwargs):
+        return HistoryManager(token_budget=300, keep_turns=2, store_dir=self.tmp.name, **kwargs)
+
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("word " * 100), count_tokens("word " * 10))
+
+    def test_summary_is_reused_across_turns(self):
+        manager, client = self.manager(), FakeClient()
+        history = conversation(8)
+        messages = manager.compact(history, "session", client)
+        self.assertEqual(messages[0]["role"], "system")
+        self.assertIn("summary 1", messages[0]["content"])
+        self.assertEqual(client.calls, 1)
+        manager.compact(history, "session", client)
+        self.assertEqual(client.calls, 1)
+        # A fresh manager picks the summary up from disk
+        self.manager().compact(history, "session", client)
+        self.assertEqual(client.calls, 1)
+
+    def test_sessions_in_memory_are_capped(self):
+        manager, client = self.manager(max_sessions=3), FakeClient()
+        for i in range(10):
+            manager.compact(conversation(8), f"session{i}", client)
+        self.assertEqual(list(manager._sessions), ["session7", "session8", "session9"])
+
+    def test_expired_summaries_are_deleted(self):
+        manager, client = self.manager(ttl=60), FakeClient()
+        manager.compact(conversation(8), "old", client)
+        path = manager._path("old")
+        stale = time.time() - 120
+        os.utime(path, (stale, stale))
+        manager._sessions.clear()
+        manager.compact(conversation(8), "old", client)
+        self.assertEqual(client.calls, 2)
+
+        manager.compact(conversation(8), "gone", client)
+        os.utime(manager._path("gone"), (stale, stale))
+        self.assertEqual(manager.purge(), 1)
+        self.assertFalse(os.path.exists(manager._path("gone")))
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from push_dispatcher import MAX_MESSAGE_LENGTH, LocalPushoverServer, PushDispatcher
+
+
+class TestPushDispatcher(unittest.TestCase):
+    def deliver(self, messages, **kwargs):
+        with LocalPushoverServer(**kwargs) as server:
+            dispatcher = PushDispatcher(url=server.url, coalesce_window=0.3, backoff=0.01)
+            for text in messages:
+                dispatcher.push(text)
+            self.assertTrue(dispatcher.flush(timeout=10))
+            return server.messages, dispatcher
+
+    def test_burst_is_coalesced(self):
+        delivered, dispatcher = self.deliver([f"message {i}" for i in range(5)], fail_first=1)
+        self.assertEqual(len(delivered), 1)
+        self.assertTrue(delivered[0].startswith("5 notifications:"))
+        self.assertEqual(dispatcher.sent, 1)
+
+    def test_batches_never_cut_a_message(self):
+        leads = [f"lead {i}: " + "x" * 130 + f" email{i}@example.com" for i in range(10)]
+        delivered, dispatcher = self.deliver(leads)
+        self.assertGreater(len(delivered), 1)
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text in delivered))
+        for lead in leads:
+            self.assertEqual(sum(lead in text for text in delivered), 1)
+        self.assertEqual(dispatcher.sent, len(delivered))
+
+    def test_oversized_message_is_sent_in_parts(self):
+        text = "".join(str(i % 10) for i in range(2500))
+        delivered, _ = self.deliver([text])
+        self.assertEqual(len(delivered), 3)
+        self.assertEqual("".join(delivered), text)
+
+
+if __name__ == '__main__':
+    unittest.main()